@@ -0,0 +1,178 @@
+# Expiry-aware allocation: propose one receiver for every open listing, soonest expiry
+# first, within the listing's city and each receiver's capacity.
+#
+# Receiver scores are computed once as NumPy arrays (receiver x food type); the greedy
+# pass then keeps one heap of receivers per (city, food type), so allocating L listings
+# over R receivers costs O((L + R) log R) instead of L * R pairwise comparisons.
+import heapq
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from db import run_query, table_exists
+
+HORIZON_DAYS = 7
+HISTORY_DAYS = 90
+# Listings per receiver per round: 1 for newcomers, more for receivers who collect
+MIN_CAPACITY = 1
+MAX_CAPACITY = 10
+# Score = reliability + affinity for the food type + share of capacity still free
+W_RELIABILITY = 0.5
+W_AFFINITY = 0.3
+W_FREE = 0.2
+
+MATCH_COLUMNS = ["Rank", "Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Days_Left", "Location",
+                 "Food_Type", "Receiver_ID", "Receiver_Name", "Receiver_Type", "Score"]
+
+
+# ---------- Inputs ----------
+def load_inputs(city=None, horizon_days=HORIZON_DAYS, today=None, db_path=None):
+    """(listings, receivers, claims) from the database (db_path: e.g. the city's region shard).
+
+    Listings are open: not expired, expiring within horizon_days (None = any time) and
+    without a Pending or Completed claim. Claims cover the last HISTORY_DAYS.
+    """
+    today = today or date.today()
+    if not all(table_exists(t, db_path) for t in ("food_listings", "receivers", "claims")):
+        empty = pd.DataFrame()
+        return empty, empty, empty
+    where, params = ["f.Expiry_Date >= ?"], [today.isoformat()]
+    if horizon_days is not None:
+        where.append("f.Expiry_Date <= ?")
+        params.append((today + timedelta(days=horizon_days)).isoformat())
+    if city:
+        where.append("f.Location = ?")
+        params.append(city)
+    listings = run_query(f"""
+        SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, f.Location, f.Food_Type
+        FROM food_listings f
+        WHERE {' AND '.join(where)}
+          AND NOT EXISTS (
+              SELECT 1 FROM claims c
+              WHERE c.Food_ID = f.Food_ID AND c.Status IN ('Pending', 'Completed')
+          );
+    """, tuple(params), db_path=db_path)
+    receivers = run_query(
+        "SELECT Receiver_ID, Name, Type, City FROM receivers" + (" WHERE City = ?;" if city else ";"),
+        (city,) if city else (), db_path=db_path,
+    )
+    claims = run_query("""
+        SELECT c.Receiver_ID, c.Status, f.Food_Type
+        FROM claims c LEFT JOIN food_listings f ON f.Food_ID = c.Food_ID
+        WHERE c.Timestamp >= ?;
+    """, ((today - timedelta(days=HISTORY_DAYS)).isoformat(),), db_path=db_path)
+    return listings, receivers, claims
+
+
+# ---------- Scoring ----------
+def _city_key(values):
+    """Case- and space-insensitive city; NULL or blank cities are NA and match no city."""
+    key = values.astype("string").str.strip().str.lower()
+    return key.mask(key == "")
+
+
+def receiver_scores(receivers, claims, food_types):
+    """Per-receiver capacity plus a (receiver x food type) base score, all vectorised."""
+    n = len(receivers)
+    index = pd.Index(receivers["Receiver_ID"])
+    rows = index.get_indexer(claims["Receiver_ID"]) if len(claims) else np.array([], dtype=int)
+    known = rows >= 0
+    rows = rows[known]
+    completed = (claims["Status"].to_numpy()[known] == "Completed").astype(float) if len(claims) else None
+
+    total = np.bincount(rows, minlength=n)
+    done = np.bincount(rows, weights=completed, minlength=n)
+    # Laplace-smoothed completion rate: newcomers start at 0.5 rather than 0 or 1
+    reliability = (done + 1) / (total + 2)
+    capacity = np.clip(MIN_CAPACITY + done, MIN_CAPACITY, MAX_CAPACITY).astype(int)
+
+    type_codes = pd.Index(food_types).get_indexer(claims["Food_Type"].fillna("")[known]) if len(claims) else rows
+    per_type = np.zeros((n, len(food_types)))
+    hit = type_codes >= 0
+    np.add.at(per_type, (rows[hit], type_codes[hit]), 1)
+    affinity = per_type / np.maximum(per_type.sum(axis=1, keepdims=True), 1)
+
+    base = W_RELIABILITY * reliability[:, None] + W_AFFINITY * affinity
+    return capacity, base
+
+
+# ---------- Allocation ----------
+def allocate(listings, receivers, claims, today=None):
+    """Match listings to receivers; returns one row per matched listing, most urgent first.
+
+    Listings whose city has no receiver with capacity left are not in the result.
+    """
+    today = today or date.today()
+    if listings.empty or receivers.empty:
+        return pd.DataFrame(columns=MATCH_COLUMNS)
+
+    food_types = pd.Index(sorted(set(listings["Food_Type"].fillna(""))))
+    capacity, base = receiver_scores(receivers, claims, food_types)
+    remaining = capacity.copy()
+    version = np.zeros(len(receivers), dtype=int)
+
+    # NA cities factorize to -1: those listings and receivers are never matched
+    cities, _ = pd.factorize(pd.concat([_city_key(listings["Location"]), _city_key(receivers["City"])]))
+    listing_city, receiver_city = cities[:len(listings)], cities[len(listings):]
+    listing_type = food_types.get_indexer(listings["Food_Type"].fillna(""))
+
+    # One max-heap per (city, food type) of (-score, receiver, version), built on first use;
+    # an assignment bumps the receiver's version so its older entries are skipped
+    members = {}
+    for r, c in enumerate(receiver_city):
+        if c >= 0:
+            members.setdefault(c, []).append(r)
+    heaps = {}
+
+    def priority(r, t):
+        return base[r, t] + W_FREE * remaining[r] / capacity[r]
+
+    def heap_for(c, t):
+        if t not in heaps.setdefault(c, {}):
+            rs = np.array([r for r in members.get(c, []) if remaining[r]], dtype=int)
+            heap = list(zip((-priority(rs, t)).tolist(), rs.tolist(), version[rs].tolist()))
+            heapq.heapify(heap)
+            heaps[c][t] = heap
+        return heaps[c][t]
+
+    # Soonest expiry first; larger quantities break ties
+    expiry = pd.to_datetime(listings["Expiry_Date"], errors="coerce")
+    days_left = (expiry - pd.Timestamp(today)).dt.days.to_numpy()
+    order = np.lexsort((-listings["Quantity"].fillna(0).to_numpy(), np.nan_to_num(days_left, nan=np.inf)))
+
+    chosen = np.full(len(listings), -1)
+    score = np.zeros(len(listings))
+    for i in order:
+        if listing_city[i] < 0:
+            continue
+        heap = heap_for(listing_city[i], listing_type[i])
+        while heap:
+            neg, r, seen = heapq.heappop(heap)
+            if seen != version[r] or remaining[r] == 0:
+                continue
+            chosen[i], score[i] = r, -neg
+            remaining[r] -= 1
+            version[r] += 1
+            if remaining[r]:
+                # Re-queue with the lower free-capacity share in every heap of its city
+                for t, other in heaps[receiver_city[r]].items():
+                    heapq.heappush(other, (-priority(r, t), r, version[r]))
+            break
+
+    matched = order[chosen[order] >= 0]
+    picked = receivers.iloc[chosen[matched]].reset_index(drop=True)
+    result = listings.iloc[matched].reset_index(drop=True)
+    result["Days_Left"] = days_left[matched]
+    result["Receiver_ID"] = picked["Receiver_ID"]
+    result["Receiver_Name"] = picked["Name"]
+    result["Receiver_Type"] = picked["Type"]
+    result["Score"] = score[matched].round(3)
+    result.insert(0, "Rank", np.arange(1, len(result) + 1))
+    return result[MATCH_COLUMNS]
+
+
+def propose_allocations(city=None, horizon_days=HORIZON_DAYS, today=None, db_path=None):
+    """Load open listings for city (all cities when None) and allocate them."""
+    listings, receivers, claims = load_inputs(city, horizon_days, today, db_path)
+    return allocate(listings, receivers, claims, today)
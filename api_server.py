@@ -0,0 +1,301 @@
+# Read-only HTTP/JSON API over the same data the dashboard shows, for other internal systems.
+#
+#   GET /queries                      names of the SQL_QUERIES entries
+#   GET /queries/<name>               {"name", "columns", "rows"}
+#   GET /<entity>?after=&limit=&...   keyset page of providers / receivers / food_listings / claims,
+#                                     filtered like the app's table views (e.g. ?City=Delhi)
+#   GET /<entity>/<id>                one row, 404 if missing
+#   GET /exports/<name>?format=csv    export.py's EXPORTS streamed as CSV / JSONL / Parquet
+#                                     (chunked transfer: the server never holds the whole file)
+#
+# Queries go through db.run_query (shared pool, read-only connections, result cache). Every
+# response carries an ETag built from table_versions, the trigger-maintained write counters
+# of the tables the query reads, so a client sending If-None-Match gets a 304 without the
+# query running as long as nothing it depends on has been written. If-None-Match is read as
+# RFC 9110 has it: a comma-separated list of tags, weak (W/"...") or strong, or "*".
+#
+#   python api_server.py --port 8502 [--db path/to/food_wastage.db]
+import argparse
+import hashlib
+import io
+import json
+import math
+import re
+import sqlite3
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import db
+import export
+from query_cache import read_tables
+from schema import CORE_TABLES, DERIVED_TABLES
+from sql_queries import SQL_QUERIES
+from table_views import VIEWS, fetch_page, where_clause
+
+DEFAULT_PORT = 8502
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+QUERY_TIMEOUT_SECONDS = 10.0
+# One entity-tag of an If-None-Match list, its W/ prefix dropped (GET compares weakly)
+ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+
+# URL name -> table view; claims are served pre-joined
+ENTITIES = {
+    "providers": VIEWS["providers"],
+    "receivers": VIEWS["receivers"],
+    "food_listings": VIEWS["food_listings"],
+    "claims": VIEWS["claims_enriched"],
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------- ETags ----------
+def source_tables(tables):
+    """Core tables whose writes can change any of tables (derived tables map back to their sources)."""
+    sources = set()
+    for core in CORE_TABLES:
+        pending, reach = [core], set()
+        while pending:
+            name = pending.pop()
+            if name not in reach:
+                reach.add(name)
+                pending.extend(DERIVED_TABLES.get(name, ()))
+        if reach & set(tables):
+            sources.add(core)
+    return sorted(sources)
+
+
+def table_versions(tables):
+    versions = db.run_query("SELECT Table_Name, Version FROM table_versions;", read_only=True)
+    current = dict(zip(versions["Table_Name"], versions["Version"]))
+    return [(t, int(current.get(t, 0))) for t in tables]
+
+
+def etag(sql, params=()):
+    """Changes whenever a table sql depends on is written (or, for DATE('now') queries, daily)."""
+    key = [sql, list(params), table_versions(source_tables(read_tables(sql)))]
+    if "'now'" in sql.lower():
+        key.append(datetime.now(timezone.utc).date().isoformat())
+    return '"' + hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()[:20] + '"'
+
+
+# ---------- Payloads ----------
+def records(frame):
+    """DataFrame -> JSON-ready list of dicts (NaN/NaT as null)."""
+    rows = frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+    return [{k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()} for row in rows]
+
+
+def _one(params, name, cast=str):
+    values = params.get(name)
+    if not values:
+        return None
+    try:
+        return cast(values[-1])
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be {cast.__name__}")
+
+
+def query_route(name):
+    """(sql, params, build) for GET /queries/<name>."""
+    if name not in SQL_QUERIES:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown query {name!r}")
+    sql = SQL_QUERIES[name]
+
+    def build():
+        frame = db.run_query(sql, read_only=True, timeout=QUERY_TIMEOUT_SECONDS)
+        return {"name": name, "columns": list(frame.columns), "rows": records(frame)}
+
+    return sql, (), build
+
+
+def entity_route(entity, key, params):
+    """(sql, params, build) for GET /<entity> and /<entity>/<id>."""
+    view = ENTITIES[entity]
+    if key is not None:
+        try:
+            key = int(key)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"{view.key} must be an integer")
+        sql = f"SELECT {', '.join(view.columns)} FROM {view.table} WHERE {view.key} = ?;"
+
+        def build():
+            frame = db.run_query(sql, (key,), read_only=True, timeout=QUERY_TIMEOUT_SECONDS)
+            if frame.empty:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"No {entity} row with {view.key} {key}")
+            return records(frame)[0]
+
+        return sql, (key,), build
+
+    unknown = set(params) - set(view.filters) - {"after", "limit"}
+    if unknown:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Unknown parameter(s) {', '.join(sorted(unknown))}")
+    after = _one(params, "after", int)
+    limit = _one(params, "limit", int)
+    limit = DEFAULT_LIMIT if limit is None else limit
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"limit must be between 1 and {MAX_LIMIT}")
+    filters = {label: params[label] for label in view.filters if label in params}
+    clauses, values = where_clause(view, filters)
+
+    def build():
+        page, last = fetch_page(view, filters, after=after, page_size=limit,
+                                read_only=True, timeout=QUERY_TIMEOUT_SECONDS)
+        # A full page may have more behind it; the client continues with ?after=next
+        return {"rows": records(page), "next": last if len(page) == limit else None}
+
+    sql = f"SELECT {', '.join(view.columns)} FROM {view.table} WHERE {' AND '.join(clauses) or '1'}"
+    return sql, (*values, after, limit), build
+
+
+# ---------- Streaming ----------
+class ChunkedWriter(io.RawIOBase):
+    """Binary file object over a response socket that sends every write as one HTTP/1.1 chunk."""
+
+    def __init__(self, wfile):
+        super().__init__()
+        self.wfile = wfile
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), bytes(data)))
+            self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def finish(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+
+# ---------- HTTP ----------
+def if_none_match(header, tag):
+    """Whether an If-None-Match header matches tag: "*", or tag in its list, weak or not."""
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return tag in ENTITY_TAG.findall(header)
+
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "FoodWastageAPI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        params = parse_qs(url.query)
+        try:
+            if not parts:
+                self._send(HTTPStatus.OK, {"queries": "/queries", "exports": "/exports", "entities": sorted(ENTITIES)})
+            elif parts == ["queries"]:
+                self._send(HTTPStatus.OK, {"queries": sorted(SQL_QUERIES)})
+            elif parts[0] == "queries" and len(parts) == 2:
+                self._conditional(*query_route(parts[1]))
+            elif parts == ["exports"]:
+                self._send(HTTPStatus.OK, {"exports": sorted(export.EXPORTS), "formats": list(export.FORMATS)})
+            elif parts[0] == "exports" and len(parts) == 2:
+                self._export(parts[1], _one(params, "format") or "csv")
+            elif parts[0] in ENTITIES and len(parts) <= 2:
+                self._conditional(*entity_route(parts[0], parts[1] if len(parts) == 2 else None, params))
+            else:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"No route for {url.path}")
+        except ApiError as e:
+            self._send(e.status, {"error": str(e)})
+        except sqlite3.OperationalError as e:
+            # Includes the timeout's "interrupted" and tables missing before the first ingest
+            self._send(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)})
+
+    def _conditional(self, sql, params, build):
+        tag = etag(sql, params)
+        header = self.headers.get("If-None-Match")
+        if not if_none_match(header, tag):
+            self._send(HTTPStatus.OK, build(), tag)
+            return
+        if header.strip() == "*":
+            # "*" matches only if there is a current representation: a missing row is still a 404
+            build()
+        self._send(HTTPStatus.NOT_MODIFIED, None, tag)
+
+    def _export(self, name, fmt):
+        if name not in export.EXPORTS:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown export {name!r}")
+        if fmt not in export.FORMATS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"format must be one of {', '.join(export.FORMATS)}")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", export.FORMATS[fmt][1])
+        self.send_header("Content-Disposition", f'attachment; filename="{export.file_name(name, fmt)}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        raw = ChunkedWriter(self.wfile)
+        # Coalesce the writers' small writes (one per CSV row) into 64 KiB chunks
+        out = io.BufferedWriter(raw, buffer_size=64 * 1024)
+        try:
+            export.export_query(name, out, fmt)
+            out.flush()
+        except (sqlite3.Error, ValueError):
+            # Too late for an error status: end the response without its last chunk, so the
+            # client sees it incomplete
+            self.close_connection = True
+            return
+        raw.finish()
+
+    def _send(self, status, payload, tag=None):
+        body = b"" if payload is None else json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        if tag:
+            self.send_header("ETag", tag)
+            # Cacheable, but revalidate every time: the ETag check is far cheaper than the query
+            self.send_header("Cache-Control", "no-cache")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve SQL_QUERIES and entity lookups as JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", help="Database file (default: FOOD_WASTAGE_DB or database/food_wastage.db)")
+    args = parser.parse_args(argv)
+    if args.db:
+        db.configure(args.db)
+
+    server = make_server(args.host, args.port)
+    print(f"✅ Serving {db.DB_PATH} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
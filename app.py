@@ -3,247 +3,248 @@
 # providers(Provider_ID, Name, Type, Address, City, Contact)
 # receivers(Receiver_ID, Name, Type, City, Contact)
 # food_listings(Food_ID, Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, Location)
-# claims(Claim_ID, Food_ID, Receiver_ID, Claim_Date, Status)   # if present
-
-import pandas as pd
+# claims(Claim_ID, Food_ID, Receiver_ID, Status, Timestamp, Claim_Month)
+# Expiry_Date / Timestamp are stored as ISO-8601 text (see date_utils.py)
+#
+# Startup is lazy: the shell below imports only streamlit, db and query_log. Each page in
+# PAGES imports its own modules (pandas, Altair, charts, ...) and queries its own
+# data when it is drawn, so a rerun pays only for the page on screen. Check the cost with
+# startup_profile.py.
+
+import sqlite3
 import streamlit as st
-import altair as alt
-from datetime import datetime
+import db
+import query_log
+from db import run_query, table_exists
 
-# ---------- File Paths ----------
-PROVIDERS_CSV = "providers.csv"
-RECEIVERS_CSV = "receivers.csv"
-FOOD_CSV = "food_listings.csv"
-CLAIMS_CSV = "claims.csv"
+st.set_page_config(page_title="Local Food Wastage Management", layout="wide")
 
 
-# ---------- Load Data ----------
-@st.cache_data
-def load_csv(path):
-    try:
-        return pd.read_csv(path)
-    except Exception as e:
-        st.error(f"Error loading {path}: {e}")
-        return pd.DataFrame()
+# ---------- DB helpers ----------
+def subheader(title):
+    # Label the queries that follow for the admin page's per-section stats
+    st.subheader(title)
+    query_log.set_section(title)
 
-providers = load_csv(PROVIDERS_CSV)
-receivers = load_csv(RECEIVERS_CSV)
-food = load_csv(FOOD_CSV)
-claims = load_csv(CLAIMS_CSV)
 
-# ---------- App Layout ----------
-st.set_page_config(page_title="Local Food Wastage Management", layout="wide")
-st.title("🍽️ Local Food Wastage Management System")
+def exec_query(sql, params=()):
+    try:
+        db.exec_query(sql, params)
+        return True
+    except sqlite3.Error as e:
+        st.error(f"Database error: {e}")
+        return False
+
+
+def bulk_editor(table, key):
+    """Upload a CSV or edit the grid in place; changed rows are validated and saved in one transaction.
+    Rows removed from the grid are deleted only after an explicit confirmation."""
+    import pandas as pd
+    from crud_operations import BULK_SPECS, bulk_upsert, changed_rows, deleted_keys
+    from table_views import PAGE_SIZES, VIEWS, fetch_page
+
+    upload = st.file_uploader("Upload CSV (rows without an ID are added; rows with one update the columns the file has)",
+                              type="csv", key=f"{key}_csv")
+    if upload is not None:
+        original = pd.DataFrame()
+        grid = pd.read_csv(upload)
+    else:
+        original, _ = fetch_page(VIEWS[table], page_size=PAGE_SIZES[-1]) if table_exists(table) else (pd.DataFrame(), None)
+        grid = original
+    edited = st.data_editor(grid, num_rows="dynamic", hide_index=True, key=f"{key}_grid")
+    removed = deleted_keys(original, edited, BULK_SPECS[table].key)
+    confirm_delete = False
+    if removed:
+        confirm_delete = st.checkbox(f"Also delete the {len(removed)} rows removed from the grid "
+                                     f"({BULK_SPECS[table].key} {', '.join(map(str, removed[:10]))}"
+                                     f"{', ...' if len(removed) > 10 else ''})", key=f"{key}_confirm_delete")
+    if st.button("Validate & Save", key=f"{key}_save"):
+        rows = changed_rows(original, edited)
+        try:
+            # Saves and deletes commit together or not at all
+            result = bulk_upsert(table, rows, delete=removed if confirm_delete else ())
+        except sqlite3.Error as e:
+            st.error(f"Database error: {e}")
+            return
+        if result.written:
+            st.success(f"✅ {result.written} rows saved.")
+        if result.deleted:
+            st.success(f"✅ {result.deleted} rows deleted.")
+        elif removed:
+            st.info(f"{len(removed)} rows removed from the grid were kept; tick the box above to delete them.")
+        if rows.empty and not removed:
+            st.info("No changes to save.")
+        if len(result.errors):
+            st.warning(f"⚠️ {result.rejected} rows skipped:")
+            st.dataframe(result.errors, hide_index=True)
+
+
+def table_counts():
+    if not table_exists("agg_table_counts"):
+        return {}
+    counts = run_query("SELECT Table_Name, Row_Count FROM agg_table_counts;")
+    return dict(zip(counts["Table_Name"], counts["Row_Count"].astype(int)))
 
-st.sidebar.header("📂 Navigation")
-page = st.sidebar.radio("Go to", ["Dashboard", "Food Listings", "Claims", "Providers", "Receivers"])
 
 # ---------- Dashboard ----------
-if page == "Dashboard":
-    st.subheader("📊 Dashboard Overview")
+def bar_chart(frame, x, y, height=300):
+    """Bar per category (capped, the rest summed into "Other"); x and y are "Column:Type"."""
+    import altair as alt
+    from charts import cap_categories, show_chart
 
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total Providers", len(providers))
-    col2.metric("Total Receivers", len(receivers))
-    col3.metric("Available Foods", food["Quantity"].sum() if not food.empty else 0)
-
-    if not claims.empty:
-        food_claims = claims.merge(food, on="Food_ID", how="left")
-        chart = alt.Chart(food_claims).mark_bar().encode(
-            x="Food_Name",
-            y="count()",
-            color="Status"
-        ).properties(title="Food Claims Distribution")
-        st.altair_chart(chart, use_container_width=True)
-
-# ---------- Food Listings ----------
-elif page == "Food Listings":
-    st.subheader("🥘 Food Listings")
-    if not food.empty:
-        st.dataframe(food)
-    else:
-        st.info("No food listings available.")
-
-# ---------- Claims ----------
-elif page == "Claims":
-    st.subheader("📝 Claims")
-    if not claims.empty:
-        claims_view = claims.merge(food, on="Food_ID", how="left").merge(receivers, on="Receiver_ID", how="left")
-        st.dataframe(claims_view)
-    else:
-        st.info("No claims recorded.")
+    x_col, y_col = x.split(":")[0], y.split(":")[0]
+    show_chart(f"bar:{x}:{y}", cap_categories(frame, x_col, y_col),
+               lambda df: alt.Chart(df).mark_bar().encode(x=alt.X(x, sort="-y"), y=y).properties(height=height))
 
-# ---------- Providers ----------
-elif page == "Providers":
-    st.subheader("🏭 Providers")
-    if not providers.empty:
-        st.dataframe(providers)
-    else:
-        st.info("No providers available.")
 
-# ---------- Receivers ----------
-elif page == "Receivers":
-    st.subheader("🙋 Receivers")
-    if not receivers.empty:
-        st.dataframe(receivers)
-    else:
-        st.info("No receivers available.")
+def overview():
+    import altair as alt
+    from charts import cap_categories, show_chart
+
+    st.subheader("📊 Dashboard Overview")
 
-    # KPIs
-    total_providers = run_query("SELECT COUNT(*) AS cnt FROM providers;") if table_exists("providers") else pd.DataFrame([{"cnt": 0}])
-    total_receivers = run_query("SELECT COUNT(*) AS cnt FROM receivers;") if table_exists("receivers") else pd.DataFrame([{"cnt": 0}])
-    total_listings  = run_query("SELECT COUNT(*) AS cnt FROM food_listings;") if table_exists("food_listings") else pd.DataFrame([{"cnt": 0}])
-    total_claims    = run_query("SELECT COUNT(*) AS cnt FROM claims;") if table_exists("claims") else pd.DataFrame([{"cnt": 0}])
+    # Live, trigger-maintained quantity per expiry status (the row counts are in dashboard())
+    if table_exists("agg_expiry_status"):
+        food = run_query("SELECT IFNULL(SUM(Quantity), 0) AS Quantity FROM agg_expiry_status;")
+        st.metric("Available Foods", int(food.iloc[0, 0]))
+
+    # Trigger-maintained (Food_Name, Status) counts: no claims x listings join per rerun
+    if table_exists("agg_food_claim_status"):
+        food_claims = run_query("""
+            SELECT Food_Name, Status, Claim_Count FROM agg_food_claim_status WHERE Claim_Count > 0;
+        """)
+        if not food_claims.empty:
+            show_chart("food_claims_distribution", cap_categories(food_claims, "Food_Name", "Claim_Count"),
+                       lambda df: alt.Chart(df).mark_bar().encode(
+                           x="Food_Name",
+                           y=alt.Y("Claim_Count", title="Claims"),
+                           color="Status"
+                       ).properties(title="Food Claims Distribution"))
+
+
+def dashboard():
+    import altair as alt
+    from charts import cap_categories, downsample, show_chart
+    from panel_runner import Panel, run_panels
+    from table_views import render_table_view
+
+    query_log.set_page("Dashboard")
+    overview()
+    st.header("Dashboard")
+
+    # KPIs (trigger-maintained row counts, see schema.py)
+    totals = table_counts()
 
     c1, c2, c3, c4 = st.columns(4)
-    with c1: st.metric("Total Providers", int(total_providers.iloc[0,0]))
-    with c2: st.metric("Total Receivers", int(total_receivers.iloc[0,0]))
-    with c3: st.metric("Total Food Listings", int(total_listings.iloc[0,0]))
-    with c4: st.metric("Total Claims", int(total_claims.iloc[0,0]))
-
-    st.subheader("Top 5 Providers by Donations")
-    top5 = run_query("""
-        SELECT p.Name AS Provider, COUNT(f.Food_ID) AS Donations
-        FROM providers p
-        JOIN food_listings f ON p.Provider_ID = f.Provider_ID
-        GROUP BY p.Provider_ID, p.Name
-        ORDER BY Donations DESC
-        LIMIT 5;
-    """) if table_exists("providers") and table_exists("food_listings") else pd.DataFrame()
-    if not top5.empty:
-        st.altair_chart(
-            alt.Chart(top5).mark_bar().encode(
-                x=alt.X("Provider:N", sort="-y"),
-                y=alt.Y("Donations:Q")
-            ).properties(height=300),
-            use_container_width=True
-        )
-    else:
-        st.warning("No provider/listing data.")
-
-    st.subheader("Claims by Status")
-    claims_by_status = run_query("""
-        SELECT Status, COUNT(*) AS Count
-        FROM claims
-        GROUP BY Status;
-    """) if table_exists("claims") else pd.DataFrame()
-    if not claims_by_status.empty:
-        st.altair_chart(
-            alt.Chart(claims_by_status).mark_arc(innerRadius=60).encode(
+    with c1: st.metric("Total Providers", totals.get("providers", 0))
+    with c2: st.metric("Total Receivers", totals.get("receivers", 0))
+    with c3: st.metric("Total Food Listings", totals.get("food_listings", 0))
+    with c4: st.metric("Total Claims", totals.get("claims", 0))
+
+    # Independent panels: queried concurrently, drawn in this order as results arrive
+    run_panels([
+        Panel("Top 5 Providers by Donations", """
+            SELECT p.Name AS Provider, a.Donations
+            FROM agg_provider_stats a
+            JOIN providers p ON p.Provider_ID = a.Provider_ID
+            WHERE a.Donations > 0
+            ORDER BY a.Donations DESC
+            LIMIT 5;
+        """, lambda df: bar_chart(df, "Provider:N", "Donations:Q"),
+            requires="agg_provider_stats", empty="No provider/listing data."),
+
+        Panel("Claims by Status", """
+            SELECT Status, Claim_Count AS Count
+            FROM agg_claim_status
+            WHERE Claim_Count > 0;
+        """, lambda df: show_chart("claims_by_status", cap_categories(df, "Status", "Count"),
+            lambda df: alt.Chart(df).mark_arc(innerRadius=60).encode(
                 theta="Count:Q", color="Status:N"
-            ).properties(height=280),
-            use_container_width=True
-        )
-    else:
-        st.info("No claims data.")
-
-    st.subheader("Available vs Expired Food")
-    avail_vs_exp = run_query("""
-        SELECT 
-            CASE WHEN DATE(Expiry_Date) >= DATE('now') THEN 'Available' ELSE 'Expired' END AS Food_Status,
-            COUNT(*) AS Count
-        FROM food_listings
-        GROUP BY Food_Status;
-    """) if table_exists("food_listings") else pd.DataFrame()
-    if not avail_vs_exp.empty:
-        st.altair_chart(
-            alt.Chart(avail_vs_exp).mark_bar().encode(
-                x="Food_Status:N", y="Count:Q"
-            ).properties(height=300),
-            use_container_width=True
-        )
-    else:
-        st.info("No food listings data.")
-
-    st.subheader("Food Listings by Provider Type")
-    by_type = run_query("""
-        SELECT COALESCE(Provider_Type,'Unknown') AS Provider_Type, COUNT(*) AS Count
-        FROM food_listings
-        GROUP BY Provider_Type;
-    """) if table_exists("food_listings") else pd.DataFrame()
-    if not by_type.empty:
-        st.altair_chart(
-            alt.Chart(by_type).mark_bar().encode(
-                x=alt.X("Provider_Type:N", sort="-y"),
-                y="Count:Q"
-            ).properties(height=300),
-            use_container_width=True
-        )
-
-    st.subheader("Monthly Claims Trend")
-    monthly = run_query("""
-        SELECT strftime('%Y-%m', DATE(Claim_Date)) AS Month, COUNT(*) AS Count
-        FROM claims
-        GROUP BY Month
-        ORDER BY Month;
-    """) if table_exists("claims") else pd.DataFrame()
-    if not monthly.empty:
-        st.altair_chart(
-            alt.Chart(monthly).mark_line(point=True).encode(
+            ).properties(height=280)
+        ), requires="agg_claim_status", empty="No claims data."),
+
+        # Expiry_Status is kept current by expiry_sweeper.py: no per-listing date comparison here
+        Panel("Available vs Expired Food", """
+            SELECT Expiry_Status AS Food_Status, SUM(Listing_Count) AS Count
+            FROM agg_expiry_status
+            GROUP BY Expiry_Status
+            HAVING Count > 0;
+        """, lambda df: bar_chart(df, "Food_Status:N", "Count:Q"),
+            requires="agg_expiry_status", empty="No food listings data."),
+
+        Panel("Food Listings by Provider Type", """
+            SELECT Provider_Type, SUM(Listing_Count) AS Count
+            FROM agg_listing_expiry
+            GROUP BY Provider_Type
+            HAVING Count > 0;
+        """, lambda df: bar_chart(df, "Provider_Type:N", "Count:Q"), requires="agg_listing_expiry"),
+
+        Panel("Monthly Claims Trend", """
+            SELECT Claim_Month AS Month, COUNT(*) AS Count
+            FROM claims
+            WHERE Claim_Month IS NOT NULL
+            GROUP BY Claim_Month
+            ORDER BY Claim_Month;
+        """, lambda df: show_chart("monthly_claims", downsample(df, "Month", "Count"),
+            lambda df: alt.Chart(df).mark_line(point=True).encode(
                 x="Month:T", y="Count:Q"
-            ).properties(height=300),
-            use_container_width=True
-        )
-
-    st.subheader("Most Claimed Food Items (Top 5)")
-    most_claimed = run_query("""
-        SELECT f.Food_Name AS Food, COUNT(c.Claim_ID) AS Claim_Count
-        FROM food_listings f
-        JOIN claims c ON f.Food_ID = c.Food_ID
-        GROUP BY f.Food_Name
-        ORDER BY Claim_Count DESC
-        LIMIT 5;
-    """) if table_exists("food_listings") and table_exists("claims") else pd.DataFrame()
-    if not most_claimed.empty:
-        st.altair_chart(
-            alt.Chart(most_claimed).mark_bar().encode(
-                x=alt.X("Food:N", sort="-y"),
-                y="Claim_Count:Q"
-            ).properties(height=300),
-            use_container_width=True
-        )
-
-    st.subheader("Claims per Provider")
-    claims_per_provider = run_query("""
-        SELECT p.Name AS Provider, COUNT(c.Claim_ID) AS Total_Claims
-        FROM providers p
-        JOIN food_listings f ON p.Provider_ID = f.Provider_ID
-        JOIN claims c ON f.Food_ID = c.Food_ID
-        GROUP BY p.Name
-        ORDER BY Total_Claims DESC;
-    """) if table_exists("providers") and table_exists("food_listings") and table_exists("claims") else pd.DataFrame()
-    if not claims_per_provider.empty:
-        st.dataframe(claims_per_provider, use_container_width=True)
-
-    st.subheader("Food Expiring in Next 7 Days")
-    next7 = run_query("""
-        SELECT Food_ID, Food_Name, Quantity, DATE(Expiry_Date) AS Expiry_Date
-        FROM food_listings
-        WHERE DATE(Expiry_Date) BETWEEN DATE('now') AND DATE('now','+7 day')
-        ORDER BY DATE(Expiry_Date);
-    """) if table_exists("food_listings") else pd.DataFrame()
-    st.dataframe(next7, use_container_width=True)
-
+            ).properties(height=300)
+        ), requires="claims"),
+
+        Panel("Most Claimed Food Items (Top 5)", """
+            SELECT Food_Name AS Food, Claim_Count
+            FROM agg_food_claims
+            WHERE Claim_Count > 0
+            ORDER BY Claim_Count DESC
+            LIMIT 5;
+        """, lambda df: bar_chart(df, "Food:N", "Claim_Count:Q"), requires="agg_food_claims"),
+
+        Panel("Claims per Provider", """
+            SELECT p.Name AS Provider, SUM(a.Claims) AS Total_Claims
+            FROM agg_provider_stats a
+            JOIN providers p ON p.Provider_ID = a.Provider_ID
+            WHERE a.Claims > 0
+            GROUP BY p.Name
+            ORDER BY Total_Claims DESC;
+        """, lambda df: st.dataframe(df, use_container_width=True), requires="agg_provider_stats"),
+
+        Panel("Food Expiring in Next 7 Days", """
+            SELECT Food_ID, Food_Name, Quantity, Expiry_Date
+            FROM food_listings
+            WHERE Expiry_Status = 'Expiring'
+            ORDER BY Expiry_Date;
+        """, lambda df: st.dataframe(df, use_container_width=True),
+            requires="food_listings", empty="Nothing expires in the next 7 days."),
+    ])
+
+    # Paged by expiry (table_views.py) rather than every unclaimed listing at once
     st.subheader("Unclaimed Food")
-    unclaimed = run_query("""
-        SELECT f.Food_ID, f.Food_Name, f.Provider_Type, DATE(f.Expiry_Date) AS Expiry_Date
-        FROM food_listings f
-        LEFT JOIN claims c ON f.Food_ID = c.Food_ID
-        WHERE c.Claim_ID IS NULL
-        ORDER BY DATE(f.Expiry_Date);
-    """) if table_exists("food_listings") else pd.DataFrame()
-    st.dataframe(unclaimed, use_container_width=True)
+    render_table_view("unclaimed_listings", key="dashboard_unclaimed")
+
+# ---------- Table pages ----------
+def table_page(title, view, key=None):
+    from table_views import render_table_view
+
+    query_log.set_page(view)
+    st.subheader(title)
+    render_table_view(view, key=key)
+
 
-# ---------- CRUD ----------
 # ---------- CRUD ----------
 def crud():
+    from datetime import date
+    from date_utils import iso_date
+    from search import listing_picker, provider_picker
+    from table_views import render_table_view
+
     st.header("Manage Data (CRUD)")
+    query_log.set_page("CRUD")
 
     tab1, tab2, tab3 = st.tabs(["Providers", "Receivers", "Food Listings"])
 
     # --- Providers ---
     with tab1:
-        st.subheader("Add Provider")
+        subheader("Add Provider")
         with st.form("add_provider"):
             name = st.text_input("Name")
             ptype = st.text_input("Type")
@@ -258,13 +259,15 @@ def crud():
                 )
                 if ok: st.success("✅ Provider added.")
 
-        st.subheader("Providers (table)")
-        st.dataframe(run_query("SELECT * FROM providers;") if table_exists("providers") else pd.DataFrame(),
-                     use_container_width=True)
+        subheader("Bulk Add / Edit Providers")
+        bulk_editor("providers", key="bulk_providers")
+
+        subheader("Providers (table)")
+        render_table_view("providers", key="crud_providers")
 
     # --- Receivers ---
     with tab2:
-        st.subheader("Add Receiver")
+        subheader("Add Receiver")
         with st.form("add_receiver"):
             name = st.text_input("Name", key="rname")
             rtype = st.text_input("Type", key="rtype")
@@ -278,114 +281,211 @@ def crud():
                 )
                 if ok: st.success("✅ Receiver added.")
 
-        st.subheader("Receivers (table)")
-        st.dataframe(run_query("SELECT * FROM receivers;") if table_exists("receivers") else pd.DataFrame(),
-                     use_container_width=True)
+        subheader("Bulk Add / Edit Receivers")
+        bulk_editor("receivers", key="bulk_receivers")
+
+        subheader("Receivers (table)")
+        render_table_view("receivers", key="crud_receivers")
 
     # --- Food Listings ---
     with tab3:
-        st.subheader("Add Food Listing")
-        providers_df = run_query("SELECT Provider_ID, Name FROM providers;") if table_exists("providers") else pd.DataFrame()
-
-        if providers_df.empty:
-            st.warning("⚠️ No providers available. Please add a provider first.")
-            provider_map = {}
-        else:
-            # Drop invalid/null IDs or Names
-            providers_df = providers_df.dropna(subset=["Provider_ID", "Name"])
-
-            # Ensure Provider_ID is int
-            providers_df["Provider_ID"] = providers_df["Provider_ID"].astype(int)
-
-            # Map Name -> ID
-            provider_map = dict(zip(providers_df["Name"], providers_df["Provider_ID"]))
+        subheader("Add Food Listing")
+        # Outside the form so the provider matches refresh as the search text changes
+        provider_id = provider_picker("Provider", key="add_food_provider")
+        if provider_id is None:
+            st.warning("⚠️ No matching provider. Search again or add a provider first.")
 
         with st.form("add_food"):
             food_name = st.text_input("Food Name")
             qty = st.number_input("Quantity", min_value=0, step=1)
             exp = st.date_input("Expiry Date", value=date.today())
-            provider_name = st.selectbox("Provider", list(provider_map.keys()) or ["-- no providers --"])
             ptype = st.text_input("Provider Type")
             loc = st.text_input("Location")
             submitted = st.form_submit_button("Add Food")
-            if submitted and provider_map:
+            if submitted and provider_id is not None:
                 ok = exec_query(
                     "INSERT INTO food_listings (Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, Location) VALUES (?, ?, ?, ?, ?, ?);",
-                    (food_name, int(qty), str(exp), provider_map[provider_name], ptype, loc)
+                    (food_name, int(qty), iso_date(exp), provider_id, ptype, loc)
                 )
                 if ok: st.success("✅ Food listing added.")
             elif submitted:
-                st.error("⚠️ Add a provider first.")
+                st.error("⚠️ Choose a provider first.")
+
+        subheader("Bulk Add / Edit Food Listings")
+        bulk_editor("food_listings", key="bulk_food")
 
-        st.subheader("Update Food Listing")
-        listings = run_query("SELECT Food_ID, Food_Name, Quantity, DATE(Expiry_Date) AS Expiry_Date FROM food_listings;") if table_exists("food_listings") else pd.DataFrame()
-        if listings.empty:
+        subheader("Update Food Listing")
+        selected_id = listing_picker("Choose item", key="upd")
+        if selected_id is None:
             st.info("No listings to update.")
         else:
-            row = st.selectbox("Choose item", listings.apply(lambda r: f"{r.Food_ID} – {r.Food_Name}", axis=1))
-            selected_id = int(row.split(" – ")[0])
             new_qty = st.number_input("New Quantity", min_value=0, step=1)
             new_date = st.date_input("New Expiry Date", value=date.today())
             if st.button("Save Update"):
                 ok = exec_query("UPDATE food_listings SET Quantity=?, Expiry_Date=? WHERE Food_ID=?;",
-                                (int(new_qty), str(new_date), selected_id))
+                                (int(new_qty), iso_date(new_date), selected_id))
                 if ok: st.success("✅ Updated.")
 
-        st.subheader("Delete Food Listing")
-        listings2 = run_query("SELECT Food_ID, Food_Name FROM food_listings;") if table_exists("food_listings") else pd.DataFrame()
-        if listings2.empty:
+        subheader("Delete Food Listing")
+        del_id = listing_picker("Select to delete", key="del")
+        if del_id is None:
             st.info("No listings to delete.")
         else:
-            row2 = st.selectbox("Select to delete", listings2.apply(lambda r: f"{r.Food_ID} – {r.Food_Name}", axis=1), key="del")
-            del_id = int(row2.split(" – ")[0])
             if st.button("Delete"):
                 ok = exec_query("DELETE FROM food_listings WHERE Food_ID=?;", (del_id,))
                 if ok: st.success("✅ Deleted.")
-\
 
 # ---------- Insights ----------
 def insights():
+    import export
+
     st.header("Business Insights")
-    # % unclaimed
-    total_items = run_query("SELECT COUNT(*) AS c FROM food_listings;") if table_exists("food_listings") else pd.DataFrame([{"c":0}])
-    unclaimed = run_query("""
-        SELECT COUNT(*) AS c
-        FROM food_listings f LEFT JOIN claims c ON f.Food_ID = c.Food_ID
-        WHERE c.Claim_ID IS NULL;
-    """) if table_exists("food_listings") else pd.DataFrame([{"c":0}])
-    t = int(total_items.iloc[0,0]) if not total_items.empty else 0
-    u = int(unclaimed.iloc[0,0]) if not unclaimed.empty else 0
+    query_log.set_page("Insights")
+    # % unclaimed (trigger-maintained Claimed/Unclaimed listing counts, see schema.py)
+    states = run_query("SELECT Claim_State, Listing_Count FROM agg_listing_claim_state;") \
+        if table_exists("agg_listing_claim_state") else None
+    counts = dict(zip(states["Claim_State"], states["Listing_Count"].astype(int))) if states is not None else {}
+    u, t = counts.get("Unclaimed", 0), sum(counts.values())
     pct = round((u/t)*100, 2) if t else 0.0
     st.metric("% Unclaimed Food", f"{pct}%")
 
     # Most waste-prone provider type (expired items)
-    waste = run_query("""
-        SELECT COALESCE(Provider_Type,'Unknown') AS Provider_Type, COUNT(*) AS Expired_Items
-        FROM food_listings
-        WHERE DATE(Expiry_Date) < DATE('now')
-        GROUP BY Provider_Type
-        ORDER BY Expired_Items DESC;
-    """) if table_exists("food_listings") else pd.DataFrame()
-    if not waste.empty:
-        st.altair_chart(
-            alt.Chart(waste).mark_bar().encode(
-                x=alt.X("Provider_Type:N", sort="-y"),
-                y="Expired_Items:Q"
-            ).properties(height=300),
-            use_container_width=True
-        )
-    st.dataframe(waste, use_container_width=True)
+    if table_exists("agg_expiry_status"):
+        waste = run_query("""
+            SELECT Provider_Type, Listing_Count AS Expired_Items
+            FROM agg_expiry_status
+            WHERE Expiry_Status = 'Expired' AND Listing_Count > 0
+            ORDER BY Expired_Items DESC;
+        """)
+        if not waste.empty:
+            bar_chart(waste, "Provider_Type:N", "Expired_Items:Q")
+        st.dataframe(waste, use_container_width=True)
+
+    subheader("Export")
+    st.caption("Streams the full result from the database; nothing runs until you click a download.")
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        name = st.selectbox("Report", list(export.EXPORTS),
+                            index=list(export.EXPORTS).index("claims_per_provider"))
+    with col2:
+        fmt = st.selectbox("Format", list(export.FORMATS))
+    with col3:
+        st.write("")
+        export.download_button("⬇️ Download", name, fmt, key="insights_export")
+
+# ---------- Allocation ----------
+def allocation():
+    from datetime import datetime
+    import partitions
+    from allocation import HORIZON_DAYS, propose_allocations
+
+    st.header("Claim Allocation")
+    query_log.set_page("Allocation")
+    st.caption("Open listings (no pending or completed claim), soonest expiry first, "
+               "matched to a receiver in the same city with capacity left.")
+
+    cities = run_query("SELECT DISTINCT City FROM receivers WHERE City IS NOT NULL ORDER BY City;")["City"] \
+        if table_exists("receivers") else []
+    col1, col2 = st.columns(2)
+    with col1:
+        city = st.selectbox("City", ["All cities"] + list(cities))
+    with col2:
+        horizon = st.slider("Expiring within (days)", 0, 60, HORIZON_DAYS)
+
+    # With region partitions (partitions.py) a single city reads its own shard, a replica the
+    # background sync keeps within a few seconds of the main database; the main database
+    # otherwise (no partitions, or no shard built for that city)
+    shard = partitions.shard_path_for(city) if city != "All cities" else None
+    subheader("Proposed Matches")
+    matches = propose_allocations(None if city == "All cities" else city, horizon, db_path=shard)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Listings Matched", len(matches))
+    c2.metric("Quantity Matched", int(matches["Quantity"].sum()) if len(matches) else 0)
+    c3.metric("Receivers Used", matches["Receiver_ID"].nunique() if len(matches) else 0)
+    st.dataframe(matches, use_container_width=True, hide_index=True)
+
+    if len(matches) and st.button("Create Pending Claims"):
+        try:
+            # Claims go to the main database, the system of record; the shard catches up on its next sync
+            created = db.executemany(
+                "INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) VALUES (?, ?, 'Pending', ?);",
+                [(int(f), int(r), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                 for f, r in zip(matches["Food_ID"], matches["Receiver_ID"])],
+            )
+            st.success(f"✅ {created} pending claims created.")
+        except sqlite3.Error as e:
+            st.error(f"Database error: {e}")
+
+
+# ---------- Admin (hidden: open the app with ?admin=1) ----------
+def admin():
+    st.header("Query Performance")
+    stats = db.cache_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    with c1: st.metric("Cache hit rate", f"{stats['hit_rate']:.0%}")
+    with c2: st.metric("Cache hits / misses", f"{stats['hits']} / {stats['misses']}")
+    with c3: st.metric("Cached results", stats["entries"])
+    with c4: st.metric("Cache memory", f"{stats['bytes'] / 1024:.0f} KiB")
+
+    st.subheader("Per-query percentiles")
+    st.dataframe(query_log.query_stats(), use_container_width=True)
+
+    st.subheader("Worst offenders")
+    for rec in query_log.worst_offenders(10):
+        label = f"{rec['elapsed_ms']:.1f} ms · {rec['section'] or 'unlabelled'} · {rec['cache']}"
+        with st.expander(label):
+            st.code(rec["sql"], language="sql")
+            if rec["cache"] != "write":
+                try:
+                    st.code("\n".join(db.explain(rec["sql"], rec["params"])), language="text")
+                except sqlite3.Error as e:
+                    st.caption(f"No plan: {e}")
 
-# ---------- App ----------
-st.set_page_config(page_title="Local Food Wastage", layout="wide")
-with st.sidebar:
-    st.image("https://static.streamlit.io/examples/cat.jpg", caption="Local Food Wastage")
-    page = st.radio("Navigate", ["Dashboard", "CRUD", "Insights"])
-
-if page == "Dashboard":
-    dashboard()
-elif page == "CRUD":
-    crud()
-else:
-    insights()
 
+# ---------- App ----------
+@st.cache_resource
+def _expiry_sweeper():
+    # One background sweeper per server process, shared by all sessions
+    import expiry_sweeper
+
+    return expiry_sweeper.start_background()
+
+
+@st.cache_resource
+def _partition_sync():
+    # One background sync per server process keeps the region replicas current; pages never sync
+    import partitions
+
+    return partitions.start_background() if partitions.enabled() else None
+
+
+# Sidebar label -> render function; a page's imports and queries run only when it is shown
+PAGES = {
+    "Dashboard": dashboard,
+    "Food Listings": lambda: table_page("🥘 Food Listings", "food_listings"),
+    "Claims": lambda: table_page("📝 Claims", "claims_enriched", key="view_claims"),
+    "Providers": lambda: table_page("🏭 Providers", "providers"),
+    "Receivers": lambda: table_page("🙋 Receivers", "receivers"),
+    "CRUD": crud,
+    "Allocation": allocation,
+    "Insights": insights,
+}
+# Shown only when the app is opened with ?admin=1
+ADMIN_PAGES = {"Admin": admin}
+
+
+def main():
+    _expiry_sweeper()
+    _partition_sync()
+    st.title("🍽️ Local Food Wastage Management System")
+    pages = dict(PAGES)
+    if st.query_params.get("admin") == "1":
+        pages.update(ADMIN_PAGES)
+    with st.sidebar:
+        st.image("https://static.streamlit.io/examples/cat.jpg", caption="Local Food Wastage")
+        st.header("📂 Navigation")
+        page = st.radio("Go to", list(pages), key="page")
+    pages[page]()
+
+
+main()
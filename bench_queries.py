@@ -0,0 +1,182 @@
+# Benchmark for every query in SQL_QUERIES (the same set test_queries.py runs) plus
+# the pandas merges app.py does, against a synthetic database of a chosen size.
+#
+#   python bench_queries.py --claims 100000 --output bench.json
+#   python bench_queries.py --claims 100000 --baseline bench.json   # exit 1 on regression
+import argparse
+import json
+import platform
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from schema import explain, migrate
+from sql_queries import SQL_QUERIES
+from synthetic_data import write_database
+
+BASE_DIR = Path(__file__).resolve().parent
+BENCH_DIR = BASE_DIR / "database" / "bench"
+
+REPEAT = 7
+# A query regresses when p50 exceeds baseline * MAX_SLOWDOWN + NOISE_FLOOR_MS
+MAX_SLOWDOWN = 1.5
+NOISE_FLOOR_MS = 2.0
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def time_call(fn, repeat):
+    fn()  # warm-up: page cache, statement cache
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, result
+
+
+def summarize(samples, rows, plan=None):
+    entry = {
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "rows": rows,
+    }
+    if plan is not None:
+        entry["plan"] = plan
+    return entry
+
+
+# ---------- Benchmarks ----------
+def bench_sql(conn, repeat):
+    results = {}
+    for name, query in SQL_QUERIES.items():
+        samples, rows = time_call(lambda: conn.execute(query).fetchall(), repeat)
+        results[f"sql.{name}"] = summarize(samples, len(rows), explain(conn, query))
+    return results
+
+
+def bench_pandas(conn, repeat):
+    """The in-memory joins the top-level app pages used to run on every rerun (see bench_enriched)."""
+    food = pd.read_sql_query("SELECT * FROM food_listings;", conn)
+    claims = pd.read_sql_query("SELECT * FROM claims;", conn)
+    receivers = pd.read_sql_query("SELECT * FROM receivers;", conn)
+    paths = {
+        "pandas.food_claims_chart": lambda: (
+            claims.merge(food, on="Food_ID", how="left").groupby(["Food_Name", "Status"]).size()
+        ),
+        "pandas.claims_view": lambda: (
+            claims.merge(food, on="Food_ID", how="left").merge(receivers, on="Receiver_ID", how="left")
+        ),
+    }
+    results = {}
+    for name, fn in paths.items():
+        samples, frame = time_call(fn, repeat)
+        results[name] = summarize(samples, len(frame))
+    return results
+
+
+def bench_enriched(conn, repeat):
+    """What replaced bench_pandas: reads of the trigger-maintained claims_enriched tables."""
+    queries = {
+        "enriched.food_claims_chart": "SELECT Food_Name, Status, Claim_Count FROM agg_food_claim_status;",
+        "enriched.claims_page": "SELECT * FROM claims_enriched ORDER BY Claim_ID LIMIT 50;",
+    }
+    results = {}
+    for name, query in queries.items():
+        samples, rows = time_call(lambda: conn.execute(query).fetchall(), repeat)
+        results[name] = summarize(samples, len(rows), explain(conn, query))
+    return results
+
+
+def run_benchmark(db_path, repeat=REPEAT):
+    conn = sqlite3.connect(db_path)
+    try:
+        migrate(conn)  # --db may point at a database from an older schema version
+        results = bench_sql(conn, repeat)
+        results.update(bench_pandas(conn, repeat))
+        results.update(bench_enriched(conn, repeat))
+        counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t};").fetchone()[0]
+                  for t in ("providers", "receivers", "food_listings", "claims")}
+    finally:
+        conn.close()
+    return {
+        "meta": {
+            "rows": counts,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "pandas": pd.__version__,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, max_slowdown=MAX_SLOWDOWN, noise_floor_ms=NOISE_FLOOR_MS):
+    """Return a list of regression messages (empty when everything is within budget)."""
+    if current["meta"]["rows"] != baseline["meta"]["rows"]:
+        return [f"baseline was recorded at {baseline['meta']['rows']}, not {current['meta']['rows']}"]
+    regressions = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None:
+            regressions.append(f"{name}: missing from this run")
+            continue
+        limit = base["p50_ms"] * max_slowdown + noise_floor_ms
+        if now["p50_ms"] > limit:
+            regressions.append(f"{name}: p50 {now['p50_ms']:.2f} ms > {limit:.2f} ms (baseline {base['p50_ms']:.2f} ms)")
+    return regressions
+
+
+def print_table(report):
+    print(f"{'benchmark':<40} {'p50 ms':>10} {'p95 ms':>10} {'rows':>10}")
+    for name, entry in report["results"].items():
+        print(f"{name:<40} {entry['p50_ms']:>10.2f} {entry['p95_ms']:>10.2f} {entry['rows']:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time SQL_QUERIES and the app's pandas joins.")
+    parser.add_argument("--claims", type=int, default=10_000, help="Synthetic scale (10k .. 10M claims)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="Benchmark an existing database instead of a synthetic one")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Fail if slower than this stored report")
+    parser.add_argument("--max-slowdown", type=float, default=MAX_SLOWDOWN)
+    args = parser.parse_args(argv)
+
+    db_path = args.db
+    if db_path is None:
+        db_path = BENCH_DIR / f"synthetic_{args.claims}_{args.seed}.db"
+        if not db_path.exists():
+            print(f"⏳ Generating {args.claims} claims into {db_path} ...")
+            write_database(db_path, args.claims, args.seed)
+
+    report = run_benchmark(db_path, args.repeat)
+    print_table(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"✅ Report written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(report, baseline, args.max_slowdown)
+        if regressions:
+            print("❌ Performance regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
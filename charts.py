@@ -0,0 +1,66 @@
+# Chart data layer: everything handed to Vega-Lite is aggregated first, capped to a fixed
+# number of categories / points, and the serialized spec is cached per data version, so
+# the payload sent to the browser no longer grows with the number of rows behind it.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MAX_CATEGORIES = 12
+MAX_POINTS = 200
+OTHER = "Other"
+SPEC_CACHE_SIZE = 128
+
+_specs = OrderedDict()
+_lock = threading.Lock()
+
+
+# ---------- Data reduction ----------
+def cap_categories(frame, category, value, n=MAX_CATEGORIES, other=OTHER):
+    """Keep the n - 1 largest categories by total value and sum the rest into `other`.
+
+    Any other columns (e.g. a colour series) are kept as part of the group key.
+    """
+    if frame[category].nunique() <= n:
+        return frame
+    keep = frame.groupby(category, observed=True)[value].sum().nlargest(n - 1).index
+    capped = frame.assign(**{category: frame[category].astype(object).where(frame[category].isin(keep), other)})
+    keys = [c for c in frame.columns if c != value]
+    return capped.groupby(keys, as_index=False, sort=False, observed=True)[value].sum()
+
+
+def downsample(frame, x, y, max_points=MAX_POINTS, how="sum"):
+    """Merge runs of consecutive rows so at most max_points remain; x is the first of each run."""
+    if len(frame) <= max_points:
+        return frame
+    step = -(-len(frame) // max_points)
+    runs = np.arange(len(frame)) // step
+    return frame.groupby(runs).agg({x: "first", y: how}).reset_index(drop=True)
+
+
+# ---------- Spec cache ----------
+def data_version(frame):
+    """Content hash of a (small, already aggregated) frame."""
+    return int(pd.util.hash_pandas_object(frame, index=False).sum()), tuple(frame.columns)
+
+
+def chart_spec(name, frame, build):
+    """Vega-Lite dict for build(frame), reused while name's data is unchanged."""
+    key = (name, data_version(frame))
+    with _lock:
+        if key in _specs:
+            _specs.move_to_end(key)
+            return _specs[key]
+    spec = build(frame).to_dict()
+    with _lock:
+        _specs[key] = spec
+        while len(_specs) > SPEC_CACHE_SIZE:
+            _specs.popitem(last=False)
+    return spec
+
+
+def show_chart(name, frame, build):
+    import streamlit as st
+
+    st.vega_lite_chart(chart_spec(name, frame, build), use_container_width=True)
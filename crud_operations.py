@@ -1 +1,182 @@
-# CRUD functions will go here
+# Bulk CRUD: validate a whole DataFrame (uploaded CSV or edited grid) with vectorised
+# pandas checks, then upsert the valid rows (and delete removed ones) in one transaction.
+# Aggregate tables follow through their triggers; db.executemany invalidates the cache.
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import db
+from date_utils import iso_date_series
+
+# Ids per IN (...) lookup, below SQLite's bound-parameter limit
+LOOKUP_BATCH = 900
+
+
+@dataclass(frozen=True)
+class BulkSpec:
+    table: str
+    key: str
+    columns: tuple
+    required: tuple = ()
+    integers: tuple = ()
+    non_negative: tuple = ()
+    dates: tuple = ()
+    # Column -> (parent table, parent key); must exist before the write
+    references: dict = field(default_factory=dict)
+
+
+BULK_SPECS = {
+    "providers": BulkSpec(
+        "providers", "Provider_ID",
+        ("Provider_ID", "Name", "Type", "Address", "City", "Contact"),
+        required=("Name",),
+    ),
+    "receivers": BulkSpec(
+        "receivers", "Receiver_ID",
+        ("Receiver_ID", "Name", "Type", "City", "Contact"),
+        required=("Name",),
+    ),
+    "food_listings": BulkSpec(
+        "food_listings", "Food_ID",
+        ("Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID", "Provider_Type",
+         "Location", "Food_Type", "Meal_Type"),
+        required=("Food_Name", "Quantity", "Provider_ID"),
+        integers=("Quantity", "Provider_ID"),
+        non_negative=("Quantity",),
+        dates=("Expiry_Date",),
+        references={"Provider_ID": ("providers", "Provider_ID")},
+    ),
+}
+
+
+@dataclass
+class BulkResult:
+    written: int
+    # One row per problem: Row (input position + 1, i.e. the data line of a CSV), Column, Error
+    errors: pd.DataFrame
+    deleted: int = 0
+
+    @property
+    def rejected(self):
+        return int(self.errors["Row"].nunique()) if len(self.errors) else 0
+
+
+def _blank(series):
+    return series.isna() | series.astype("string").str.strip().eq("")
+
+
+def existing_ids(table, key, ids):
+    """The subset of ids present in table.key, looked up in batches."""
+    ids = list(pd.unique(ids))
+    found = set()
+    for start in range(0, len(ids), LOOKUP_BATCH):
+        batch = [int(i) for i in ids[start:start + LOOKUP_BATCH]]
+        marks = ", ".join("?" for _ in batch)
+        frame = db.run_query(f"SELECT {key} FROM {table} WHERE {key} IN ({marks});", tuple(batch), cache=False)
+        found.update(frame[key].astype(int))
+    return found
+
+
+# ---------- Validation ----------
+def validate_frame(table, frame):
+    """Return (clean rows ready to write, errors DataFrame). Unknown columns are ignored."""
+    spec = BULK_SPECS[table]
+    problems = []
+    # By position, not index label: edited grids keep their original (non-contiguous) labels
+    rejected = np.zeros(len(frame), dtype=bool)
+
+    def flag(mask, column, message):
+        positions = np.flatnonzero(mask.fillna(False).astype(bool).to_numpy())
+        rejected[positions] = True
+        problems.extend((int(p) + 1, column, message) for p in positions)
+
+    missing = [c for c in spec.required if c not in frame.columns]
+    if missing:
+        errors = pd.DataFrame([(0, c, "missing column") for c in missing], columns=["Row", "Column", "Error"])
+        return frame.iloc[0:0], errors
+
+    clean = frame[[c for c in spec.columns if c in frame.columns]].copy()
+
+    for column in (spec.key, *spec.integers):
+        if column not in clean.columns:
+            continue
+        raw = clean[column]
+        numbers = pd.to_numeric(raw, errors="coerce")
+        flag(~_blank(raw) & (numbers.isna() | (numbers % 1 != 0)), column, "not an integer")
+        clean[column] = numbers.where(numbers % 1 == 0).astype("Int64")
+    for column in spec.non_negative:
+        flag(clean[column] < 0, column, "must be >= 0")
+    for column in spec.dates:
+        if column in clean.columns:
+            iso = iso_date_series(clean[column])
+            flag(~_blank(clean[column]) & iso.isna(), column, "unparseable date")
+            clean[column] = iso
+    for column in spec.required:
+        flag(_blank(frame[column]), column, "required")
+
+    if spec.key in clean.columns:
+        keys = clean[spec.key]
+        flag(keys.notna() & keys.duplicated(keep=False), spec.key, "duplicate ID in upload")
+
+    for column, (parent, parent_key) in spec.references.items():
+        ids = clean[column].dropna()
+        known = existing_ids(parent, parent_key, ids)
+        flag(clean[column].notna() & ~clean[column].isin(known), column, f"no such {parent_key}")
+
+    errors = pd.DataFrame(problems, columns=["Row", "Column", "Error"]).sort_values("Row", kind="stable")
+    return clean[~rejected], errors.reset_index(drop=True)
+
+
+# ---------- Write ----------
+def _delete_sql(table):
+    return f"DELETE FROM {table} WHERE {BULK_SPECS[table].key} = ?;"
+
+
+def bulk_upsert(table, frame, delete=()):
+    """Validate frame, then upsert its valid rows on the table's key and delete the keys in
+    `delete`, all in one transaction.
+
+    Rows without a key are inserted with a new ID. Rows with one update only the columns the
+    frame has; columns it leaves out keep their stored values.
+    """
+    spec = BULK_SPECS[table]
+    clean, errors = validate_frame(table, frame)
+    batches = []
+    if not clean.empty:
+        columns = list(clean.columns)
+        if spec.key in columns:
+            sql = db.upsert_sql(table, columns, spec.key)
+        else:
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)});"
+        batches.append((sql, db.chunk_rows(clean)))
+    keys = [(int(k),) for k in delete]
+    if keys:
+        batches.append((_delete_sql(table), keys))
+    if not batches:
+        return BulkResult(0, errors)
+    counts = db.executemany_all(batches)
+    written = counts[0] if not clean.empty else 0
+    return BulkResult(written, errors, deleted=counts[-1] if keys else 0)
+
+
+def changed_rows(original, edited):
+    """Rows of an edited grid that are new or differ from the original grid."""
+    if original.empty:
+        return edited
+    as_text = lambda df: df.astype("string").fillna("\0")
+    merged = as_text(edited).merge(as_text(original).drop_duplicates(), how="left", indicator=True)
+    return edited[merged["_merge"].eq("left_only").to_numpy()]
+
+
+def deleted_keys(original, edited, key):
+    """Keys of original rows that are no longer in the edited grid."""
+    if original.empty or key not in original.columns:
+        return []
+    kept = set(pd.to_numeric(edited[key], errors="coerce").dropna().astype(int)) if key in edited.columns else set()
+    return [int(k) for k in original[key].dropna() if int(k) not in kept]
+
+
+def bulk_delete(table, keys):
+    """Delete rows by key in one transaction. Returns the number of rows deleted."""
+    return db.executemany(_delete_sql(table), [(int(k),) for k in keys])
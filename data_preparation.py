@@ -1,53 +1,318 @@
-import pandas as pd
-
-# CSV loading functions will go here
+import argparse
+import hashlib
+import multiprocessing
+import os
 import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from db import chunk_rows, quote, upsert_sql
+from schema import ensure_quarantine, migrate, quarantine_table, suspend_triggers, table_columns
+from ingest_checks import INGEST_SPECS, check_integrity, parse_chunk
 
 # ✅ Paths
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "database" / "food_wastage.db"
 DATA_DIR = BASE_DIR / "data"
+if not DATA_DIR.is_dir():
+    # The sample CSVs ship next to this script
+    DATA_DIR = BASE_DIR
+
+# ✅ Tables in load order: (table, csv file, natural key)
+DATASETS = [
+    ("providers", "providers_data.csv", "Provider_ID"),
+    ("receivers", "receivers_data.csv", "Receiver_ID"),
+    ("food_listings", "food_listings_data.csv", "Food_ID"),
+    ("claims", "claims_data.csv", "Claim_ID"),
+]
+
+# ✅ Row checks (types, ISO dates, duplicate and foreign keys) live in ingest_checks.py
+
+CHUNK_SIZE = 50_000
+# Inputs smaller than this are checked in-process: starting the worker pool costs more
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+# Loads at least this large rebuild the trigger-maintained tables once instead of per row
+BULK_LOAD_BYTES = 4 * 1024 * 1024
+# Page cache for the ingest connection (KiB)
+CACHE_KIB = 256 * 1024
+MANIFEST_TABLE = "ingest_manifest"
+
+
+# ---------- Manifest ----------
+def ensure_manifest(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            File_Name TEXT PRIMARY KEY,
+            Size INTEGER NOT NULL,
+            Mtime_NS INTEGER NOT NULL,
+            SHA256 TEXT NOT NULL,
+            Row_Count INTEGER NOT NULL,
+            Loaded_At TEXT NOT NULL
+        );
+    """)
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_unchanged(conn, path):
+    """Return (unchanged, sha256). The hash is only computed when size/mtime moved."""
+    stat = path.stat()
+    row = conn.execute(
+        f"SELECT Size, Mtime_NS, SHA256 FROM {MANIFEST_TABLE} WHERE File_Name = ?;",
+        (path.name,)
+    ).fetchone()
+    if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+        return True, row[2]
+    sha = file_sha256(path)
+    if row and row[2] == sha:
+        # Touched but identical: remember the new mtime so the next run skips hashing
+        with conn:
+            conn.execute(
+                f"UPDATE {MANIFEST_TABLE} SET Size = ?, Mtime_NS = ? WHERE File_Name = ?;",
+                (stat.st_size, stat.st_mtime_ns, path.name)
+            )
+        return True, sha
+    return False, sha
+
+
+def record_manifest(conn, path, sha, rows):
+    stat = path.stat()
+    conn.execute(f"""
+        INSERT INTO {MANIFEST_TABLE} (File_Name, Size, Mtime_NS, SHA256, Row_Count, Loaded_At)
+        VALUES (?, ?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(File_Name) DO UPDATE SET
+            Size = excluded.Size, Mtime_NS = excluded.Mtime_NS, SHA256 = excluded.SHA256,
+            Row_Count = excluded.Row_Count, Loaded_At = excluded.Loaded_At;
+    """, (path.name, stat.st_size, stat.st_mtime_ns, sha, rows))
+
+
+# ---------- Quarantine ----------
+def quarantine_rows(conn, table, csv_name, rows, reasons):
+    """Record rejected rows; Source_Row is the data line (1 = first row after the header)."""
+    if rows.empty:
+        return
+    columns = list(rows.columns)
+    ensure_quarantine(conn, table, columns)
+    frame = rows.astype("string").astype(object).where(rows.notna(), None)
+    frame.insert(0, "Reason", reasons.to_numpy())
+    frame.insert(0, "Source_Row", (rows.index + 1).astype(int))
+    frame.insert(0, "Source_File", csv_name)
+    cols = ", ".join(quote(c) for c in frame.columns)
+    marks = ", ".join("?" for _ in frame.columns)
+    conn.executemany(
+        f"INSERT INTO {quote(quarantine_table(table))} ({cols}, Quarantined_At) VALUES ({marks}, datetime('now'));",
+        chunk_rows(frame),
+    )
+
+
+def clear_quarantine(conn, table, csv_name):
+    name = quarantine_table(table)
+    if name in set(n for (n,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")):
+        conn.execute(f"DELETE FROM {quote(name)} WHERE Source_File = ?;", (csv_name,))
+
+
+# ---------- Ingest ----------
+class IngestReport(dict):
+    """{table: rows upserted}, plus .quarantined {table: rows} and .timings {stage: seconds}."""
+
+    def __init__(self):
+        super().__init__()
+        self.quarantined = {}
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def summary(self):
+        return " · ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items())
+
+
+def parent_keys(conn, table):
+    """Sorted key arrays of the tables table references, as currently in the database."""
+    keys = {}
+    for parent in INGEST_SPECS[table].references.values():
+        key = INGEST_SPECS[parent].key
+        keys[parent] = np.fromiter((k for (k,) in conn.execute(f"SELECT {key} FROM {parent} ORDER BY {key};")),
+                                   dtype="int64")
+    return keys
+
+
+def parsed_chunks(jobs, report, chunk_size, pool, window):
+    """Yield (table, csv_path, parse_chunk result) in file and row order.
+
+    CSVs are read as text here; type checks and date parsing run in the pool, up to
+    `window` chunks ahead of the loader (inline when pool is None).
+    """
+    def read():
+        for table, csv_path in jobs:
+            reader = pd.read_csv(csv_path, chunksize=chunk_size, dtype=str, keep_default_na=False, na_values=[""])
+            while True:
+                with report.stage("read"):
+                    chunk = next(reader, None)
+                if chunk is None:
+                    break
+                yield table, csv_path, chunk
+
+    pending = deque()
+    for table, csv_path, chunk in read():
+        if pool is None:
+            result = parse_chunk(table, chunk)
+            report.add_time("parse (CPU)", result[3])
+            yield table, csv_path, result
+            continue
+        pending.append((table, csv_path, pool.submit(parse_chunk, table, chunk)))
+        while len(pending) >= window:
+            yield _collect(pending.popleft(), report)
+    while pending:
+        yield _collect(pending.popleft(), report)
+
+
+def _collect(item, report):
+    table, csv_path, future = item
+    with report.stage("wait"):
+        result = future.result()
+    report.add_time("parse (CPU)", result[3])
+    return table, csv_path, result
+
+
+def load_chunk(conn, table, csv_path, typed, reasons, raw_bad, keys, seen):
+    """Integrity-check one parsed chunk, upsert the good rows and quarantine the rest.
+    Returns (rows upserted, rows quarantined, seen keys)."""
+    spec = INGEST_SPECS[table]
+    seen = check_integrity(table, typed, reasons, keys, seen)
+    good = (reasons == "").to_numpy()
+    known = set(table_columns(conn, table))
+    columns = [c for c in typed.columns if c in known]
+    conn.executemany(upsert_sql(table, columns, spec.key), chunk_rows(typed.loc[good, columns]))
+    # Rows that failed in the worker keep their raw text; integrity failures their typed values
+    bad = typed.loc[~good].astype(object)
+    failed = raw_bad.index.intersection(bad.index)
+    bad.loc[failed, raw_bad.columns] = raw_bad.loc[failed]
+    quarantine_rows(conn, table, csv_path.name, bad, reasons[~good])
+    return int(good.sum()), int((~good).sum()), seen
+
+
+def ingest(db_path=DB_PATH, data_dir=DATA_DIR, chunk_size=CHUNK_SIZE, force=False, workers=None):
+    """Validate and load the changed CSVs; bad rows go to quarantine_<table>. Returns an IngestReport."""
+    db_path, data_dir = Path(db_path), Path(data_dir)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    report = IngestReport()
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA cache_size = -{CACHE_KIB};")
+    try:
+        migrate(conn)
+        ensure_manifest(conn)
+        jobs, hashes = [], {}
+        with report.stage("hash"):
+            for table, file_name, _ in DATASETS:
+                csv_path = data_dir / file_name
+                if not csv_path.exists():
+                    print(f"⚠️ {file_name} not found")
+                    continue
+                unchanged, sha = file_unchanged(conn, csv_path)
+                if unchanged and not force:
+                    print(f"⏭️ {file_name} unchanged, skipped")
+                    continue
+                jobs.append((table, csv_path))
+                hashes[table] = sha
+
+        total_bytes = sum(path.stat().st_size for _, path in jobs)
+        # Large loads drop the triggers and rebuild the derived tables once (one transaction);
+        # small ones keep per-row triggers and commit file by file
+        bulk = total_bytes >= BULK_LOAD_BYTES
+        pool = None
+        if workers > 1 and total_bytes >= PARALLEL_MIN_BYTES:
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            with (_bulk_transaction(conn, report) if bulk else nullcontext()):
+                current, counts, keys, seen = None, None, None, None
+                for table, csv_path, (typed, reasons, raw_bad, _) in parsed_chunks(
+                        jobs, report, chunk_size, pool, 2 * workers):
+                    if table != current:
+                        if current is not None:
+                            _finish_file(conn, current, counts, hashes[current], report, bulk)
+                        current, counts, seen = table, [csv_path, 0, 0], np.empty(0, dtype="int64")
+                        if not conn.in_transaction:
+                            # One transaction per file: readers never see a half-loaded table
+                            conn.execute("BEGIN;")
+                        with report.stage("validate"):
+                            keys = parent_keys(conn, table)
+                            clear_quarantine(conn, table, csv_path.name)
+                            extra = [c for c in typed.columns if c not in set(table_columns(conn, table))]
+                            if extra:
+                                print(f"⚠️ {csv_path.name}: ignoring unknown columns {extra}")
+                    with report.stage("load"):
+                        loaded, rejected, seen = load_chunk(conn, table, csv_path, typed, reasons, raw_bad, keys, seen)
+                    counts[1] += loaded
+                    counts[2] += rejected
+                if current is not None:
+                    _finish_file(conn, current, counts, hashes[current], report, bulk)
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        conn.close()
+    print(f"⏱️ {report.summary()}")
+    return report
+
+
+@contextmanager
+def _bulk_transaction(conn, report):
+    conn.execute("BEGIN;")
+    with suspend_triggers(conn):
+        yield
+        start = time.perf_counter()
+    report.add_time("rebuild", time.perf_counter() - start)
+    conn.commit()
+
+
+def _finish_file(conn, table, counts, sha, report, bulk):
+    csv_path, loaded, rejected = counts
+    record_manifest(conn, csv_path, sha, loaded)
+    if not bulk:
+        conn.commit()
+    report[table] = loaded
+    if rejected:
+        report.quarantined[table] = rejected
+        print(f"⚠️ {csv_path.name}: {rejected} rows quarantined (see {quarantine_table(table)})")
+    print(f"✅ {table}: {loaded} rows upserted")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load the CSV datasets into the SQLite database.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Folder holding the CSV files")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per insert batch")
+    parser.add_argument("--force", action="store_true", help="Reload files even if unchanged")
+    parser.add_argument("--workers", type=int, help="Parser processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    ingest(args.db, args.data_dir, args.chunk_size, args.force, args.workers)
+    print("🎯 All available datasets loaded into database!")
+
 
-# ✅ Connect DB
-conn = sqlite3.connect(DB_PATH)
-
-# ---------- Load Providers ----------
-providers_csv = DATA_DIR / "providers_data.csv"
-if providers_csv.exists():
-    df_providers = pd.read_csv(providers_csv)
-    df_providers.to_sql("providers", conn, if_exists="replace", index=False)
-    print("✅ Providers data loaded successfully")
-else:
-    print("⚠️ providers_data.csv not found")
-
-# ---------- Load Receivers ----------
-receivers_csv = DATA_DIR / "receivers_data.csv"
-if receivers_csv.exists():
-    df_receivers = pd.read_csv(receivers_csv)
-    df_receivers.to_sql("receivers", conn, if_exists="replace", index=False)
-    print("✅ Receivers data loaded successfully")
-else:
-    print("⚠️ receivers_data.csv not found")
-
-# ---------- Load Food Listings ----------
-food_listings_csv = DATA_DIR / "food_listings_data.csv"
-if food_listings_csv.exists():
-    df_food = pd.read_csv(food_listings_csv)
-    df_food.to_sql("food_listings", conn, if_exists="replace", index=False)
-    print("✅ Food listings data loaded successfully")
-else:
-    print("⚠️ food_listings_data.csv not found")
-
-# ---------- Load Claims ----------
-claims_csv = DATA_DIR / "claims_data.csv"
-if claims_csv.exists():
-    df_claims = pd.read_csv(claims_csv)
-    df_claims.to_sql("claims", conn, if_exists="replace", index=False)
-    print("✅ Claims data loaded successfully")
-else:
-    print("⚠️ claims_data.csv not found")
-
-conn.close()
-print("🎯 All available datasets loaded into database!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Canonical date handling: Expiry_Date is stored as ISO "YYYY-MM-DD" and claim
+# Timestamp as ISO "YYYY-MM-DD HH:MM:SS", so both sort and range-scan as plain text.
+from datetime import date, datetime
+
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y"]
+TIMESTAMP_FORMATS = [
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M",
+    "%m-%d-%Y %H:%M", "%m-%d-%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S",
+] + DATE_FORMATS
+
+ISO_DATE = "%Y-%m-%d"
+ISO_TIMESTAMP = "%Y-%m-%d %H:%M:%S"
+
+
+def _parse(value, formats):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def iso_date(value):
+    """'3/17/2025', '2025-03-17' or a date -> '2025-03-17'; None if unparseable."""
+    parsed = _parse(value, TIMESTAMP_FORMATS)
+    return parsed.strftime(ISO_DATE) if parsed else None
+
+
+def iso_timestamp(value):
+    """'03-05-2025 05:26', '3/21/2025 0:59' or a datetime -> '2025-03-05 05:26:00'."""
+    parsed = _parse(value, TIMESTAMP_FORMATS)
+    return parsed.strftime(ISO_TIMESTAMP) if parsed else None
+
+
+def parse_series(values, formats):
+    """Vectorised parse of a string Series trying each format in turn; NaT where none match."""
+    import pandas as pd
+
+    text = values.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in formats:
+        missing = parsed.isna() & text.notna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors="coerce")
+    return parsed
+
+
+def iso_date_series(values):
+    return parse_series(values, TIMESTAMP_FORMATS).dt.strftime(ISO_DATE)
+
+
+def iso_timestamp_series(values):
+    return parse_series(values, TIMESTAMP_FORMATS).dt.strftime(ISO_TIMESTAMP)
+
+
+def register_sqlite_functions(conn):
+    conn.create_function("iso_date", 1, iso_date, deterministic=True)
+    conn.create_function("iso_timestamp", 1, iso_timestamp, deterministic=True)
@@ -0,0 +1,259 @@
+# Data-access layer shared by the Streamlit app and the scripts.
+# One connection pool per database file and process: Streamlit reruns and sessions
+# all reuse it because imported modules outlive a rerun.
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from query_cache import ResultCache, read_tables, register_dependency
+import query_log
+from schema import DERIVED_TABLES, migrate, quote, explain as schema_explain
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_PATH = Path(os.environ.get("FOOD_WASTAGE_DB", BASE_DIR / "database" / "food_wastage.db"))
+
+POOL_SIZE = int(os.environ.get("FOOD_WASTAGE_POOL_SIZE", "8"))
+# Per-connection LRU of prepared statements (sqlite3 re-uses them by SQL text)
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_SECONDS = 30
+# A table missing from the catalog is looked up again at most this often
+CATALOG_RETRY_SECONDS = 5.0
+# run_query(timeout=...) checks its deadline every this many VM instructions
+PROGRESS_OPCODES = 10_000
+
+DDL_PATTERN = re.compile(r"^\s*(CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+# Trigger-maintained tables go stale together with the table that feeds them
+for _table, _derived in DERIVED_TABLES.items():
+    register_dependency(_table, *_derived)
+
+
+class ConnectionPool:
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = Path(db_path)
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._idle_readers = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._migrated = False
+        self._catalog = frozenset()
+        self._catalog_loaded_at = None
+        self.cache = ResultCache(self.db_path)
+
+    def _connect(self, read_only=False):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        # WAL: readers never block the writer and the writer never blocks readers
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA foreign_keys = ON;")
+        if read_only:
+            # Any write fails outright instead of queueing for the write lock
+            conn.execute("PRAGMA query_only = ON;")
+        return conn
+
+    def _open(self, read_only=False):
+        with self._lock:
+            if not self._migrated:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = self._connect()
+                migrate(conn)
+                self._migrated = True
+                # Opening/migrating touches the files; don't mistake that for an external write
+                self.cache.clear()
+                if not read_only:
+                    return conn
+                self._idle.put(conn)
+        return self._connect(read_only)
+
+    @contextmanager
+    def connection(self, read_only=False):
+        """Borrow a connection; at most `size` (read-write and read-only together) are open at once."""
+        idle = self._idle_readers if read_only else self._idle
+        self._slots.acquire()
+        try:
+            try:
+                conn = idle.get_nowait()
+            except queue.Empty:
+                conn = self._open(read_only)
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                idle.put(conn)
+        finally:
+            self._slots.release()
+
+    # ---------- Schema catalog ----------
+    def refresh_catalog(self):
+        with self.connection() as conn:
+            names = conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view');").fetchall()
+        self._catalog = frozenset(name for (name,) in names)
+        self._catalog_loaded_at = time.monotonic()
+        return self._catalog
+
+    def table_exists(self, name):
+        if name in self._catalog:
+            return True
+        loaded_at = self._catalog_loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > CATALOG_RETRY_SECONDS:
+            return name in self.refresh_catalog()
+        return False
+
+    def close(self):
+        for idle in (self._idle, self._idle_readers):
+            while True:
+                try:
+                    idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None):
+    path = Path(db_path or DB_PATH).resolve()
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+def configure(db_path):
+    """Point the module-level helpers at another database file."""
+    global DB_PATH
+    DB_PATH = Path(db_path)
+    return get_pool()
+
+
+# ---------- SQL helpers ----------
+def upsert_sql(table, columns, key):
+    cols = ", ".join(quote(c) for c in columns)
+    marks = ", ".join("?" for _ in columns)
+    updates = ", ".join(f"{quote(c)} = excluded.{quote(c)}" for c in columns if c != key)
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    return f"INSERT INTO {quote(table)} ({cols}) VALUES ({marks}) ON CONFLICT({quote(key)}) {action};"
+
+
+def chunk_rows(chunk):
+    # sqlite3 cannot bind numpy scalars or NaN: hand it plain Python objects / None
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    return chunk.itertuples(index=False, name=None)
+
+
+# ---------- Helpers used by app.py ----------
+def run_query(sql, params=(), cache=True, read_only=False, timeout=None, db_path=None):
+    """SELECT into a DataFrame. Results are served from the pool's cache until a write
+    touches one of the tables the query reads.
+
+    read_only runs on a query_only connection; timeout (seconds) aborts the statement
+    with sqlite3.OperationalError once it runs longer. db_path reads another database
+    file (e.g. a region shard, see partitions.py) through its own pool.
+    """
+    # Imported on first use: the app shell and the scripts that only write never load pandas
+    import pandas as pd
+
+    pool = get_pool(db_path)
+    with query_log.timed(sql, params, "miss" if cache else "off") as outcome:
+        if cache:
+            hit = pool.cache.get(sql, params)
+            if hit is not None:
+                outcome.update(rows=len(hit), cache="hit")
+                # Shallow copy: callers may add/replace columns without touching the cached frame
+                return hit.copy(deep=False)
+            versions = pool.cache.versions(read_tables(sql))
+        with pool.connection(read_only) as conn:
+            if timeout is not None:
+                deadline = time.monotonic() + timeout
+                conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_OPCODES)
+            try:
+                cur = conn.execute(sql, params)
+                columns = [d[0] for d in cur.description] if cur.description else []
+                result = pd.DataFrame.from_records(cur.fetchall(), columns=columns)
+            finally:
+                if timeout is not None:
+                    conn.set_progress_handler(None, 0)
+        outcome["rows"] = len(result)
+        if cache:
+            pool.cache.put(sql, params, result, versions)
+            return result.copy(deep=False)
+        return result
+
+
+def _after_write(pool, sql):
+    if DDL_PATTERN.match(sql):
+        pool.cache.clear()
+        pool.refresh_catalog()
+    else:
+        pool.cache.note_write(sql)
+
+
+def exec_query(sql, params=()):
+    """Run one write statement in its own transaction. Returns the affected row count."""
+    pool = get_pool()
+    try:
+        with query_log.timed(sql, params, "write") as outcome:
+            with pool.connection() as conn:
+                with conn:
+                    outcome["rows"] = conn.execute(sql, params).rowcount
+            return outcome["rows"]
+    finally:
+        # Also on failure: a statement may have partially applied before the rollback
+        _after_write(pool, sql)
+
+
+def executemany(sql, rows, db_path=None):
+    """Run sql for every parameter tuple in rows inside a single transaction."""
+    pool = get_pool(db_path)
+    try:
+        with query_log.timed(sql, (), "write") as outcome:
+            with pool.connection() as conn:
+                with conn:
+                    outcome["rows"] = conn.executemany(sql, rows).rowcount
+            return outcome["rows"]
+    finally:
+        _after_write(pool, sql)
+
+
+def executemany_all(batches, db_path=None):
+    """Run every (sql, rows) pair with executemany inside one transaction. Returns each row count."""
+    pool = get_pool(db_path)
+    counts = []
+    try:
+        with pool.connection() as conn:
+            with conn:
+                for sql, rows in batches:
+                    with query_log.timed(sql, (), "write") as outcome:
+                        outcome["rows"] = conn.executemany(sql, rows).rowcount
+                    counts.append(outcome["rows"])
+        return counts
+    finally:
+        for sql, _ in batches:
+            _after_write(pool, sql)
+
+
+def explain(sql, params=()):
+    with get_pool().connection() as conn:
+        return schema_explain(conn, sql, params)
+
+
+def cache_stats():
+    return get_pool().cache.stats()
+
+
+def table_exists(name, db_path=None):
+    return get_pool(db_path).table_exists(name)
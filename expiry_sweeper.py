@@ -0,0 +1,129 @@
+# Keeps food_listings.Expiry_Status current as days pass. Writes already set the status
+# (schema.py triggers); this flips Available -> Expiring -> Expired when a listing crosses
+# a day boundary, touching only the rows that change via idx_food_listings_expiry_status.
+#
+# A min-heap of upcoming transition times (one per distinct Expiry_Date) decides when to
+# wake up. Runs in-process as a daemon thread (app.py) or on its own next to ingest:
+#
+#   python expiry_sweeper.py            # run forever
+#   python expiry_sweeper.py --once     # sweep now and exit
+import argparse
+import heapq
+import threading
+from datetime import datetime, time, timedelta, timezone
+
+import db
+from schema import EXPIRING_DAYS
+
+# Also rescan this often so listings added since the last scan get scheduled
+RESCAN_SECONDS = 300
+
+
+def utc_now():
+    # DATE('now') in the schema triggers is UTC as well
+    return datetime.now(timezone.utc)
+
+
+def sweep(today=None):
+    """Flip every listing whose status is out of date as of today. Returns {status: rows}."""
+    today = (today or utc_now().date()).isoformat()
+    expiring_until = (datetime.fromisoformat(today) + timedelta(days=EXPIRING_DAYS)).date().isoformat()
+    changed = {
+        # Range scans on (Expiry_Status, Expiry_Date): only rows that cross a boundary are read
+        "Expired": db.exec_query("""
+            UPDATE food_listings SET Expiry_Status = 'Expired'
+            WHERE Expiry_Status IN ('Available', 'Expiring') AND Expiry_Date < ? AND Expiry_Date <> '';
+        """, (today,)),
+        "Expiring": db.exec_query("""
+            UPDATE food_listings SET Expiry_Status = 'Expiring'
+            WHERE Expiry_Status = 'Available' AND Expiry_Date >= ? AND Expiry_Date <= ?;
+        """, (today, expiring_until)),
+    }
+    return changed
+
+
+class ExpirySweeper:
+    def __init__(self, rescan_seconds=RESCAN_SECONDS):
+        self.rescan_seconds = rescan_seconds
+        self._heap = []
+        self.last_sweep = None
+
+    def schedule(self, now=None):
+        """Rebuild the heap of transition times since the last sweep from the distinct expiry dates."""
+        since = self.last_sweep or now or utc_now()
+        dates = db.run_query("""
+            SELECT DISTINCT Expiry_Date FROM food_listings
+            WHERE Expiry_Status IN ('Available', 'Expiring') AND Expiry_Date <> '';
+        """, cache=False)["Expiry_Date"]
+        heap = set()
+        for value in dates:
+            try:
+                expiry = datetime.fromisoformat(value).date()
+            except (TypeError, ValueError):
+                continue
+            # Expiring from midnight EXPIRING_DAYS before, Expired from the midnight after
+            for day in (expiry - timedelta(days=EXPIRING_DAYS), expiry + timedelta(days=1)):
+                due = datetime.combine(day, time.min, tzinfo=timezone.utc)
+                if due > since:
+                    heap.add(due)
+        self._heap = list(heap)
+        heapq.heapify(self._heap)
+
+    def next_due(self):
+        return self._heap[0] if self._heap else None
+
+    def run_pending(self, now=None):
+        """Sweep if a transition is due (or nothing has run yet); returns the sweep result or None."""
+        now = now or utc_now()
+        due = self.last_sweep is None
+        while self._heap and self._heap[0] <= now:
+            heapq.heappop(self._heap)
+            due = True
+        if not due:
+            return None
+        changed = sweep(now.date())
+        self.last_sweep = now
+        return changed
+
+    def seconds_until_next(self, now=None):
+        now = now or utc_now()
+        due = self.next_due()
+        wait = self.rescan_seconds if due is None else min(self.rescan_seconds, (due - now).total_seconds())
+        return max(wait, 0.0)
+
+    def run_forever(self, stop):
+        while not stop.is_set():
+            self.schedule()
+            changed = self.run_pending()
+            if changed and any(changed.values()):
+                print(f"✅ Expiry sweep: {changed}")
+            stop.wait(self.seconds_until_next())
+
+
+def start_background(rescan_seconds=RESCAN_SECONDS):
+    """Start a daemon sweeper thread; returns (sweeper, stop event)."""
+    sweeper, stop = ExpirySweeper(rescan_seconds), threading.Event()
+    threading.Thread(target=sweeper.run_forever, args=(stop,), name="expiry-sweeper", daemon=True).start()
+    return sweeper, stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep food_listings.Expiry_Status current.")
+    parser.add_argument("--db", help="Database file (default: FOOD_WASTAGE_DB or database/food_wastage.db)")
+    parser.add_argument("--once", action="store_true", help="Sweep once and exit")
+    args = parser.parse_args(argv)
+    if args.db:
+        db.configure(args.db)
+
+    if args.once:
+        print(f"✅ Expiry sweep: {sweep()}")
+        return
+    stop = threading.Event()
+    try:
+        ExpirySweeper().run_forever(stop)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
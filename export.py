@@ -0,0 +1,246 @@
+# Streaming export of named queries to CSV, JSONL or Parquet.
+#
+# Rows come off a read-only pooled cursor in fetchmany batches and are written out batch by
+# batch, so memory stays flat no matter how many rows a query returns (10M claims included).
+# Used by api_server.py's /exports endpoint, the app's download buttons (which hold the file
+# in memory, see download_button) and from the command line:
+#
+#   python export.py --list
+#   python export.py claims_history --format parquet --output claims.parquet
+#   python export.py claims_per_provider --format csv           # to stdout
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+import db
+import query_log
+from schema import expiry_status_sql
+from sql_queries import SQL_QUERIES
+
+BATCH_ROWS = 10_000
+# Base URL of a running api_server.py; when set, named exports download from its streamed
+# /exports endpoint instead of through Streamlit
+API_URL = os.environ.get("FOOD_WASTAGE_API_URL", "").rstrip("/")
+
+# SQL_QUERIES plus the page queries ops pull for reporting
+EXPORTS = {
+    **SQL_QUERIES,
+    "claims_history": """
+        SELECT Claim_ID, Timestamp, Status, Food_ID, Food_Name, Quantity, Expiry_Date, Location,
+               Food_Type, Meal_Type, Provider_ID, Provider_Type, Receiver_ID, Receiver_Name
+        FROM claims_enriched
+        ORDER BY Claim_ID;
+    """,
+    # Expired as of today, not the stored Expiry_Status, which only the app's sweeper keeps current
+    "expired_by_provider_type": f"""
+        SELECT IFNULL(Provider_Type, 'Unknown') AS Provider_Type, COUNT(*) AS Expired_Items,
+               IFNULL(SUM(Quantity), 0) AS Expired_Quantity
+        FROM food_listings
+        WHERE Expiry_Status = 'Expired' OR {expiry_status_sql("Expiry_Date")} = 'Expired'
+        GROUP BY 1
+        ORDER BY Expired_Items DESC;
+    """,
+}
+
+FORMATS = {
+    # format: (file extension, MIME type)
+    "csv": ("csv", "text/csv"),
+    "jsonl": ("jsonl", "application/x-ndjson"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+# ---------- Reading ----------
+def stream_batches(sql, params=(), batch_rows=BATCH_ROWS):
+    """Yield (columns, rows) for every fetchmany batch of sql, on a read-only connection."""
+    with query_log.timed(sql, params, "off") as outcome, db.get_pool().connection(read_only=True) as conn:
+        cur = conn.execute(sql, params)
+        columns = [d[0] for d in cur.description]
+        outcome["rows"] = 0
+        rows = cur.fetchmany(batch_rows)
+        # The first batch is yielded even when empty so writers still emit a header/schema
+        while True:
+            outcome["rows"] += len(rows)
+            yield columns, rows
+            rows = cur.fetchmany(batch_rows)
+            if not rows:
+                break
+        cur.close()
+
+
+# ---------- Writers ----------
+def _write_csv(batches, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    header = False
+    for columns, rows in batches:
+        if not header:
+            writer.writerow(columns)
+            header = True
+        writer.writerows(rows)
+    text.flush()
+    text.detach()
+
+
+def _write_jsonl(batches, out):
+    for columns, rows in batches:
+        out.write("".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows).encode("utf-8"))
+
+
+# SQLite declared-type affinity (first match wins, as in SQLite's own rules) -> Arrow type name
+AFFINITY_TYPES = [("INT", "int64"), ("CHAR", "string"), ("CLOB", "string"), ("TEXT", "string"),
+                  ("BLOB", "binary"), ("REAL", "float64"), ("FLOA", "float64"), ("DOUB", "float64")]
+
+
+def declared_types():
+    """{column name: Arrow type name} from the declared types of every table and view column.
+
+    Names declared with different types in different tables are left out, as are untyped
+    ones (expressions in views); those columns are typed from the data instead.
+    """
+    seen = {}
+    with db.get_pool().connection(read_only=True) as conn:
+        tables = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%';")]
+        for table in tables:
+            for _, column, decl, *_ in conn.execute(f"PRAGMA table_info({db.quote(table)});"):
+                kind = next((t for affinity, t in AFFINITY_TYPES if affinity in decl.upper()), None)
+                if kind is not None:
+                    seen.setdefault(column, set()).add(kind)
+    return {column: kinds.pop() for column, kinds in seen.items() if len(kinds) == 1}
+
+
+def _parquet_schema(columns, rows, declared=None):
+    import pyarrow as pa
+
+    declared = declared or {}
+    fields = []
+    for i, column in enumerate(columns):
+        if column in declared:
+            fields.append(pa.field(column, getattr(pa, declared[column])()))
+            continue
+        kind = pa.array([row[i] for row in rows]).type
+        # An undeclared column that is all NULL in the first batch is typed by what SQLite stores most: text
+        fields.append(pa.field(column, pa.string() if pa.types.is_null(kind) else kind))
+    return pa.schema(fields)
+
+
+def _parquet_array(values, field):
+    import pyarrow as pa
+
+    try:
+        return pa.array(values, type=field.type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # SQLite's loose typing lets a text column hold numbers (and vice versa); keep them as text
+        if pa.types.is_string(field.type):
+            return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+        raise ValueError(f"column {field.name!r} does not fit its Parquet type {field.type}") from None
+
+
+def _write_parquet(batches, out, declared=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for columns, rows in batches:
+            if writer is None:
+                schema = _parquet_schema(columns, rows, declared)
+                writer = pq.ParquetWriter(out, schema)
+            # One row group per batch, all in the schema fixed when the writer opened
+            arrays = [_parquet_array([row[i] for row in rows], field) for i, field in enumerate(schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def export_sql(sql, out, fmt="csv", params=(), batch_rows=BATCH_ROWS):
+    """Stream sql's result into the binary file object out. Returns the number of rows."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {', '.join(WRITERS)}")
+    count = 0
+
+    def counted():
+        nonlocal count
+        for columns, rows in stream_batches(sql, params, batch_rows):
+            count += len(rows)
+            yield columns, rows
+
+    if fmt == "parquet":
+        _write_parquet(counted(), out, declared_types())
+    else:
+        WRITERS[fmt](counted(), out)
+    return count
+
+
+def export_query(name, out, fmt="csv", batch_rows=BATCH_ROWS):
+    if name not in EXPORTS:
+        raise KeyError(f"Unknown export {name!r}; see --list")
+    return export_sql(EXPORTS[name], out, fmt, batch_rows=batch_rows)
+
+
+def file_name(name, fmt):
+    return f"{name}.{FORMATS[fmt][0]}"
+
+
+# ---------- App ----------
+def download_button(label, name, fmt, key=None, sql=None, params=()):
+    """Download button for an export, run only when clicked.
+
+    Streamlit sends a download as one in-memory blob, so this in-app button is not streamed:
+    the whole file is built in memory on Streamlit's download thread. Named exports become a
+    link to api_server.py's streamed /exports endpoint when API_URL is set; filtered table
+    exports (sql given) always take the in-app path.
+    """
+    import streamlit as st
+
+    if API_URL and sql is None:
+        return st.link_button(label, f"{API_URL}/exports/{name}?format={fmt}")
+
+    def build():
+        out = io.BytesIO()
+        export_sql(sql or EXPORTS[name], out, fmt, params)
+        return out.getvalue()
+
+    return st.download_button(label, build, file_name=file_name(name, fmt), mime=FORMATS[fmt][1],
+                              key=key or f"export_{name}_{fmt}", on_click="ignore")
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a named query to CSV, JSONL or Parquet.")
+    parser.add_argument("name", nargs="?", help="Query name (see --list)")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--db", help="Database file (default: FOOD_WASTAGE_DB or database/food_wastage.db)")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--list", action="store_true", help="List the exportable queries and exit")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.name:
+        print("\n".join(EXPORTS))
+        return 0
+    if args.name not in EXPORTS:
+        parser.error(f"unknown query {args.name!r}; see --list")
+    if args.db:
+        db.configure(args.db)
+
+    if args.output:
+        with open(args.output, "wb") as out:
+            rows = export_query(args.name, out, args.format, args.batch_rows)
+        print(f"✅ Exported {rows} rows of {args.name} to {args.output}", file=sys.stderr)
+    else:
+        rows = export_query(args.name, sys.stdout.buffer, args.format, args.batch_rows)
+        sys.stdout.buffer.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# Vectorised row checks for data_preparation.py's ingest.
+#
+# check_chunk runs in worker processes on raw (all-text) CSV chunks: ID and integer
+# parsing, non-negative quantities and date normalisation, the CPU-heavy part. Checks that
+# need the rest of the file or other tables (duplicate keys, foreign keys) run in the
+# loading process in check_integrity, as sorted-array lookups on NumPy key arrays.
+# Failing rows carry a reason and are quarantined instead of loaded.
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from date_utils import iso_date_series, iso_timestamp_series
+
+
+@dataclass(frozen=True)
+class IngestSpec:
+    key: str
+    integers: tuple = ()
+    non_negative: tuple = ()
+    # Column -> normaliser to canonical ISO text
+    dates: dict = field(default_factory=dict)
+    # Column -> parent table; the value must be a key of the parent (NULL is not accepted)
+    references: dict = field(default_factory=dict)
+
+
+INGEST_SPECS = {
+    "providers": IngestSpec("Provider_ID"),
+    "receivers": IngestSpec("Receiver_ID"),
+    "food_listings": IngestSpec(
+        "Food_ID",
+        integers=("Quantity", "Provider_ID"),
+        non_negative=("Quantity",),
+        dates={"Expiry_Date": iso_date_series},
+        references={"Provider_ID": "providers"},
+    ),
+    "claims": IngestSpec(
+        "Claim_ID",
+        integers=("Food_ID", "Receiver_ID"),
+        dates={"Timestamp": iso_timestamp_series},
+        references={"Food_ID": "food_listings", "Receiver_ID": "receivers"},
+    ),
+}
+
+
+def add_reason(reasons, mask, reason):
+    """Append reason to every row of the reasons Series where mask holds."""
+    mask = np.asarray(mask, dtype=bool)
+    if mask.any():
+        current = reasons[mask]
+        reasons[mask] = np.where(current == "", reason, current + "; " + reason)
+
+
+def _blank(series):
+    return series.isna() | series.astype("string").str.strip().eq("")
+
+
+def check_chunk(table, chunk):
+    """(typed chunk, reasons) for a text chunk; reasons is "" for rows that passed."""
+    spec = INGEST_SPECS[table]
+    reasons = pd.Series("", index=chunk.index, dtype=object)
+    typed = chunk.copy()
+    if spec.key not in chunk.columns:
+        raise ValueError(f"{table} data has no {spec.key} column")
+
+    for column in (spec.key, *spec.integers):
+        if column not in chunk.columns:
+            continue
+        raw = chunk[column]
+        numbers = pd.to_numeric(raw, errors="coerce")
+        whole = numbers.notna() & (numbers % 1 == 0)
+        add_reason(reasons, _blank(raw), f"missing {column}" if column == spec.key else f"{column} is empty")
+        add_reason(reasons, ~_blank(raw) & ~whole, f"{column} is not an integer")
+        typed[column] = numbers.where(whole).astype("Int64")
+    for column in spec.non_negative:
+        if column in typed.columns:
+            add_reason(reasons, (typed[column] < 0).fillna(False), f"{column} is negative")
+    for column, to_iso in spec.dates.items():
+        if column in chunk.columns:
+            iso = to_iso(chunk[column])
+            add_reason(reasons, ~_blank(chunk[column]) & iso.isna(), f"unparseable {column}")
+            typed[column] = iso
+    return typed, reasons
+
+
+def parse_chunk(table, chunk):
+    """Worker entry point: (typed chunk, reasons, raw text of the failing rows, CPU seconds)."""
+    start = time.process_time()
+    typed, reasons = check_chunk(table, chunk)
+    return typed, reasons, chunk[(reasons != "").to_numpy()], time.process_time() - start
+
+
+def is_member(values, sorted_keys):
+    """Boolean array: which values occur in sorted_keys (a sorted int64 array)."""
+    if len(sorted_keys) == 0:
+        return np.zeros(len(values), dtype=bool)
+    positions = np.searchsorted(sorted_keys, values)
+    positions[positions == len(sorted_keys)] = 0
+    return sorted_keys[positions] == values
+
+
+def check_integrity(table, typed, reasons, parent_keys, seen_keys):
+    """Flag keys already seen in this file (or repeated in the chunk; the first one wins) and
+    foreign keys missing from parent_keys ({parent table: sorted int64 array}). Updates
+    reasons in place and returns seen_keys extended with this chunk's keys."""
+    spec = INGEST_SPECS[table]
+    keys = typed[spec.key]
+    present = keys.notna().to_numpy()
+    values = keys[present].to_numpy(dtype="int64")
+    duplicate = np.zeros(len(keys), dtype=bool)
+    duplicate[present] = keys[present].duplicated(keep="first").to_numpy() | is_member(values, seen_keys)
+    add_reason(reasons, duplicate, f"duplicate {spec.key}")
+
+    for column, parent in spec.references.items():
+        if column not in typed.columns:
+            continue
+        refs = typed[column]
+        linked = refs.notna().to_numpy()
+        known = np.zeros(len(refs), dtype=bool)
+        known[linked] = is_member(refs[linked].to_numpy(dtype="int64"), parent_keys[parent])
+        # Empty or unparseable references already have their own reason
+        add_reason(reasons, linked & ~known, f"unknown {column}")
+    return np.union1d(seen_keys, values)
@@ -0,0 +1,336 @@
+# Concurrent-session load test for app.py. N simulated sessions (Streamlit AppTest instances,
+# one thread each, all in this process as they would be in one Streamlit server) rerun the
+# Dashboard and Insights pages and submit the CRUD page's forms against a synthetic database.
+# For every session count it reports rerun latency percentiles per action, database errors
+# ("database is locked" counted separately) and memory, and names the first session count
+# where p95 or the error rate goes over budget. Memory is the whole process's peak RSS plus
+# its growth during the level: the sessions share this process, so imports and earlier
+# levels sit in the baseline and the growth is what the level's sessions added.
+#
+#   python load_test.py --claims 100000 --sessions 1,10,50,200
+#   python load_test.py --db database/food_wastage.db --sessions 25 --write-ratio 0.3 --output load.json
+import argparse
+import contextlib
+import json
+import logging
+import random
+import resource
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import db
+from bench_queries import percentile
+from synthetic_data import write_database
+
+BASE_DIR = Path(__file__).resolve().parent
+APP = BASE_DIR / "app.py"
+LOAD_DIR = BASE_DIR / "database" / "load"
+
+READ_PAGES = ("Dashboard", "Insights")
+ACTIONS_PER_SESSION = 20
+WRITE_RATIO = 0.2
+THINK_MS = 250
+RUN_TIMEOUT_SECONDS = 300
+# A session count "falls over" when reruns get slower than this or start failing
+MAX_P95_MS = 3000.0
+MAX_ERROR_RATE = 0.01
+RSS_INTERVAL_SECONDS = 0.05
+
+
+# ---------- Memory ----------
+def rss_mb():
+    """Current resident set size of this process (peak so far where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class RssSampler(threading.Thread):
+    """Samples the process's rss_mb() until stopped; .peak holds the highest value seen and
+    .baseline the value when it was created."""
+
+    def __init__(self, interval=RSS_INTERVAL_SECONDS):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.baseline = self.peak = rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, rss_mb())
+        return self.peak
+
+
+# ---------- Sessions ----------
+@contextlib.contextmanager
+def share_server_state():
+    """Make concurrent AppTests behave like sessions of one Streamlit server, inside the block.
+
+    AppTest installs a mock Runtime for each run and clears it when the run ends, pulling it
+    out from under every other session still running; keep the last one in place instead.
+    It also compiles the script afresh on every run, and concurrent compiles trip a
+    thread-safety bug in CPython 3.11's parser; compile once, as the server's script cache does.
+    Each run also patches config.get_option to turn on global.appTest and restores it when done,
+    which switches it off under runs still going (their widgets then lose their test data);
+    turn it on once for the whole block. Everything patched is put back on exit.
+    """
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    # (owner, attribute, value as stored on the owner: the classmethod objects, not bound methods)
+    originals = [(owner, name, vars(owner)[name]) for owner, name in [
+        (Runtime, "instance"), (Runtime, "exists"), (ScriptCache, "get_bytecode"),
+        (config, "get_option"), (app_test, "patch_config_options"),
+    ]]
+    shared = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            shared[:] = [cls._instance]
+        if not shared:
+            raise RuntimeError("Runtime hasn't been created!")
+        return shared[0]
+
+    compiled, lock, get_bytecode = {}, threading.Lock(), ScriptCache.get_bytecode
+
+    def cached_bytecode(self, script_path):
+        with lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(shared))
+    ScriptCache.get_bytecode = cached_bytecode
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+    try:
+        yield
+    finally:
+        for owner, name, value in originals:
+            setattr(owner, name, value)
+
+
+class Session:
+    """One simulated browser tab: an AppTest driven through the app's own widgets."""
+
+    def __init__(self, number, rng):
+        from streamlit.testing.v1 import AppTest
+
+        self.number = number
+        self.rng = rng
+        self.writes = 0
+        self.app = AppTest.from_file(str(APP), default_timeout=RUN_TIMEOUT_SECONDS)
+
+    def open(self):
+        self.app.run()
+
+    def show(self, page):
+        self.app.radio(key="page").set_value(page).run()
+
+    def add_receiver(self):
+        self.writes += 1
+        self.app.text_input(key="rname").input(f"Load test {self.number}-{self.writes}")
+        self.app.text_input(key="rcity").input("Load City")
+        self._button("Add Receiver").click().run()
+
+    def update_listing(self):
+        # Every session updates the first listing the picker offers: a deliberately hot row
+        new_qty = next(n for n in self.app.number_input if n.label == "New Quantity")
+        new_qty.set_value(self.rng.randint(1, 100))
+        self._button("Save Update").click().run()
+
+    def _button(self, label):
+        return next(b for b in self.app.button if b.label == label)
+
+    def errors(self):
+        """Error messages shown by the last run (st.error and uncaught exceptions)."""
+        return [str(e.value) for e in self.app.error] + [str(e.value) for e in self.app.exception]
+
+
+def simulate(session, actions, write_ratio, think_ms, samples, errors, start):
+    """Run one session's script, appending (action, ms) to samples and (action, message) to errors."""
+
+    def timed(action, step):
+        begin = time.perf_counter()
+        try:
+            step()
+            messages = session.errors()
+        except Exception as e:
+            messages = [f"{type(e).__name__}: {e}"]
+        samples.append((action, (time.perf_counter() - begin) * 1000))
+        errors.extend((action, message) for message in messages)
+        return not messages
+
+    start.wait()
+    if not timed("open", session.open):
+        return
+    rng = session.rng
+    for _ in range(actions):
+        time.sleep(rng.uniform(0, 2 * think_ms) / 1000)
+        if rng.random() < write_ratio:
+            if timed("crud", lambda: session.show("CRUD")):
+                write = rng.choice([session.add_receiver, session.update_listing])
+                timed("write", write)
+        else:
+            page = rng.choice(READ_PAGES)
+            timed(page.lower(), lambda: session.show(page))
+
+
+# ---------- Levels ----------
+def prepare_database(template, sessions):
+    """Fresh copy of template for one level, so every session count starts from the same data."""
+    LOAD_DIR.mkdir(parents=True, exist_ok=True)
+    path = LOAD_DIR / f"load_{sessions}.db"
+    for suffix in ("", "-wal", "-shm"):
+        Path(str(path) + suffix).unlink(missing_ok=True)
+    source, target = sqlite3.connect(template), sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return path
+
+
+def summarize(samples):
+    by_action = {}
+    for action, ms in samples:
+        by_action.setdefault(action, []).append(ms)
+    reruns = [ms for action, ms in samples if action != "open"]
+    summary = {}
+    for action, values in [("all reruns", reruns), *sorted(by_action.items())]:
+        if values:
+            summary[action] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+                "p99_ms": round(percentile(values, 99), 1),
+                "max_ms": round(max(values), 1),
+            }
+    return summary
+
+
+def run_level(template, sessions, actions=ACTIONS_PER_SESSION, write_ratio=WRITE_RATIO,
+              think_ms=THINK_MS, seed=42):
+    path = prepare_database(template, sessions)
+    db.configure(path)
+    samples, errors = [], []
+    start = threading.Event()
+    sampler = RssSampler()
+    with share_server_state():
+        threads = [
+            threading.Thread(target=simulate, daemon=True, args=(
+                Session(n, random.Random(seed * 100_003 + n)), actions, write_ratio, think_ms, samples, errors, start))
+            for n in range(sessions)
+        ]
+        sampler.start()
+        for thread in threads:
+            thread.start()
+        began = time.perf_counter()
+        start.set()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - began
+        peak = sampler.stop()
+    db.get_pool().close()
+
+    runs = len(samples)
+    locked = sum("locked" in message or "busy" in message for _, message in errors)
+    return {
+        "sessions": sessions,
+        "runs": runs,
+        "wall_s": round(wall, 2),
+        "runs_per_s": round(runs / wall, 2) if wall else 0.0,
+        "errors": len(errors),
+        "locked": locked,
+        "error_rate": round(len(errors) / runs, 4) if runs else 0.0,
+        # Whole process (this runner and every session), and its growth over the level
+        "process_peak_rss_mb": round(peak, 1),
+        "rss_growth_mb": round(peak - sampler.baseline, 1),
+        "latency": summarize(samples),
+        "error_samples": sorted({f"{action}: {message.splitlines()[0]}" for action, message in errors})[:10],
+    }
+
+
+def fell_over(level, max_p95_ms=MAX_P95_MS, max_error_rate=MAX_ERROR_RATE):
+    p95 = level["latency"].get("all reruns", {}).get("p95_ms", 0.0)
+    return p95 > max_p95_ms or level["error_rate"] > max_error_rate
+
+
+def print_level(level, failed):
+    rerun = level["latency"].get("all reruns", {})
+    print(f"{'⚠️' if failed else '✅'} {level['sessions']:>4} sessions: "
+          f"p50 {rerun.get('p50_ms', 0):.0f} ms · p95 {rerun.get('p95_ms', 0):.0f} ms · "
+          f"p99 {rerun.get('p99_ms', 0):.0f} ms · {level['runs_per_s']:.1f} runs/s · "
+          f"{level['errors']} errors ({level['locked']} locked) · "
+          f"process RSS peak {level['process_peak_rss_mb']:.0f} MB (+{level['rss_growth_mb']:.0f} MB this level)")
+    for action, entry in level["latency"].items():
+        if action != "all reruns":
+            print(f"     {action:<10} n={entry['count']:<5} p50 {entry['p50_ms']:>7.0f} ms  "
+                  f"p95 {entry['p95_ms']:>7.0f} ms  max {entry['max_ms']:>7.0f} ms")
+    for sample in level["error_samples"]:
+        print(f"     ⚠️ {sample}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive app.py from N concurrent simulated sessions.")
+    parser.add_argument("--sessions", default="1,5,10,25", help="Comma-separated session counts, run in order")
+    parser.add_argument("--claims", type=int, default=10_000, help="Synthetic scale (10k .. 10M claims)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="Copy this database for each level instead of a synthetic one")
+    parser.add_argument("--actions", type=int, default=ACTIONS_PER_SESSION, help="Reruns per session")
+    parser.add_argument("--write-ratio", type=float, default=WRITE_RATIO, help="Share of actions that submit a CRUD form")
+    parser.add_argument("--think-ms", type=float, default=THINK_MS, help="Mean pause between a session's actions")
+    parser.add_argument("--max-p95-ms", type=float, default=MAX_P95_MS)
+    parser.add_argument("--max-error-rate", type=float, default=MAX_ERROR_RATE)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    # Deprecation warnings would be logged on every rerun of every session
+    logging.getLogger("streamlit.deprecation_util").disabled = True
+    template = args.db
+    if template is None:
+        template = LOAD_DIR / f"template_{args.claims}_{args.seed}.db"
+        if not template.exists():
+            print(f"⏳ Generating {args.claims} claims into {template} ...")
+            write_database(template, args.claims, args.seed)
+
+    levels, breaking = [], None
+    for sessions in [int(n) for n in args.sessions.split(",")]:
+        print(f"⏳ {sessions} sessions × {args.actions} actions ...")
+        level = run_level(template, sessions, args.actions, args.write_ratio, args.think_ms, args.seed)
+        failed = fell_over(level, args.max_p95_ms, args.max_error_rate)
+        print_level(level, failed)
+        levels.append(level)
+        if failed and breaking is None:
+            breaking = sessions
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"template": str(template), "levels": levels}, indent=2))
+        print(f"✅ Report written to {args.output}")
+    if breaking is not None:
+        print(f"❌ Falls over at {breaking} sessions (p95 > {args.max_p95_ms:.0f} ms or "
+              f"error rate > {args.max_error_rate:.0%})")
+        return 1
+    print("🎯 Every session count stayed within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
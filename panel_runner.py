@@ -0,0 +1,90 @@
+# Runs a page's independent panel queries concurrently. Every panel gets a placeholder up
+# front; its query goes to a shared thread pool on a read-only pooled connection, and the
+# panel is drawn (on the script thread, as Streamlit requires) as soon as its result
+# arrives. A page then takes as long as its slowest panel instead of the sum of all.
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable
+
+import pandas as pd
+
+import db
+import query_log
+
+PANEL_TIMEOUT_SECONDS = 10.0
+# Time allowed beyond a panel's timeout for waiting on a free connection
+QUEUE_GRACE_SECONDS = 5.0
+
+# Shared by all sessions; more workers than pooled connections would only queue
+_executor = ThreadPoolExecutor(max_workers=db.POOL_SIZE, thread_name_prefix="panel")
+
+
+@dataclass
+class Panel:
+    title: str
+    sql: str
+    # Draws the result DataFrame; called only when it is non-empty
+    render: Callable
+    params: tuple = ()
+    # Table the query needs; the panel shows `empty` until it exists
+    requires: str = None
+    empty: str = "No data."
+    timeout: float = PANEL_TIMEOUT_SECONDS
+
+
+def submit(panel):
+    """Start panel's query in the pool, labelled with its title in the query log."""
+    context = contextvars.copy_context()
+    context.run(query_log.set_section, panel.title)
+    return _executor.submit(context.run, db.run_query, panel.sql, panel.params,
+                            read_only=True, timeout=panel.timeout)
+
+
+def run_panels(panels):
+    """Render panels in order, filling each in as its query finishes. Returns {title: DataFrame or error}."""
+    import streamlit as st
+
+    slots, pending, outcomes = {}, {}, {}
+    started = time.monotonic()
+    for panel in panels:
+        st.subheader(panel.title)
+        slots[panel.title] = st.empty()
+        if panel.requires and not db.table_exists(panel.requires):
+            outcomes[panel.title] = pd.DataFrame()
+            _draw(slots[panel.title], panel, outcomes[panel.title])
+            continue
+        slots[panel.title].caption("⏳ Loading…")
+        pending[submit(panel)] = panel
+
+    while pending:
+        deadline = min(started + p.timeout + QUEUE_GRACE_SECONDS for p in pending.values())
+        done, _ = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+        for future in done:
+            panel = pending.pop(future)
+            try:
+                outcomes[panel.title] = future.result()
+            except Exception as e:  # sqlite3 errors, including the timeout's "interrupted"
+                outcomes[panel.title] = e
+            _draw(slots[panel.title], panel, outcomes[panel.title])
+        if not done:
+            # Still queued for a connection well past its timeout: give up on the slowest
+            for future, panel in list(pending.items()):
+                if started + panel.timeout + QUEUE_GRACE_SECONDS <= time.monotonic():
+                    pending.pop(future)
+                    outcomes[panel.title] = TimeoutError(f"no result after {panel.timeout:.0f}s")
+                    _draw(slots[panel.title], panel, outcomes[panel.title])
+    return outcomes
+
+
+def _draw(slot, panel, outcome):
+    with slot.container():
+        if isinstance(outcome, Exception):
+            import streamlit as st
+            st.warning(f"⚠️ {panel.title} is unavailable right now ({outcome}).")
+        elif outcome.empty:
+            import streamlit as st
+            st.info(panel.empty)
+        else:
+            panel.render(outcome)
@@ -0,0 +1,492 @@
+# Optional region-partitioned storage. Providers, their listings and the claims on those
+# listings are split into one SQLite file per region (cities hashed into N buckets, or an
+# explicit city -> region mapping); receivers, who claim across cities, are in global.db.
+#
+# Shards and global.db are read replicas. The source database stays the only system of
+# record and takes every write, so partitioning spreads reads, not write contention: writers
+# still queue on the source file (WAL, one writer at a time). Building the partitions installs
+# a change log on the source (schema.row_changes: the key of every row written), and
+# sync_shards() copies just the logged rows into each replica. It runs on a background thread
+# (the app starts one; `sync --every N` from the command line), never inside a page render,
+# so a replica may lag the source by up to SYNC_SECONDS.
+#
+# SQLite triggers and foreign keys cannot reach an ATTACHed database, so every shard keeps
+# its own replica of receivers. Each shard otherwise has the full schema (aggregates,
+# claims_enriched, search, versions).
+#
+# Global SQL_QUERIES fan out: the query runs on every shard in a process pool and the
+# partial results are merged by its MergeSpec (sum counts per group, re-sort, re-limit).
+# Region-scoped pages read their city's shard only (shard_path_for / db.run_query(db_path=)).
+#
+#   python partitions.py build --source database/food_wastage.db --regions 8
+#   python partitions.py query claims_per_provider
+#   python partitions.py sync [--every 5]
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import repeat
+from pathlib import Path
+
+from schema import ALL_ROWS, CORE_KEYS, CORE_TABLES, install_change_log, migrate, suspend_triggers, table_columns
+from sql_queries import SQL_QUERIES
+
+BASE_DIR = Path(__file__).resolve().parent
+PARTITIONS_DIR = Path(os.environ.get("FOOD_WASTAGE_PARTITIONS", BASE_DIR / "database" / "regions"))
+MANIFEST_FILE = "partitions.json"
+# In each replica: the last source row_changes Seq it reflects
+SYNC_TABLE = "partition_sync"
+SYNC_SECONDS = float(os.environ.get("FOOD_WASTAGE_PARTITION_SYNC_SECONDS", "5"))
+GLOBAL_DB = "global.db"
+DEFAULT_REGIONS = 8
+MAX_WORKERS = int(os.environ.get("FOOD_WASTAGE_PARTITION_WORKERS", "0")) or os.cpu_count() or 1
+
+LIMIT_PATTERN = re.compile(r"\bLIMIT\s+\d+\s*;?\s*$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class MergeSpec:
+    # Group partial rows by these columns and add up `sum`; no keys = concatenate rows
+    keys: tuple = ()
+    sum: tuple = ()
+    # (column, ascending) re-applied after merging; limit likewise (partials run unlimited)
+    order: tuple = None
+    limit: int = None
+    # "global": the query only reads receivers, so it runs once on global.db
+    scope: str = "shards"
+
+
+MERGE_SPECS = {
+    "total_providers": MergeSpec(sum=("Total",)),
+    "total_receivers": MergeSpec(scope="global"),
+    "total_food_listings": MergeSpec(sum=("Total",)),
+    "total_claims": MergeSpec(sum=("Total",)),
+    # A provider lives in exactly one shard, so its row needs no regrouping
+    "top_5_providers": MergeSpec(order=("total_donations", False), limit=5),
+    "claims_by_status": MergeSpec(keys=("Status",), sum=("Count",)),
+    "available_vs_expired": MergeSpec(keys=("food_status",), sum=("Count",)),
+    "food_listings_by_category": MergeSpec(keys=("Category",), sum=("Count",)),
+    "monthly_claims_trend": MergeSpec(keys=("Month",), sum=("Count",), order=("Month", True)),
+    "providers_by_type": MergeSpec(keys=("Provider_Type",), sum=("Count",)),
+    "receivers_by_type": MergeSpec(scope="global"),
+    "most_claimed_food_items": MergeSpec(keys=("name",), sum=("claim_count",), order=("claim_count", False), limit=5),
+    "claims_per_provider": MergeSpec(keys=("name",), sum=("total_claims",), order=("total_claims", False)),
+    "expiry_next_7_days": MergeSpec(),
+    "unclaimed_food": MergeSpec(),
+}
+
+
+# ---------- Layout ----------
+def _city_key(city):
+    return (city or "").strip().lower()
+
+
+def region_of(city, regions=DEFAULT_REGIONS, mapping=None):
+    """Region name for city: its mapping entry, else a stable hash bucket."""
+    key = _city_key(city)
+    if mapping and key in mapping:
+        return mapping[key]
+    return f"region_{zlib.crc32(key.encode()) % regions:02d}"
+
+
+def read_manifest(directory=None):
+    try:
+        return json.loads((Path(directory or PARTITIONS_DIR) / MANIFEST_FILE).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def enabled(directory=None):
+    return read_manifest(directory) is not None
+
+
+def global_path(directory=None):
+    return Path(directory or PARTITIONS_DIR) / GLOBAL_DB
+
+
+def shard_paths(directory=None):
+    manifest = read_manifest(directory) or {"shards": []}
+    return [Path(directory or PARTITIONS_DIR) / f"{name}.db" for name in manifest["shards"]]
+
+
+def shard_path_for(city, directory=None):
+    """The shard holding city's providers and listings, or None if not partitioned or that
+    shard was never built (a city no provider or listing had at build time)."""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    region = region_of(city, manifest["regions"], manifest["mapping"])
+    path = Path(directory or PARTITIONS_DIR) / f"{region}.db"
+    return path if path.exists() else None
+
+
+# ---------- Build ----------
+def _copy(conn, table, where, params=()):
+    columns = ", ".join(f"t.{c}" for c in table_columns(conn, table))
+    conn.execute(f"INSERT INTO main.{table} SELECT {columns} FROM src.{table} t {where};", params)
+
+
+def _open_for_build(path, source):
+    for suffix in ("", "-wal", "-shm"):
+        Path(str(path) + suffix).unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    migrate(conn)
+    conn.execute("ATTACH DATABASE ? AS src;", (str(source),))
+    return conn
+
+
+# Which source rows a shard holds, per table in copy order: (table, join, condition over
+# src.<table> t). A "?" takes the shard's region; claims follow the listings already in main.
+SHARD_ROWS = [
+    ("receivers", "", "true"),
+    ("providers", "", "region_of(t.City) = ?"),
+    # A listing goes with its provider (keeps the foreign key local), else its Location
+    ("food_listings", "LEFT JOIN src.providers p ON p.Provider_ID = t.Provider_ID",
+     "region_of(COALESCE(p.City, t.Location)) = ?"),
+    ("claims", "", """
+        t.Food_ID IN (SELECT Food_ID FROM main.food_listings)
+        OR (region_of(NULL) = ? AND NOT EXISTS (SELECT 1 FROM src.food_listings f WHERE f.Food_ID = t.Food_ID))
+    """),
+]
+# global.db replicates receivers only
+GLOBAL_ROWS = SHARD_ROWS[:1]
+
+
+def _params(condition, region):
+    return (region,) * condition.count("?")
+
+
+def build_shard(source, directory, region, regions, mapping):
+    """Write one region's shard from the source database. Returns its row counts."""
+    path = Path(directory) / f"{region}.db"
+    conn = _open_for_build(path, source)
+    conn.create_function("region_of", 1, lambda city: region_of(city, regions, mapping), deterministic=True)
+    try:
+        with conn:
+            # Row-by-row triggers would dominate the copy; rebuild derived tables once instead
+            with suspend_triggers(conn):
+                for table, join, condition in SHARD_ROWS:
+                    _copy(conn, table, f"{join} WHERE {condition}", _params(condition, region))
+                _record_sync(conn)
+        conn.execute("DETACH DATABASE src;")
+        conn.execute("ANALYZE;")
+        return {t: conn.execute(f"SELECT COUNT(*) FROM {t};").fetchone()[0] for t in CORE_TABLES}
+    finally:
+        conn.close()
+
+
+def build_global(source, directory):
+    conn = _open_for_build(Path(directory) / GLOBAL_DB, source)
+    try:
+        with conn:
+            with suspend_triggers(conn):
+                _copy(conn, "receivers", "")
+                _record_sync(conn)
+        conn.execute("DETACH DATABASE src;")
+    finally:
+        conn.close()
+
+
+def build_partitions(source, directory=None, regions=DEFAULT_REGIONS, mapping=None):
+    """Split source into global.db plus one shard per region, shards built in parallel.
+    Returns {region: row counts}."""
+    directory = Path(directory or PARTITIONS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    mapping = {_city_key(city): re.sub(r"\W+", "_", region).lower() for city, region in (mapping or {}).items()}
+    conn = sqlite3.connect(source)
+    try:
+        migrate(conn)
+        with conn:
+            # Before any replica is copied, so each records where in the log it starts
+            install_change_log(conn)
+        cities = [c for (c,) in conn.execute("""
+            SELECT City FROM providers UNION SELECT Location FROM food_listings UNION SELECT NULL;
+        """)]
+    finally:
+        conn.close()
+    names = sorted({region_of(city, regions, mapping) for city in cities})
+
+    build_global(source, directory)
+    with _new_pool(len(names)) as pool:
+        counts = dict(zip(names, pool.map(build_shard, repeat(str(source)), repeat(str(directory)), names,
+                                          repeat(regions), repeat(mapping))))
+    manifest = {
+        "source": str(source), "regions": regions, "mapping": mapping, "shards": names,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    (directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return counts
+
+
+# ---------- Sync ----------
+def _record_sync(conn):
+    """Remember the last source change the replica now reflects (src must be attached)."""
+    if "Last_Seq" not in table_columns(conn, SYNC_TABLE):
+        # Also replaces the per-table versions older builds recorded
+        conn.execute(f"DROP TABLE IF EXISTS main.{SYNC_TABLE};")
+        conn.execute(f"CREATE TABLE main.{SYNC_TABLE} (Last_Seq INTEGER NOT NULL);")
+    conn.execute(f"DELETE FROM main.{SYNC_TABLE};")
+    conn.execute(f"INSERT INTO main.{SYNC_TABLE} SELECT IFNULL(MAX(Seq), 0) FROM src.row_changes;")
+
+
+def _last_seq(conn):
+    try:
+        row = conn.execute(f"SELECT Last_Seq FROM main.{SYNC_TABLE};").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def _changed_keys(conn, since):
+    """Fill temp.sync_keys with the rows written after change since, plus the rows whose shard
+    follows them: a provider's listings (its City places them) and a listing's claims."""
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS sync_keys (
+            Table_Name TEXT, Row_Key INTEGER, PRIMARY KEY (Table_Name, Row_Key)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute("DELETE FROM temp.sync_keys;")
+    conn.execute("""
+        INSERT OR IGNORE INTO temp.sync_keys
+        SELECT Table_Name, Row_Key FROM src.row_changes WHERE Seq > ? AND Row_Key IS NOT NULL;
+    """, (since,))
+    for child, key, parent, column in (("food_listings", "Food_ID", "providers", "Provider_ID"),
+                                       ("claims", "Claim_ID", "food_listings", "Food_ID")):
+        for schema in ("src", "main"):
+            conn.execute(f"""
+                INSERT OR IGNORE INTO temp.sync_keys
+                SELECT '{child}', {key} FROM {schema}.{child}
+                WHERE {column} IN (SELECT Row_Key FROM temp.sync_keys WHERE Table_Name = '{parent}');
+            """)
+
+
+def _apply(conn, tables, region, since=None):
+    """Upsert the replica's rows that differ from the source and delete the ones gone from it,
+    for every row (since=None) or only those changed after change since. Returns rows changed."""
+    if since is not None:
+        _changed_keys(conn, since)
+
+    def only(table, alias):
+        if since is None:
+            return ""
+        return f" AND {alias}{CORE_KEYS[table]} IN (SELECT Row_Key FROM temp.sync_keys WHERE Table_Name = '{table}')"
+
+    changed = 0
+    for table, join, condition in tables:
+        columns = table_columns(conn, table)
+        key = CORE_KEYS[table]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != key)
+        differs = " OR ".join(f"{c} IS NOT excluded.{c}" for c in columns if c != key)
+        # Upsert, not REPLACE: a replaced parent row would cascade-delete its children
+        changed += conn.execute(f"""
+            INSERT INTO main.{table} ({', '.join(columns)})
+            SELECT {', '.join('t.' + c for c in columns)} FROM src.{table} t {join}
+            WHERE ({condition}){only(table, "t.")}
+            ON CONFLICT({key}) DO UPDATE SET {updates} WHERE {differs};
+        """, _params(condition, region)).rowcount
+    for table, join, condition in reversed(tables):
+        key = CORE_KEYS[table]
+        changed += conn.execute(f"""
+            DELETE FROM main.{table}
+            WHERE {key} NOT IN (SELECT t.{key} FROM src.{table} t {join} WHERE ({condition}){only(table, "t.")})
+            {only(table, "")}
+        """, _params(condition, region)).rowcount
+    return changed
+
+
+def sync_shard(path, source=None, directory=None, force=False, tables=SHARD_ROWS):
+    """Bring one replica in line with the source database, the system of record, by copying
+    the rows its change log names since the replica's last sync (everything after a bulk load,
+    or with force). Returns rows changed; 0 without touching the replica if nothing was logged."""
+    manifest = read_manifest(directory)
+    source = source or manifest["source"]
+    region = Path(path).stem
+    conn = sqlite3.connect(path)
+    conn.create_function("region_of", 1, lambda city: region_of(city, manifest["regions"], manifest["mapping"]),
+                         deterministic=True)
+    changed = 0
+    try:
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute("ATTACH DATABASE ? AS src;", (str(source),))
+        last = None if force else _last_seq(conn)
+        head, first = conn.execute("SELECT IFNULL(MAX(Seq), 0), MIN(Seq) FROM src.row_changes;").fetchone()
+        if last != head:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE;")
+                # A full pass when the log cannot say which rows changed: never synced, the
+                # entries it needs were pruned, or a bulk load wrote with the triggers dropped
+                full = last is None or (first is not None and first > last + 1) or conn.execute(
+                    "SELECT 1 FROM src.row_changes WHERE Seq > ? AND Table_Name = ? LIMIT 1;", (last, ALL_ROWS),
+                ).fetchone() is not None
+                changed = _apply(conn, tables, region, None if full else last)
+                _record_sync(conn)
+        conn.execute("DETACH DATABASE src;")
+    finally:
+        conn.close()
+    return changed
+
+
+def _ensure_change_log(source):
+    conn = sqlite3.connect(source)
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'row_changes';").fetchone():
+            with conn:
+                install_change_log(conn)
+    finally:
+        conn.close()
+
+
+def _prune_change_log(source, paths):
+    """Drop log entries every replica has applied (the newest one stays: it marks the head)."""
+    lasts = []
+    for path in paths:
+        conn = sqlite3.connect(path)
+        try:
+            lasts.append(_last_seq(conn))
+        finally:
+            conn.close()
+    if not lasts or None in lasts:
+        return
+    conn = sqlite3.connect(source)
+    try:
+        if conn.execute("SELECT MIN(Seq) < ? FROM row_changes;", (min(lasts),)).fetchone()[0]:
+            with conn:
+                conn.execute("DELETE FROM row_changes WHERE Seq < ?;", (min(lasts),))
+    finally:
+        conn.close()
+
+
+def sync_shards(source=None, directory=None, force=False):
+    """sync_shard for global.db and every shard, then prune the applied log. Returns rows changed."""
+    source = source or read_manifest(directory)["source"]
+    _ensure_change_log(source)
+    changed = sync_shard(global_path(directory), source, directory, force, tables=GLOBAL_ROWS)
+    # A shard file that is gone is left to the next build (shard_path_for already skips it)
+    shards = [path for path in shard_paths(directory) if path.exists()]
+    changed += sum(sync_shard(path, source, directory, force) for path in shards)
+    _prune_change_log(source, [global_path(directory), *shards])
+    return changed
+
+
+def run_sync_forever(stop, directory=None, every=SYNC_SECONDS):
+    while not stop.is_set():
+        try:
+            changed = sync_shards(directory=directory) if enabled(directory) else 0
+            if changed:
+                print(f"✅ Partition sync: {changed} rows")
+        except sqlite3.Error as e:
+            # Busy source or replica: the next round picks the same changes up
+            print(f"⚠️ Partition sync failed: {e}")
+        stop.wait(every)
+
+
+def start_background(directory=None, every=SYNC_SECONDS):
+    """Start a daemon thread keeping the replicas in sync; returns its stop event."""
+    stop = threading.Event()
+    threading.Thread(target=run_sync_forever, args=(stop, directory, every), name="partition-sync",
+                     daemon=True).start()
+    return stop
+
+
+# ---------- Fan-out ----------
+_pool = None
+
+
+def _new_pool(size):
+    # spawn, not fork: the app's process has pool, sweeper and Streamlit threads running
+    return ProcessPoolExecutor(max_workers=max(1, min(size, MAX_WORKERS)),
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+def process_pool():
+    global _pool
+    if _pool is None:
+        _pool = _new_pool(MAX_WORKERS)
+    return _pool
+
+
+def run_partial(path, sql, params=()):
+    """Run sql read-only on one database file; returns (columns, rows) (picklable)."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        cur = conn.execute(sql, params)
+        return [d[0] for d in cur.description], cur.fetchall()
+    finally:
+        conn.close()
+
+
+def merge(spec, partials):
+    # Imported on first use: the app checks for partitions on every server start
+    import pandas as pd
+
+    frame = pd.concat([pd.DataFrame(rows, columns=columns) for columns, rows in partials], ignore_index=True)
+    if spec.keys:
+        frame = frame.groupby(list(spec.keys), dropna=False, sort=False, as_index=False)[list(spec.sum)].sum()
+    elif spec.sum:
+        frame = frame[list(spec.sum)].sum().to_frame().T
+    if spec.order:
+        column, ascending = spec.order
+        frame = frame.sort_values(column, ascending=ascending, kind="stable")
+    if spec.limit:
+        frame = frame.head(spec.limit)
+    return frame.reset_index(drop=True)
+
+
+def fan_out(name, directory=None):
+    """Run SQL_QUERIES[name] across all shards (or global.db) and merge the partial results."""
+    spec = MERGE_SPECS.get(name, MergeSpec())
+    sql = SQL_QUERIES[name]
+    if spec.scope == "global":
+        return merge(spec, [run_partial(str(global_path(directory)), sql)])
+    if spec.limit:
+        sql = LIMIT_PATTERN.sub(";", sql.rstrip())
+    paths = [str(p) for p in shard_paths(directory)]
+    return merge(spec, list(process_pool().map(run_partial, paths, repeat(sql))))
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Region-partitioned storage: build shards and query across them.")
+    parser.add_argument("--dir", help=f"Partition directory (default: FOOD_WASTAGE_PARTITIONS or {PARTITIONS_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Split a database into region shards")
+    build.add_argument("--source", default=str(BASE_DIR / "database" / "food_wastage.db"))
+    build.add_argument("--regions", type=int, default=DEFAULT_REGIONS, help="Hash buckets for unmapped cities")
+    build.add_argument("--mapping", help="JSON file of {city: region}")
+    query = commands.add_parser("query", help="Fan a SQL_QUERIES entry out across the shards")
+    query.add_argument("name", choices=sorted(SQL_QUERIES))
+    sync = commands.add_parser("sync", help="Copy rows written to the source database into global.db and every shard")
+    sync.add_argument("--every", type=float, help="Keep syncing, this many seconds apart")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "build":
+        mapping = json.loads(Path(args.mapping).read_text()) if args.mapping else None
+        counts = build_partitions(args.source, args.dir, args.regions, mapping)
+        for region, sizes in counts.items():
+            print(f"  {region}: {sizes}")
+        print(f"✅ {len(counts)} shards built in {time.perf_counter() - start:.1f}s")
+    elif args.command == "query":
+        print(fan_out(args.name, args.dir).to_string(index=False))
+        print(f"⏱️ {time.perf_counter() - start:.3f}s")
+    elif args.every:
+        stop = threading.Event()
+        try:
+            run_sync_forever(stop, args.dir, args.every)
+        except KeyboardInterrupt:
+            stop.set()
+    else:
+        print(f"✅ {sync_shards(directory=args.dir)} shard rows synced in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# Result cache for run_query, keyed by SQL text + parameters.
+# Each entry remembers the version of every table it read; exec_query bumps the
+# version of the table it writes, so a cached result can never outlive a change.
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+CACHE_MAX_BYTES = int(float(os.environ.get("FOOD_WASTAGE_CACHE_MB", "64")) * 1024 * 1024)
+
+READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+[\"\[`]?(\w+)", re.IGNORECASE)
+WRITE_TABLE = re.compile(
+    r"^\s*(?:(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"\[`]?(\w+)",
+    re.IGNORECASE,
+)
+
+# Tables whose contents change when another table is written (e.g. via triggers)
+DEPENDENT_TABLES = {}
+
+
+def read_tables(sql):
+    return frozenset(name.lower() for name in READ_TABLES.findall(sql))
+
+
+def cache_key(sql, params):
+    # DATE('now') results change at midnight (UTC, as in SQLite) without any write: key them by day too
+    if "'now'" in sql.lower():
+        return sql, tuple(params), datetime.now(timezone.utc).date().isoformat()
+    return sql, tuple(params)
+
+
+def written_table(sql):
+    match = WRITE_TABLE.match(sql)
+    return match.group(1).lower() if match else None
+
+
+def register_dependency(table, *dependents):
+    """Declare that writing `table` also changes `dependents`."""
+    DEPENDENT_TABLES.setdefault(table.lower(), set()).update(d.lower() for d in dependents)
+
+
+class ResultCache:
+    def __init__(self, db_path, max_bytes=CACHE_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._file_signature = self._signature()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    # ---------- Versions ----------
+    def _signature(self):
+        # Writes from other processes (e.g. data_preparation.py) show up as a changed db/WAL file
+        sig = []
+        for path in (self.db_path, self.db_path.with_name(self.db_path.name + "-wal")):
+            try:
+                st = path.stat()
+                sig.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _check_external_writes(self):
+        signature = self._signature()
+        if signature != self._file_signature:
+            self._file_signature = signature
+            self._clear()
+
+    def version(self, table):
+        return self._versions.get(table, 0)
+
+    def versions(self, tables):
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in sorted(tables))
+
+    def bump(self, table):
+        """Invalidate everything read from table (and tables derived from it)."""
+        with self._lock:
+            pending, seen = [table.lower()], set()
+            while pending:
+                name = pending.pop()
+                if name in seen:
+                    continue
+                seen.add(name)
+                self._versions[name] = self._versions.get(name, 0) + 1
+                pending.extend(DEPENDENT_TABLES.get(name, ()))
+            self._file_signature = self._signature()
+
+    def note_write(self, sql):
+        table = written_table(sql)
+        if table:
+            self.bump(table)
+        else:
+            self.clear()
+
+    # ---------- Entries ----------
+    def get(self, sql, params):
+        key = cache_key(sql, params)
+        with self._lock:
+            self._check_external_writes()
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, tables, versions, size = entry
+                if versions == tuple(self._versions.get(t, 0) for t in tables):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                self._drop(key)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, sql, params, result, versions=None):
+        tables = tuple(sorted(read_tables(sql)))
+        if not tables:
+            return
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        key = cache_key(sql, params)
+        with self._lock:
+            current = tuple(self._versions.get(t, 0) for t in tables)
+            if versions is not None and versions != current:
+                # A write landed while the query ran: the result may already be stale
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (result, tables, current, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[3]
+
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+            self._file_signature = self._signature()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,117 @@
+# In-memory query instrumentation: every run_query / exec_query call lands in a ring
+# buffer (wall time, rows, cache hit/miss, calling page section). Calls slower than
+# FOOD_WASTAGE_SLOW_MS are also appended to the JSONL file in FOOD_WASTAGE_SLOW_LOG.
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+RING_SIZE = int(os.environ.get("FOOD_WASTAGE_QUERY_RING", "5000"))
+SLOW_LOG_PATH = os.environ.get("FOOD_WASTAGE_SLOW_LOG")
+SLOW_MS = float(os.environ.get("FOOD_WASTAGE_SLOW_MS", "250"))
+
+_page = contextvars.ContextVar("query_page", default="")
+_section = contextvars.ContextVar("query_section", default="")
+
+_records = deque(maxlen=RING_SIZE)
+_lock = threading.Lock()
+
+
+def normalize_sql(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+# ---------- Call-site labels ----------
+def set_page(name):
+    _page.set(name)
+    _section.set("")
+
+
+def set_section(name):
+    _section.set(name)
+
+
+def current_section():
+    page, section = _page.get(), _section.get()
+    return f"{page} / {section}" if page and section else page or section
+
+
+@contextmanager
+def section(name):
+    token = _section.set(name)
+    try:
+        yield
+    finally:
+        _section.reset(token)
+
+
+# ---------- Recording ----------
+def record(sql, params, elapsed_ms, rows, cache):
+    """cache is 'hit', 'miss', 'off' (uncached read) or 'write'."""
+    entry = {
+        "ts": time.time(),
+        "sql": normalize_sql(sql),
+        "params": [p if isinstance(p, (int, float, str)) or p is None else str(p) for p in params],
+        "elapsed_ms": round(elapsed_ms, 3),
+        "rows": rows,
+        "cache": cache,
+        "section": current_section(),
+    }
+    with _lock:
+        _records.append(entry)
+        if SLOW_LOG_PATH and elapsed_ms >= SLOW_MS:
+            with open(SLOW_LOG_PATH, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry) + "\n")
+    return entry
+
+
+@contextmanager
+def timed(sql, params, cache):
+    """Record the wrapped call; the body sets outcome['rows'] (and may change 'cache')."""
+    outcome = {"rows": None, "cache": cache}
+    start = time.perf_counter()
+    try:
+        yield outcome
+    finally:
+        record(sql, params, (time.perf_counter() - start) * 1000, outcome["rows"], outcome["cache"])
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def clear():
+    with _lock:
+        _records.clear()
+
+
+# ---------- Reporting ----------
+def query_stats():
+    """Per-statement percentiles over the ring buffer as a DataFrame, slowest p95 first."""
+    import pandas as pd
+
+    frame = pd.DataFrame(records())
+    if frame.empty:
+        return frame
+    grouped = frame.groupby("sql")
+    stats = pd.DataFrame({
+        "calls": grouped.size(),
+        "p50_ms": grouped["elapsed_ms"].quantile(0.5),
+        "p95_ms": grouped["elapsed_ms"].quantile(0.95),
+        "max_ms": grouped["elapsed_ms"].max(),
+        "total_ms": grouped["elapsed_ms"].sum(),
+        "hit_rate": grouped["cache"].apply(lambda c: (c == "hit").mean()),
+        "avg_rows": grouped["rows"].mean(),
+        "sections": grouped["section"].apply(lambda s: ", ".join(sorted(set(s) - {""}))),
+    })
+    return stats.sort_values("p95_ms", ascending=False).round(3).reset_index()
+
+
+def worst_offenders(n=10):
+    """The n slowest individual calls, slowest first."""
+    return sorted(records(), key=lambda r: r["elapsed_ms"], reverse=True)[:n]
@@ -0,0 +1,930 @@
+# Versioned database schema. PRAGMA user_version records the last applied migration.
+import sqlite3
+from contextlib import contextmanager
+from date_utils import register_sqlite_functions
+
+CORE_TABLES = {
+    "providers": """
+        CREATE TABLE providers (
+            Provider_ID INTEGER PRIMARY KEY,
+            Name TEXT,
+            Type TEXT,
+            Address TEXT,
+            City TEXT,
+            Contact TEXT
+        );
+    """,
+    "receivers": """
+        CREATE TABLE receivers (
+            Receiver_ID INTEGER PRIMARY KEY,
+            Name TEXT,
+            Type TEXT,
+            City TEXT,
+            Contact TEXT
+        );
+    """,
+    "food_listings": """
+        CREATE TABLE food_listings (
+            Food_ID INTEGER PRIMARY KEY,
+            Food_Name TEXT,
+            Quantity INTEGER NOT NULL DEFAULT 0 CHECK (Quantity >= 0),
+            Expiry_Date TEXT,
+            Provider_ID INTEGER REFERENCES providers (Provider_ID) ON DELETE CASCADE,
+            Provider_Type TEXT,
+            Location TEXT,
+            Food_Type TEXT,
+            Meal_Type TEXT
+        );
+    """,
+    "claims": """
+        CREATE TABLE claims (
+            Claim_ID INTEGER PRIMARY KEY,
+            Food_ID INTEGER REFERENCES food_listings (Food_ID) ON DELETE CASCADE,
+            Receiver_ID INTEGER REFERENCES receivers (Receiver_ID) ON DELETE CASCADE,
+            Status TEXT,
+            Timestamp TEXT
+        );
+    """,
+}
+
+# The INTEGER PRIMARY KEY is the rowid, so every index below also covers the table's ID
+CORE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_provider ON food_listings (Provider_ID);",
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_expiry ON food_listings (Expiry_Date);",
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_provider_type ON food_listings (Provider_Type);",
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_category ON food_listings (Food_Type);",
+    "CREATE INDEX IF NOT EXISTS idx_claims_food ON claims (Food_ID);",
+    "CREATE INDEX IF NOT EXISTS idx_claims_receiver ON claims (Receiver_ID);",
+    "CREATE INDEX IF NOT EXISTS idx_claims_status ON claims (Status);",
+    "CREATE INDEX IF NOT EXISTS idx_providers_type ON providers (Type);",
+    "CREATE INDEX IF NOT EXISTS idx_receivers_type ON receivers (Type);",
+]
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table});")]
+
+
+def has_primary_key(conn, table):
+    return any(row[5] for row in conn.execute(f"PRAGMA table_info({table});"))
+
+
+# ---------- Quarantine ----------
+def quarantine_table(table):
+    return f"quarantine_{table}"
+
+
+def ensure_quarantine(conn, table, columns):
+    """quarantine_<table>: the rejected rows as text, with where they came from and why."""
+    name = quarantine_table(table)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {quote(name)} (
+            Source_File TEXT NOT NULL,
+            Source_Row INTEGER NOT NULL,
+            Reason TEXT NOT NULL,
+            Quarantined_At TEXT NOT NULL
+        );
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {quote('idx_' + name + '_file')} ON {quote(name)} (Source_File);")
+    known = set(table_columns(conn, name))
+    for column in columns:
+        if column not in known:
+            conn.execute(f"ALTER TABLE {quote(name)} ADD COLUMN {quote(column)} TEXT;")
+
+
+# ---------- Migrations ----------
+def _v1_core_tables(conn):
+    """Typed tables with primary/foreign keys; rebuilds tables created by pandas.to_sql."""
+    for table, ddl in CORE_TABLES.items():
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (table,)
+        ).fetchone()
+        if not exists:
+            conn.execute(ddl)
+            continue
+        if has_primary_key(conn, table):
+            continue
+        legacy = f"legacy_{table}"
+        conn.execute(f"ALTER TABLE {table} RENAME TO {legacy};")
+        conn.execute(ddl)
+        shared = [c for c in table_columns(conn, table) if c in set(table_columns(conn, legacy))]
+        cols = ", ".join(f'"{c}"' for c in shared)
+        conn.execute(f"INSERT OR REPLACE INTO {table} ({cols}) SELECT {cols} FROM {legacy};")
+        conn.execute(f"DROP TABLE {legacy};")
+    for ddl in CORE_INDEXES:
+        conn.execute(ddl)
+
+
+# Migration v2's quarantine entries: Source_File is this label, Source_Row the row's rowid (its ID)
+ISO_DATES_SOURCE = "schema v2 (ISO dates)"
+# Values already in these shapes are left as they are; the others are re-parsed
+ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+ISO_TIMESTAMP_GLOB = f"{ISO_DATE_GLOB} [0-9][0-9]:[0-9][0-9]:[0-9][0-9]"
+
+
+def _rewrite_iso(conn, table, column, parse, shape):
+    """Rewrite column with parse where it is not in the ISO shape. Rows whose non-blank value
+    does not parse are first copied, as they were, to quarantine_<table>. Returns their count."""
+    unparseable = f"{column} NOT GLOB ? AND TRIM({column}) != '' AND {parse}({column}) IS NULL"
+    rejected = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {unparseable};", (shape,)).fetchone()[0]
+    if rejected:
+        columns = table_columns(conn, table)
+        ensure_quarantine(conn, table, columns)
+        cols = ", ".join(quote(c) for c in columns)
+        values = ", ".join(f"CAST({quote(c)} AS TEXT)" for c in columns)
+        conn.execute(f"""
+            INSERT INTO {quote(quarantine_table(table))} (Source_File, Source_Row, Reason, Quarantined_At, {cols})
+            SELECT ?, rowid, ?, datetime('now'), {values} FROM {table} WHERE {unparseable};
+        """, (ISO_DATES_SOURCE, f"unparseable {column}", shape))
+    conn.execute(f"UPDATE {table} SET {column} = {parse}({column}) WHERE {column} NOT GLOB ?;", (shape,))
+    return rejected
+
+
+def _v2_iso_dates(conn):
+    """Rewrite Expiry_Date/Timestamp as ISO-8601 and derive an indexed Claim_Month.
+
+    Values that cannot be parsed become NULL; their rows are kept in quarantine_<table> too.
+    """
+    register_sqlite_functions(conn)
+    rejected = _rewrite_iso(conn, "food_listings", "Expiry_Date", "iso_date", ISO_DATE_GLOB)
+    rejected += _rewrite_iso(conn, "claims", "Timestamp", "iso_timestamp", ISO_TIMESTAMP_GLOB)
+    if rejected:
+        print(f"⚠️ {rejected} unparseable dates set to NULL; the rows as they were are in "
+              f"quarantine_food_listings / quarantine_claims (Source_File '{ISO_DATES_SOURCE}')")
+    # Virtual generated column: always consistent with Timestamp, costs no storage
+    conn.execute("ALTER TABLE claims ADD COLUMN Claim_Month TEXT GENERATED ALWAYS AS (substr(Timestamp, 1, 7)) VIRTUAL;")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_claims_month ON claims (Claim_Month);")
+
+
+# ---------- Aggregates ----------
+# Summary tables kept current by triggers so the dashboard reads O(result) rows.
+# Missing keys are folded into 'Unknown' (text) or '' (expiry, which sorts as expired).
+AGGREGATE_TABLES = """
+    CREATE TABLE IF NOT EXISTS agg_table_counts (
+        Table_Name TEXT PRIMARY KEY,
+        Row_Count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS agg_provider_stats (
+        Provider_ID INTEGER PRIMARY KEY,
+        Donations INTEGER NOT NULL DEFAULT 0,
+        Claims INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS agg_food_claims (
+        Food_Name TEXT PRIMARY KEY,
+        Claim_Count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS agg_claim_status (
+        Status TEXT PRIMARY KEY,
+        Claim_Count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS agg_listing_expiry (
+        Provider_Type TEXT NOT NULL,
+        Expiry_Date TEXT NOT NULL,
+        Listing_Count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (Provider_Type, Expiry_Date)
+    );
+    CREATE INDEX IF NOT EXISTS idx_agg_provider_donations ON agg_provider_stats (Donations);
+    CREATE INDEX IF NOT EXISTS idx_agg_provider_claims ON agg_provider_stats (Claims);
+    CREATE INDEX IF NOT EXISTS idx_agg_food_claims_count ON agg_food_claims (Claim_Count);
+    CREATE INDEX IF NOT EXISTS idx_agg_listing_expiry_date ON agg_listing_expiry (Expiry_Date);
+"""
+
+# Writes to a core table also change these tables (used for cache invalidation)
+DERIVED_TABLES = {
+    "providers": ["agg_table_counts", "agg_provider_stats", "provider_search", "food_search", "table_versions"],
+    "receivers": ["agg_table_counts", "claims_enriched", "table_versions"],
+    "food_listings": ["agg_table_counts", "agg_provider_stats", "agg_food_claims", "agg_listing_expiry", "food_search",
+                      "claims_enriched", "agg_expiry_status", "agg_listing_claim_state", "table_versions"],
+    "claims": ["agg_table_counts", "agg_provider_stats", "agg_food_claims", "agg_claim_status", "claims_enriched",
+               "agg_listing_claim_state", "table_versions"],
+    "claims_enriched": ["agg_food_claim_status"],
+}
+
+
+def _count_delta(table, sign):
+    return f"UPDATE agg_table_counts SET Row_Count = Row_Count {sign} 1 WHERE Table_Name = '{table}';"
+
+
+def _listing_effect(ref, sign):
+    """Statements adding (sign '+') or removing ('-') the listing `ref` (NEW/OLD) from the aggregates."""
+    claims = f"(SELECT COUNT(*) FROM claims WHERE Food_ID = {ref}.Food_ID)"
+    if sign == "+":
+        return f"""
+            INSERT INTO agg_provider_stats (Provider_ID, Donations, Claims)
+            SELECT {ref}.Provider_ID, 1, {claims} WHERE {ref}.Provider_ID IS NOT NULL
+            ON CONFLICT(Provider_ID) DO UPDATE SET
+                Donations = Donations + 1, Claims = Claims + excluded.Claims;
+            INSERT INTO agg_food_claims (Food_Name, Claim_Count)
+            SELECT IFNULL({ref}.Food_Name, 'Unknown'), n FROM (SELECT {claims} AS n) WHERE n > 0
+            ON CONFLICT(Food_Name) DO UPDATE SET Claim_Count = Claim_Count + excluded.Claim_Count;
+            INSERT INTO agg_listing_expiry (Provider_Type, Expiry_Date, Listing_Count)
+            VALUES (IFNULL({ref}.Provider_Type, 'Unknown'), IFNULL({ref}.Expiry_Date, ''), 1)
+            ON CONFLICT(Provider_Type, Expiry_Date) DO UPDATE SET Listing_Count = Listing_Count + 1;
+        """
+    return f"""
+        UPDATE agg_provider_stats SET Donations = Donations - 1, Claims = Claims - {claims}
+        WHERE Provider_ID = {ref}.Provider_ID;
+        UPDATE agg_food_claims SET Claim_Count = Claim_Count - {claims}
+        WHERE Food_Name = IFNULL({ref}.Food_Name, 'Unknown');
+        UPDATE agg_listing_expiry SET Listing_Count = Listing_Count - 1
+        WHERE Provider_Type = IFNULL({ref}.Provider_Type, 'Unknown') AND Expiry_Date = IFNULL({ref}.Expiry_Date, '');
+    """
+
+
+def _claim_effect(ref, sign):
+    """Statements adding or removing the claim `ref`. A claim whose listing is gone counts
+    only towards the status totals, matching what the old JOIN queries returned."""
+    if sign == "+":
+        return f"""
+            INSERT INTO agg_claim_status (Status, Claim_Count) VALUES (IFNULL({ref}.Status, 'Unknown'), 1)
+            ON CONFLICT(Status) DO UPDATE SET Claim_Count = Claim_Count + 1;
+            INSERT INTO agg_provider_stats (Provider_ID, Donations, Claims)
+            SELECT Provider_ID, 0, 1 FROM food_listings
+            WHERE Food_ID = {ref}.Food_ID AND Provider_ID IS NOT NULL
+            ON CONFLICT(Provider_ID) DO UPDATE SET Claims = Claims + 1;
+            INSERT INTO agg_food_claims (Food_Name, Claim_Count)
+            SELECT IFNULL(Food_Name, 'Unknown'), 1 FROM food_listings WHERE Food_ID = {ref}.Food_ID
+            ON CONFLICT(Food_Name) DO UPDATE SET Claim_Count = Claim_Count + 1;
+        """
+    return f"""
+        UPDATE agg_claim_status SET Claim_Count = Claim_Count - 1 WHERE Status = IFNULL({ref}.Status, 'Unknown');
+        UPDATE agg_provider_stats SET Claims = Claims - 1
+        WHERE Provider_ID = (SELECT Provider_ID FROM food_listings WHERE Food_ID = {ref}.Food_ID);
+        UPDATE agg_food_claims SET Claim_Count = Claim_Count - 1
+        WHERE Food_Name = (SELECT IFNULL(Food_Name, 'Unknown') FROM food_listings WHERE Food_ID = {ref}.Food_ID);
+    """
+
+
+def aggregate_triggers():
+    listing_changed = " OR ".join(
+        f"OLD.{c} IS NOT NEW.{c}" for c in ("Food_ID", "Food_Name", "Provider_ID", "Provider_Type", "Expiry_Date")
+    )
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_providers_agg_insert AFTER INSERT ON providers BEGIN
+            {_count_delta("providers", "+")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_providers_agg_delete AFTER DELETE ON providers BEGIN
+            {_count_delta("providers", "-")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_receivers_agg_insert AFTER INSERT ON receivers BEGIN
+            {_count_delta("receivers", "+")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_receivers_agg_delete AFTER DELETE ON receivers BEGIN
+            {_count_delta("receivers", "-")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_agg_insert AFTER INSERT ON food_listings BEGIN
+            {_count_delta("food_listings", "+")}
+            {_listing_effect("NEW", "+")}
+        END;
+        -- BEFORE: cascaded claim deletes run after this and no longer find the listing
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_agg_delete BEFORE DELETE ON food_listings BEGIN
+            {_count_delta("food_listings", "-")}
+            {_listing_effect("OLD", "-")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_agg_update AFTER UPDATE ON food_listings
+        WHEN {listing_changed} BEGIN
+            {_listing_effect("OLD", "-")}
+            {_listing_effect("NEW", "+")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_claims_agg_insert AFTER INSERT ON claims BEGIN
+            {_count_delta("claims", "+")}
+            {_claim_effect("NEW", "+")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_agg_delete AFTER DELETE ON claims BEGIN
+            {_count_delta("claims", "-")}
+            {_claim_effect("OLD", "-")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_agg_update AFTER UPDATE ON claims
+        WHEN OLD.Food_ID IS NOT NEW.Food_ID OR OLD.Status IS NOT NEW.Status BEGIN
+            {_claim_effect("OLD", "-")}
+            {_claim_effect("NEW", "+")}
+        END;
+    """
+
+
+def rebuild_aggregates(conn):
+    """Recompute every aggregate table from the core tables."""
+    for table in ("agg_table_counts", "agg_provider_stats", "agg_food_claims", "agg_claim_status", "agg_listing_expiry"):
+        conn.execute(f"DELETE FROM {table};")
+    for table in CORE_TABLES:
+        conn.execute(f"INSERT INTO agg_table_counts (Table_Name, Row_Count) SELECT '{table}', COUNT(*) FROM {table};")
+    conn.execute("""
+        INSERT INTO agg_provider_stats (Provider_ID, Donations, Claims)
+        SELECT f.Provider_ID, COUNT(*), SUM((SELECT COUNT(*) FROM claims c WHERE c.Food_ID = f.Food_ID))
+        FROM food_listings f
+        WHERE f.Provider_ID IS NOT NULL
+        GROUP BY f.Provider_ID;
+    """)
+    conn.execute("""
+        INSERT INTO agg_food_claims (Food_Name, Claim_Count)
+        SELECT IFNULL(f.Food_Name, 'Unknown'), COUNT(*)
+        FROM claims c JOIN food_listings f ON f.Food_ID = c.Food_ID
+        GROUP BY IFNULL(f.Food_Name, 'Unknown');
+    """)
+    conn.execute("""
+        INSERT INTO agg_claim_status (Status, Claim_Count)
+        SELECT IFNULL(Status, 'Unknown'), COUNT(*) FROM claims GROUP BY IFNULL(Status, 'Unknown');
+    """)
+    conn.execute("""
+        INSERT INTO agg_listing_expiry (Provider_Type, Expiry_Date, Listing_Count)
+        SELECT IFNULL(Provider_Type, 'Unknown'), IFNULL(Expiry_Date, ''), COUNT(*)
+        FROM food_listings
+        GROUP BY IFNULL(Provider_Type, 'Unknown'), IFNULL(Expiry_Date, '');
+    """)
+
+
+def rebuild_derived(conn):
+    """Recompute every trigger-maintained structure from the core tables."""
+    rebuild_aggregates(conn)
+    rebuild_search(conn)
+    rebuild_enriched(conn)
+    rebuild_expiry_status(conn)
+    rebuild_claim_state(conn)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'table_versions';").fetchone():
+        # Bulk loads run with the version triggers dropped: count them as a change to everything
+        bump_versions(conn)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'row_changes';").fetchone():
+        log_all_rows(conn)
+
+
+@contextmanager
+def suspend_triggers(conn):
+    """Drop all triggers for a bulk load, then restore them and rebuild what they maintain.
+    Must run inside the caller's transaction so other connections never see them missing."""
+    if not conn.in_transaction:
+        conn.execute("BEGIN;")
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger';").fetchall()
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name};")
+    yield
+    # Rebuild before the triggers return so the rebuild's own writes do not fire them
+    rebuild_derived(conn)
+    for _, sql in triggers:
+        conn.execute(sql)
+
+
+def execute_script(conn, script):
+    """Run a multi-statement script inside the caller's transaction (unlike executescript)."""
+    for statement in split_statements(script):
+        conn.execute(statement)
+
+
+def split_statements(script):
+    statements, buffer = [], ""
+    for line in script.splitlines(keepends=True):
+        if line.strip().startswith("--"):
+            continue
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def _v3_aggregates(conn):
+    execute_script(conn, AGGREGATE_TABLES)
+    execute_script(conn, aggregate_triggers())
+    rebuild_aggregates(conn)
+
+
+def _v4_filter_indexes(conn):
+    """Indexes for the paginated table views' City/Type filters (keyset order is the rowid)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_providers_city ON providers (City);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_receivers_city ON receivers (City);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_food_listings_location ON food_listings (Location);")
+
+
+# ---------- Full-text search ----------
+# rowid is Food_ID / Provider_ID; triggers keep both indexes in step with every write
+SEARCH_TABLES = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS food_search USING fts5(
+        Food_Name, Location, Provider_Name, tokenize = 'unicode61', prefix = '1 2 3'
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS provider_search USING fts5(
+        Name, City, Type, tokenize = 'unicode61', prefix = '1 2 3'
+    );
+"""
+
+SEARCH_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS trg_food_listings_search_insert AFTER INSERT ON food_listings BEGIN
+        INSERT INTO food_search (rowid, Food_Name, Location, Provider_Name)
+        VALUES (NEW.Food_ID, NEW.Food_Name, NEW.Location,
+                (SELECT Name FROM providers WHERE Provider_ID = NEW.Provider_ID));
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_food_listings_search_delete AFTER DELETE ON food_listings BEGIN
+        DELETE FROM food_search WHERE rowid = OLD.Food_ID;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_food_listings_search_update AFTER UPDATE ON food_listings
+    WHEN OLD.Food_ID IS NOT NEW.Food_ID OR OLD.Food_Name IS NOT NEW.Food_Name
+      OR OLD.Location IS NOT NEW.Location OR OLD.Provider_ID IS NOT NEW.Provider_ID BEGIN
+        DELETE FROM food_search WHERE rowid = OLD.Food_ID;
+        INSERT INTO food_search (rowid, Food_Name, Location, Provider_Name)
+        VALUES (NEW.Food_ID, NEW.Food_Name, NEW.Location,
+                (SELECT Name FROM providers WHERE Provider_ID = NEW.Provider_ID));
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_providers_search_insert AFTER INSERT ON providers BEGIN
+        INSERT INTO provider_search (rowid, Name, City, Type) VALUES (NEW.Provider_ID, NEW.Name, NEW.City, NEW.Type);
+        UPDATE food_search SET Provider_Name = NEW.Name
+        WHERE rowid IN (SELECT Food_ID FROM food_listings WHERE Provider_ID = NEW.Provider_ID);
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_providers_search_delete AFTER DELETE ON providers BEGIN
+        DELETE FROM provider_search WHERE rowid = OLD.Provider_ID;
+        UPDATE food_search SET Provider_Name = NULL
+        WHERE rowid IN (SELECT Food_ID FROM food_listings WHERE Provider_ID = OLD.Provider_ID);
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_providers_search_update AFTER UPDATE ON providers
+    WHEN OLD.Provider_ID IS NOT NEW.Provider_ID OR OLD.Name IS NOT NEW.Name
+      OR OLD.City IS NOT NEW.City OR OLD.Type IS NOT NEW.Type BEGIN
+        DELETE FROM provider_search WHERE rowid = OLD.Provider_ID;
+        INSERT INTO provider_search (rowid, Name, City, Type) VALUES (NEW.Provider_ID, NEW.Name, NEW.City, NEW.Type);
+        UPDATE food_search SET Provider_Name = NEW.Name
+        WHERE rowid IN (SELECT Food_ID FROM food_listings WHERE Provider_ID = NEW.Provider_ID);
+    END;
+"""
+
+
+def rebuild_search(conn):
+    conn.execute("DELETE FROM food_search;")
+    conn.execute("""
+        INSERT INTO food_search (rowid, Food_Name, Location, Provider_Name)
+        SELECT f.Food_ID, f.Food_Name, f.Location, p.Name
+        FROM food_listings f LEFT JOIN providers p ON p.Provider_ID = f.Provider_ID;
+    """)
+    conn.execute("DELETE FROM provider_search;")
+    conn.execute("INSERT INTO provider_search (rowid, Name, City, Type) SELECT Provider_ID, Name, City, Type FROM providers;")
+
+
+def _v5_search(conn):
+    execute_script(conn, SEARCH_TABLES)
+    execute_script(conn, SEARCH_TRIGGERS)
+    rebuild_search(conn)
+
+
+# ---------- Denormalised claims ----------
+# claims joined to their listing and receiver, kept row-for-row in step with all three
+# tables so pages read pre-joined rows; agg_food_claim_status is fed from it in turn.
+ENRICHED_FOOD_COLUMNS = ("Food_Name", "Quantity", "Expiry_Date", "Location", "Food_Type", "Meal_Type",
+                         "Provider_ID", "Provider_Type")
+ENRICHED_RECEIVER_COLUMNS = {"Receiver_Name": "Name", "Receiver_Type": "Type", "Receiver_City": "City"}
+
+ENRICHED_TABLES = """
+    CREATE TABLE IF NOT EXISTS claims_enriched (
+        Claim_ID INTEGER PRIMARY KEY,
+        Food_ID INTEGER,
+        Receiver_ID INTEGER,
+        Status TEXT,
+        Timestamp TEXT,
+        Food_Name TEXT,
+        Quantity INTEGER,
+        Expiry_Date TEXT,
+        Location TEXT,
+        Food_Type TEXT,
+        Meal_Type TEXT,
+        Provider_ID INTEGER,
+        Provider_Type TEXT,
+        Receiver_Name TEXT,
+        Receiver_Type TEXT,
+        Receiver_City TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_claims_enriched_food ON claims_enriched (Food_ID);
+    CREATE INDEX IF NOT EXISTS idx_claims_enriched_receiver ON claims_enriched (Receiver_ID);
+    CREATE INDEX IF NOT EXISTS idx_claims_enriched_status ON claims_enriched (Status);
+    CREATE INDEX IF NOT EXISTS idx_claims_enriched_timestamp ON claims_enriched (Timestamp);
+    CREATE TABLE IF NOT EXISTS agg_food_claim_status (
+        Food_Name TEXT NOT NULL,
+        Status TEXT NOT NULL,
+        Claim_Count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (Food_Name, Status)
+    );
+"""
+
+
+def _enriched_select(ref):
+    """SELECT producing the claims_enriched row for claim `ref` (NEW/OLD or a table alias)."""
+    food = ", ".join(f"f.{c}" for c in ENRICHED_FOOD_COLUMNS)
+    receiver = ", ".join(f"r.{c} AS {alias}" for alias, c in ENRICHED_RECEIVER_COLUMNS.items())
+    source = "(SELECT 1)" if ref in ("NEW", "OLD") else f"claims {ref}"
+    return f"""
+        SELECT {ref}.Claim_ID, {ref}.Food_ID, {ref}.Receiver_ID, {ref}.Status, {ref}.Timestamp, {food}, {receiver}
+        FROM {source}
+        LEFT JOIN food_listings f ON f.Food_ID = {ref}.Food_ID
+        LEFT JOIN receivers r ON r.Receiver_ID = {ref}.Receiver_ID
+    """
+
+
+def _enriched_insert(ref):
+    columns = ("Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp",
+               *ENRICHED_FOOD_COLUMNS, *ENRICHED_RECEIVER_COLUMNS)
+    return f"INSERT OR REPLACE INTO claims_enriched ({', '.join(columns)}) {_enriched_select(ref)};"
+
+
+def _set_columns(ref, columns):
+    """'A = NEW.A, ...' with ref None meaning NULL."""
+    return ", ".join(f"{alias} = {f'{ref}.{c}' if ref else 'NULL'}" for alias, c in columns)
+
+
+def _food_status_delta(ref, sign):
+    name, status = f"IFNULL({ref}.Food_Name, 'Unknown')", f"IFNULL({ref}.Status, 'Unknown')"
+    if sign == "+":
+        return f"""
+            INSERT INTO agg_food_claim_status (Food_Name, Status, Claim_Count) VALUES ({name}, {status}, 1)
+            ON CONFLICT(Food_Name, Status) DO UPDATE SET Claim_Count = Claim_Count + 1;
+        """
+    return f"""
+        UPDATE agg_food_claim_status SET Claim_Count = Claim_Count - 1
+        WHERE Food_Name = {name} AND Status = {status};
+    """
+
+
+def enriched_triggers():
+    food = [(c, c) for c in ENRICHED_FOOD_COLUMNS]
+    receiver = list(ENRICHED_RECEIVER_COLUMNS.items())
+    claim_changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}"
+                                for c in ("Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"))
+    food_changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in ("Food_ID", *ENRICHED_FOOD_COLUMNS))
+    receiver_changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in ("Receiver_ID", "Name", "Type", "City"))
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_claims_enriched_insert AFTER INSERT ON claims BEGIN
+            {_enriched_insert("NEW")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_enriched_delete AFTER DELETE ON claims BEGIN
+            DELETE FROM claims_enriched WHERE Claim_ID = OLD.Claim_ID;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_enriched_update AFTER UPDATE ON claims
+        WHEN {claim_changed} BEGIN
+            DELETE FROM claims_enriched WHERE Claim_ID = OLD.Claim_ID;
+            {_enriched_insert("NEW")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_enriched_insert AFTER INSERT ON food_listings BEGIN
+            UPDATE claims_enriched SET {_set_columns("NEW", food)} WHERE Food_ID = NEW.Food_ID;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_enriched_delete AFTER DELETE ON food_listings BEGIN
+            UPDATE claims_enriched SET {_set_columns(None, food)} WHERE Food_ID = OLD.Food_ID;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_enriched_update AFTER UPDATE ON food_listings
+        WHEN {food_changed} BEGIN
+            UPDATE claims_enriched SET {_set_columns(None, food)} WHERE Food_ID = OLD.Food_ID;
+            UPDATE claims_enriched SET {_set_columns("NEW", food)} WHERE Food_ID = NEW.Food_ID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_receivers_enriched_insert AFTER INSERT ON receivers BEGIN
+            UPDATE claims_enriched SET {_set_columns("NEW", receiver)} WHERE Receiver_ID = NEW.Receiver_ID;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_receivers_enriched_delete AFTER DELETE ON receivers BEGIN
+            UPDATE claims_enriched SET {_set_columns(None, receiver)} WHERE Receiver_ID = OLD.Receiver_ID;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_receivers_enriched_update AFTER UPDATE ON receivers
+        WHEN {receiver_changed} BEGIN
+            UPDATE claims_enriched SET {_set_columns(None, receiver)} WHERE Receiver_ID = OLD.Receiver_ID;
+            UPDATE claims_enriched SET {_set_columns("NEW", receiver)} WHERE Receiver_ID = NEW.Receiver_ID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_claims_enriched_agg_insert AFTER INSERT ON claims_enriched BEGIN
+            {_food_status_delta("NEW", "+")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_enriched_agg_delete AFTER DELETE ON claims_enriched BEGIN
+            {_food_status_delta("OLD", "-")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_enriched_agg_update AFTER UPDATE ON claims_enriched
+        WHEN OLD.Food_Name IS NOT NEW.Food_Name OR OLD.Status IS NOT NEW.Status BEGIN
+            {_food_status_delta("OLD", "-")}
+            {_food_status_delta("NEW", "+")}
+        END;
+    """
+
+
+def rebuild_enriched(conn):
+    conn.execute("DELETE FROM claims_enriched;")
+    conn.execute(_enriched_insert("c").replace("INSERT OR REPLACE", "INSERT"))
+    conn.execute("DELETE FROM agg_food_claim_status;")
+    conn.execute("""
+        INSERT INTO agg_food_claim_status (Food_Name, Status, Claim_Count)
+        SELECT IFNULL(Food_Name, 'Unknown'), IFNULL(Status, 'Unknown'), COUNT(*)
+        FROM claims_enriched
+        GROUP BY IFNULL(Food_Name, 'Unknown'), IFNULL(Status, 'Unknown');
+    """)
+
+
+def _v6_claims_enriched(conn):
+    execute_script(conn, ENRICHED_TABLES)
+    # Triggers after the rebuild: the bulk INSERT must not also count itself into the aggregate
+    rebuild_enriched(conn)
+    execute_script(conn, enriched_triggers())
+
+
+# ---------- Expiry status ----------
+# food_listings.Expiry_Status is Available / Expiring (within EXPIRING_DAYS) / Expired.
+# Writes set it through a trigger; expiry_sweeper.py flips it as days pass. Named
+# Expiry_Status so it never collides with claims.Status in joins.
+EXPIRING_DAYS = 7
+
+EXPIRY_STATUS_TABLES = """
+    CREATE INDEX IF NOT EXISTS idx_food_listings_expiry_status ON food_listings (Expiry_Status, Expiry_Date);
+    CREATE TABLE IF NOT EXISTS agg_expiry_status (
+        Provider_Type TEXT NOT NULL,
+        Expiry_Status TEXT NOT NULL,
+        Listing_Count INTEGER NOT NULL DEFAULT 0,
+        Quantity INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (Provider_Type, Expiry_Status)
+    );
+"""
+
+
+def expiry_status_sql(column, today="DATE('now')"):
+    """SQL CASE giving the Expiry_Status of an ISO date column as of `today` (SQL expression)."""
+    return f"""CASE
+        WHEN {column} IS NULL OR {column} = '' THEN 'Available'
+        WHEN {column} < {today} THEN 'Expired'
+        WHEN {column} <= DATE({today}, '+{EXPIRING_DAYS} day') THEN 'Expiring'
+        ELSE 'Available' END"""
+
+
+def _expiry_status_delta(ref, sign):
+    ptype = f"IFNULL({ref}.Provider_Type, 'Unknown')"
+    quantity = f"IFNULL({ref}.Quantity, 0)"
+    if sign == "+":
+        return f"""
+            INSERT INTO agg_expiry_status (Provider_Type, Expiry_Status, Listing_Count, Quantity)
+            VALUES ({ptype}, {ref}.Expiry_Status, 1, {quantity})
+            ON CONFLICT(Provider_Type, Expiry_Status) DO UPDATE SET
+                Listing_Count = Listing_Count + 1, Quantity = Quantity + excluded.Quantity;
+        """
+    return f"""
+        UPDATE agg_expiry_status SET Listing_Count = Listing_Count - 1, Quantity = Quantity - {quantity}
+        WHERE Provider_Type = {ptype} AND Expiry_Status = {ref}.Expiry_Status;
+    """
+
+
+def expiry_status_triggers():
+    return f"""
+        -- Count the row under its inserted status first: the UPDATE then moves it via status_agg
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_status_insert AFTER INSERT ON food_listings BEGIN
+            {_expiry_status_delta("NEW", "+")}
+            UPDATE food_listings SET Expiry_Status = {expiry_status_sql("NEW.Expiry_Date")}
+            WHERE Food_ID = NEW.Food_ID;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_status_date AFTER UPDATE OF Expiry_Date ON food_listings
+        WHEN OLD.Expiry_Date IS NOT NEW.Expiry_Date BEGIN
+            UPDATE food_listings SET Expiry_Status = {expiry_status_sql("NEW.Expiry_Date")}
+            WHERE Food_ID = NEW.Food_ID;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_status_delete AFTER DELETE ON food_listings BEGIN
+            {_expiry_status_delta("OLD", "-")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_status_agg AFTER UPDATE ON food_listings
+        WHEN OLD.Expiry_Status IS NOT NEW.Expiry_Status OR OLD.Provider_Type IS NOT NEW.Provider_Type
+          OR OLD.Quantity IS NOT NEW.Quantity BEGIN
+            {_expiry_status_delta("OLD", "-")}
+            {_expiry_status_delta("NEW", "+")}
+        END;
+    """
+
+
+def rebuild_expiry_status(conn, today="DATE('now')"):
+    conn.execute(f"""
+        UPDATE food_listings SET Expiry_Status = {expiry_status_sql("Expiry_Date", today)}
+        WHERE Expiry_Status IS NOT {expiry_status_sql("Expiry_Date", today)};
+    """)
+    conn.execute("DELETE FROM agg_expiry_status;")
+    conn.execute("""
+        INSERT INTO agg_expiry_status (Provider_Type, Expiry_Status, Listing_Count, Quantity)
+        SELECT IFNULL(Provider_Type, 'Unknown'), Expiry_Status, COUNT(*), TOTAL(IFNULL(Quantity, 0))
+        FROM food_listings
+        GROUP BY IFNULL(Provider_Type, 'Unknown'), Expiry_Status;
+    """)
+
+
+def _v7_expiry_status(conn):
+    if "Expiry_Status" not in table_columns(conn, "food_listings"):
+        conn.execute("ALTER TABLE food_listings ADD COLUMN Expiry_Status TEXT NOT NULL DEFAULT 'Available';")
+    execute_script(conn, EXPIRY_STATUS_TABLES)
+    rebuild_expiry_status(conn)
+    execute_script(conn, expiry_status_triggers())
+
+
+# ---------- Table versions ----------
+# One counter per core table, bumped by every row written (by any process), so readers such
+# as api_server.py can tell whether anything a query reads has changed since a given version.
+VERSION_TABLES = """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        Table_Name TEXT PRIMARY KEY,
+        Version INTEGER NOT NULL DEFAULT 0
+    );
+"""
+
+
+def version_triggers():
+    return "".join(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+            UPDATE table_versions SET Version = Version + 1 WHERE Table_Name = '{table}';
+        END;
+    """ for table in CORE_TABLES for event in ("INSERT", "UPDATE", "DELETE"))
+
+
+def bump_versions(conn, tables=CORE_TABLES):
+    conn.execute(f"""
+        UPDATE table_versions SET Version = Version + 1
+        WHERE Table_Name IN ({', '.join('?' for _ in tables)});
+    """, tuple(tables))
+
+
+def _v8_table_versions(conn):
+    execute_script(conn, VERSION_TABLES)
+    conn.executemany("INSERT OR IGNORE INTO table_versions (Table_Name) VALUES (?);", [(t,) for t in CORE_TABLES])
+    execute_script(conn, version_triggers())
+
+
+# ---------- Row changes ----------
+# Opt-in change log (installed by partitions.py on the database its shards replicate): the
+# key of every core-table row written, in order, so replicas copy just those rows. Not a
+# migration: without partitions nothing would ever read or prune it.
+CORE_KEYS = {"providers": "Provider_ID", "receivers": "Receiver_ID", "food_listings": "Food_ID", "claims": "Claim_ID"}
+ALL_ROWS = "*"
+
+CHANGE_LOG_TABLES = """
+    CREATE TABLE IF NOT EXISTS row_changes (
+        Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        Table_Name TEXT NOT NULL,
+        Row_Key INTEGER
+    );
+"""
+
+
+def change_log_triggers():
+    def log(table, ref):
+        return f"INSERT INTO row_changes (Table_Name, Row_Key) VALUES ('{table}', {ref}.{CORE_KEYS[table]});"
+
+    return "".join(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_insert AFTER INSERT ON {table} BEGIN
+            {log(table, "NEW")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_delete AFTER DELETE ON {table} BEGIN
+            {log(table, "OLD")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_update AFTER UPDATE ON {table} BEGIN
+            {log(table, "OLD")}
+            INSERT INTO row_changes (Table_Name, Row_Key)
+            SELECT '{table}', NEW.{CORE_KEYS[table]} WHERE NEW.{CORE_KEYS[table]} IS NOT OLD.{CORE_KEYS[table]};
+        END;
+    """ for table in CORE_TABLES)
+
+
+def install_change_log(conn):
+    execute_script(conn, CHANGE_LOG_TABLES)
+    execute_script(conn, change_log_triggers())
+
+
+def log_all_rows(conn):
+    """Record a change to every row (bulk loads run with the change-log triggers dropped)."""
+    conn.execute("INSERT INTO row_changes (Table_Name) VALUES (?);", (ALL_ROWS,))
+
+
+# ---------- Claimed listings ----------
+# How many listings have at least one claim (Claimed) or none (Unclaimed), so "% unclaimed"
+# is two rows instead of a LEFT JOIN over every listing. A claim counts only while its
+# listing exists, as in that JOIN.
+CLAIM_STATE_TABLES = """
+    CREATE TABLE IF NOT EXISTS agg_listing_claim_state (
+        Claim_State TEXT PRIMARY KEY,
+        Listing_Count INTEGER NOT NULL DEFAULT 0
+    );
+"""
+
+
+def _claim_state_sql(food_id):
+    return f"CASE WHEN EXISTS (SELECT 1 FROM claims WHERE Food_ID = {food_id}) THEN 'Claimed' ELSE 'Unclaimed' END"
+
+
+def _claim_state_delta(state, sign):
+    return f"UPDATE agg_listing_claim_state SET Listing_Count = Listing_Count {sign} 1 WHERE Claim_State = {state};"
+
+
+def _claim_moves(food_id, now):
+    """Move the listing food_id between the states when a claim change leaves it `now` (Claimed/Unclaimed)."""
+    before = "Unclaimed" if now == "Claimed" else "Claimed"
+    # Claimed after an insert only if this is its sole claim; Unclaimed after a delete if none are left
+    crossed = (f"(SELECT COUNT(*) FROM claims WHERE Food_ID = {food_id}) = {1 if now == 'Claimed' else 0}"
+               f" AND EXISTS (SELECT 1 FROM food_listings WHERE Food_ID = {food_id})")
+    return f"""
+        UPDATE agg_listing_claim_state SET Listing_Count = Listing_Count + CASE Claim_State
+            WHEN '{now}' THEN 1 WHEN '{before}' THEN -1 END
+        WHERE {crossed};
+    """
+
+
+def claim_state_triggers():
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_claim_state_insert AFTER INSERT ON food_listings BEGIN
+            {_claim_state_delta(_claim_state_sql("NEW.Food_ID"), "+")}
+        END;
+        -- BEFORE: cascaded claim deletes run after this and no longer find the listing
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_claim_state_delete BEFORE DELETE ON food_listings BEGIN
+            {_claim_state_delta(_claim_state_sql("OLD.Food_ID"), "-")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_food_listings_claim_state_update AFTER UPDATE OF Food_ID ON food_listings
+        WHEN OLD.Food_ID IS NOT NEW.Food_ID BEGIN
+            {_claim_state_delta(_claim_state_sql("OLD.Food_ID"), "-")}
+            {_claim_state_delta(_claim_state_sql("NEW.Food_ID"), "+")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_claim_state_insert AFTER INSERT ON claims BEGIN
+            {_claim_moves("NEW.Food_ID", "Claimed")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_claim_state_delete AFTER DELETE ON claims BEGIN
+            {_claim_moves("OLD.Food_ID", "Unclaimed")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_claims_claim_state_update AFTER UPDATE OF Food_ID ON claims
+        WHEN OLD.Food_ID IS NOT NEW.Food_ID BEGIN
+            {_claim_moves("OLD.Food_ID", "Unclaimed")}
+            {_claim_moves("NEW.Food_ID", "Claimed")}
+        END;
+    """
+
+
+def rebuild_claim_state(conn):
+    conn.execute("DELETE FROM agg_listing_claim_state;")
+    conn.execute(f"""
+        INSERT INTO agg_listing_claim_state (Claim_State, Listing_Count)
+        SELECT s.Claim_State, COUNT(f.Food_ID)
+        FROM (SELECT 'Claimed' AS Claim_State UNION ALL SELECT 'Unclaimed') s
+        LEFT JOIN food_listings f ON {_claim_state_sql("f.Food_ID")} = s.Claim_State
+        GROUP BY s.Claim_State;
+    """)
+
+
+def _v9_claim_state(conn):
+    execute_script(conn, CLAIM_STATE_TABLES)
+    rebuild_claim_state(conn)
+    execute_script(conn, claim_state_triggers())
+
+
+MIGRATIONS = [
+    _v1_core_tables,
+    _v2_iso_dates,
+    _v3_aggregates,
+    _v4_filter_indexes,
+    _v5_search,
+    _v6_claims_enriched,
+    _v7_expiry_status,
+    _v8_table_versions,
+    _v9_claim_state,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations, each in its own transaction. Returns the new version."""
+    version = current_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema v{version} is newer than this code (v{SCHEMA_VERSION})")
+    # Table rebuilds must not trip foreign key actions; the pragma is a no-op inside a transaction
+    fk_enabled = conn.execute("PRAGMA foreign_keys;").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF;")
+    try:
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.execute("BEGIN;")
+            try:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {number};")
+                conn.execute("COMMIT;")
+            except Exception:
+                conn.execute("ROLLBACK;")
+                raise
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if fk_enabled else 'OFF'};")
+    if version < SCHEMA_VERSION:
+        conn.execute("ANALYZE;")
+    return SCHEMA_VERSION
+
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN detail lines for sql."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def join_scans(conn, sql, params=()):
+    """Plan lines that full-scan a table other than the outermost one of the join."""
+    scans = [line for line in explain(conn, sql, params)
+             if line.startswith("SCAN ") and not line.startswith("SCAN CONSTANT")]
+    return scans[1:]
+
+
+if __name__ == "__main__":
+    from data_preparation import DB_PATH
+
+    with sqlite3.connect(DB_PATH) as conn:
+        print(f"✅ Schema at version {migrate(conn)}")
@@ -0,0 +1,88 @@
+# FTS5-backed pickers: instead of building a selectbox over every row, query the top
+# matches for what the user typed (food_search / provider_search, see schema.py).
+import re
+
+from db import run_query
+
+RESULT_LIMIT = 20
+
+
+def fts_query(text):
+    """'chick del' -> '"chick"* "del"*' (prefix match on every word, quotes escaped)."""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_listings(text, limit=RESULT_LIMIT):
+    match = fts_query(text)
+    if not match:
+        return run_query("""
+            SELECT f.Food_ID, f.Food_Name, f.Location, p.Name AS Provider_Name
+            FROM food_listings f LEFT JOIN providers p ON p.Provider_ID = f.Provider_ID
+            ORDER BY f.Food_ID DESC
+            LIMIT ?;
+        """, (limit,))
+    return run_query("""
+        SELECT rowid AS Food_ID, Food_Name, Location, Provider_Name
+        FROM food_search
+        WHERE food_search MATCH ?
+        ORDER BY rank
+        LIMIT ?;
+    """, (match, limit))
+
+
+def search_providers(text, limit=RESULT_LIMIT):
+    match = fts_query(text)
+    if not match:
+        return run_query("""
+            SELECT Provider_ID, Name, City, Type FROM providers ORDER BY Provider_ID DESC LIMIT ?;
+        """, (limit,))
+    return run_query("""
+        SELECT rowid AS Provider_ID, Name, City, Type
+        FROM provider_search
+        WHERE provider_search MATCH ?
+        ORDER BY rank
+        LIMIT ?;
+    """, (match, limit))
+
+
+# ---------- Streamlit widgets ----------
+def describe_listing(r):
+    return f"{r.Food_ID} – {r.Food_Name} ({r.Location or '?'}, {r.Provider_Name or '?'})"
+
+
+def describe_provider(r):
+    return f"{r.Provider_ID} – {r.Name} ({r.City or '?'})"
+
+
+def picker_labels(results, id_column, describe):
+    """{id: label} for a picker; NULL columns are shown as '?' (describe sees them as such)."""
+    results = results.fillna("?")
+    return {int(row[id_column]): describe(row) for _, row in results.iterrows()}
+
+
+def _picker(label, key, results, id_column, describe):
+    import streamlit as st
+
+    if results.empty:
+        st.caption("No matches.")
+        return None
+    labels = picker_labels(results, id_column, describe)
+    return st.selectbox(label, list(labels), format_func=labels.get, key=f"{key}_choice")
+
+
+def listing_picker(label, key):
+    """Search box + top-N matches; returns the chosen Food_ID or None."""
+    import streamlit as st
+
+    text = st.text_input(f"Search {label.lower()}", key=f"{key}_search",
+                         placeholder="Food name, location or provider")
+    return _picker(label, key, search_listings(text), "Food_ID", describe_listing)
+
+
+def provider_picker(label, key):
+    """Search box + top-N matches; returns the chosen Provider_ID or None."""
+    import streamlit as st
+
+    text = st.text_input(f"Search {label.lower()}", key=f"{key}_search", placeholder="Name, city or type")
+    return _picker(label, key, search_providers(text), "Provider_ID", describe_provider)
@@ -1,3 +1,5 @@
+from schema import EXPIRING_DAYS, expiry_status_sql
+
 # SQL query functions will go here
 SQL_QUERIES = {
     # 1. Total Providers
@@ -14,10 +16,10 @@ SQL_QUERIES = {
 
     # 5. Top 5 Providers by Donations
     "top_5_providers": """
-        SELECT p.Provider_Name AS name, COUNT(f.Food_ID) AS total_donations
+        SELECT p.Name AS name, COUNT(f.Food_ID) AS total_donations
         FROM providers p
         JOIN food_listings f ON p.Provider_ID = f.Provider_ID
-        GROUP BY p.Provider_Name
+        GROUP BY p.Provider_ID, p.Name
         ORDER BY total_donations DESC
         LIMIT 5;
     """,
@@ -30,54 +32,44 @@ SQL_QUERIES = {
     """,
 
     # 7. Available vs Expired Food
-    "available_vs_expired": """
-        SELECT 
-            CASE WHEN date(Expiry_Date) >= date('now') THEN 'Available'
-                 ELSE 'Expired'
-            END AS food_status,
-            COUNT(*) AS Count
+    # Expiry_Status only moves forward when expiry_sweeper.py runs (the app runs it; scripts and
+    # api_server.py don't), so listings not yet marked Expired are re-checked against today
+    "available_vs_expired": f"""
+        SELECT CASE WHEN Expiry_Status = 'Expired' THEN 'Expired'
+                    ELSE {expiry_status_sql("Expiry_Date")} END AS food_status,
+               COUNT(*) AS Count
         FROM food_listings
         GROUP BY food_status;
     """,
 
     # 8. Food Listings by Category
     "food_listings_by_category": """
-        SELECT Category, COUNT(*) AS Count
+        SELECT Food_Type AS Category, COUNT(*) AS Count
         FROM food_listings
-        GROUP BY Category;
+        GROUP BY Food_Type;
     """,
 
-    # 9. Monthly Claims Trend (Fixed for Timestamp column)
-
-"monthly_claims_trend": """
-    SELECT 
-      CASE 
-        WHEN instr(Timestamp,'-') > 0 
-          THEN substr(Timestamp,7,4) || '-' || substr(Timestamp,1,2)          -- e.g. 03-05-2025 ...
-        WHEN instr(Timestamp,'/') > 0 
-          THEN substr(Timestamp,-4) || '-' || printf('%02d', CAST(substr(Timestamp,1,instr(Timestamp,'/')-1) AS INT))  -- e.g. 3/21/2025 ...
-        ELSE 'Unknown'
-      END AS Month,
-      COUNT(*) AS Count
-    FROM claims
-    GROUP BY Month
-    ORDER BY Month;
-""",
-
-
+    # 9. Monthly Claims Trend (Claim_Month is derived from the ISO Timestamp)
+    "monthly_claims_trend": """
+        SELECT Claim_Month AS Month, COUNT(*) AS Count
+        FROM claims
+        WHERE Claim_Month IS NOT NULL
+        GROUP BY Claim_Month
+        ORDER BY Claim_Month;
+    """,
 
     # 10. Providers by Type
     "providers_by_type": """
-        SELECT Provider_Type, COUNT(*) AS Count
+        SELECT Type AS Provider_Type, COUNT(*) AS Count
         FROM providers
-        GROUP BY Provider_Type;
+        GROUP BY Type;
     """,
 
     # 11. Receivers by Type
     "receivers_by_type": """
-        SELECT Receiver_Type, COUNT(*) AS Count
+        SELECT Type AS Receiver_Type, COUNT(*) AS Count
         FROM receivers
-        GROUP BY Receiver_Type;
+        GROUP BY Type;
     """,
 
     # 12. Most Claimed Food Items
@@ -92,24 +84,25 @@ SQL_QUERIES = {
 
     # 13. Claims per Provider
     "claims_per_provider": """
-        SELECT p.Provider_Name AS name, COUNT(c.Claim_ID) AS total_claims
+        SELECT p.Name AS name, COUNT(c.Claim_ID) AS total_claims
         FROM providers p
         JOIN food_listings f ON p.Provider_ID = f.Provider_ID
         JOIN claims c ON f.Food_ID = c.Food_ID
-        GROUP BY p.Provider_Name
+        GROUP BY p.Name
         ORDER BY total_claims DESC;
     """,
 
-    # 14. Food Expiry in Next 7 Days
-    "expiry_next_7_days": """
+    # 14. Food Expiry in Next 7 Days (dates checked too, in case no sweeper has run today)
+    "expiry_next_7_days": f"""
         SELECT Food_Name, Expiry_Date
         FROM food_listings
-        WHERE date(Expiry_Date) BETWEEN date('now') AND date('now', '+7 day');
+        WHERE Expiry_Status IN ('Available', 'Expiring')
+          AND Expiry_Date >= DATE('now') AND Expiry_Date <= DATE('now', '+{EXPIRING_DAYS} day');
     """,
 
     # 15. Unclaimed Food
     "unclaimed_food": """
-        SELECT f.Food_Name, f.Category, f.Expiry_Date
+        SELECT f.Food_Name, f.Food_Type AS Category, f.Expiry_Date
         FROM food_listings f
         LEFT JOIN claims c ON f.Food_ID = c.Food_ID
         WHERE c.Claim_ID IS NULL;
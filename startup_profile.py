@@ -0,0 +1,123 @@
+# Cold-start profile of app.py: for each page, a fresh interpreter runs the app once under
+# Streamlit's AppTest with -X importtime, then reruns it. Reports the first render split into
+# module imports (by top-level module) and the rest, plus the warm rerun, and fails when a
+# first render goes over the budget.
+#
+#   python startup_profile.py                              # every page, default budget
+#   python startup_profile.py --page Insights --budget-ms 1500 --db path/to/food_wastage.db
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent / "app.py"
+BUDGET_MS = 2500
+TOP_IMPORTS = 6
+# app.PAGES plus the admin page (app.py only runs inside Streamlit, so it is not imported here)
+PAGES = ["Dashboard", "Food Listings", "Claims", "Providers", "Receivers", "CRUD", "Allocation",
+         "Insights", "Admin"]
+# Written to stderr by the child once its harness is imported; importtime lines before it
+# belong to the profiler, not the app
+MARKER = "--- app run ---"
+
+
+# ---------- Child ----------
+def _child(page):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=300)
+    at.query_params["admin"] = "1"
+    at.session_state["page"] = page
+    print(MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    print(MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    at.run()
+    rerun = time.perf_counter() - start
+    print(json.dumps({
+        "first_ms": first * 1000,
+        "rerun_ms": rerun * 1000,
+        "errors": [str(e.value) for e in at.exception],
+    }))
+
+
+# ---------- Parent ----------
+def parse_importtime(text):
+    """{top-level module: cumulative ms} from -X importtime output, in import order."""
+    imports = {}
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under their importer; the header line has no numbers
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports[name.strip()] = imports.get(name.strip(), 0.0) + int(cumulative) / 1000
+    return imports
+
+
+def profile_page(page, db_path=None):
+    """Profile one page in a fresh interpreter. Returns a dict of timings and imports."""
+    env = dict(os.environ)
+    if db_path:
+        env["FOOD_WASTAGE_DB"] = str(db_path)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", __file__, "--child", page],
+        capture_output=True, text=True, env=env, cwd=APP.parent,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"profiling {page} failed:\n{proc.stderr[-2000:]}")
+    _, first_run, rerun = (proc.stderr.split(MARKER + "\n") + ["", ""])[:3]
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(first_run)
+    result.update(
+        page=page,
+        imports=imports,
+        import_ms=sum(imports.values()),
+        rerun_imports=parse_importtime(rerun),
+    )
+    result["render_ms"] = result["first_ms"] - result["import_ms"]
+    return result
+
+
+def report(result, budget_ms=BUDGET_MS):
+    """Print one page's profile; returns whether it is within budget."""
+    ok = result["first_ms"] <= budget_ms and not result["errors"]
+    top = sorted(result["imports"].items(), key=lambda kv: -kv[1])[:TOP_IMPORTS]
+    print(f"{'✅' if ok else '⚠️'} {result['page']}: first render {result['first_ms']:.0f} ms "
+          f"(imports {result['import_ms']:.0f} ms, render {result['render_ms']:.0f} ms) · "
+          f"rerun {result['rerun_ms']:.0f} ms")
+    if top:
+        print("   imports: " + " · ".join(f"{name} {ms:.0f} ms" for name, ms in top))
+    if result["rerun_imports"]:
+        print("   ⚠️ imported on rerun: " + ", ".join(result["rerun_imports"]))
+    for error in result["errors"]:
+        print(f"   ⚠️ {error.splitlines()[0] if error else 'exception'}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile app.py cold start per page.")
+    parser.add_argument("--page", action="append", help="Page to profile (repeatable; default: all)")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="Max first render per page")
+    parser.add_argument("--db", help="Database file (default: FOOD_WASTAGE_DB or database/food_wastage.db)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child)
+        return 0
+    within = [report(profile_page(page, args.db), args.budget_ms) for page in args.page or PAGES]
+    if all(within):
+        print(f"🎯 Every page renders within {args.budget_ms:.0f} ms")
+        return 0
+    print(f"⚠️ {within.count(False)} page(s) over the {args.budget_ms:.0f} ms budget or failing")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
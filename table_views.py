@@ -0,0 +1,218 @@
+# Keyset-paginated, filterable table views. Filtering, ordering and paging all run in
+# SQL on indexed columns, so a page costs the same whether the table has 1k or 10M rows.
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from db import run_query, table_exists
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+@dataclass(frozen=True)
+class TableView:
+    table: str
+    key: str
+    columns: tuple
+    # Filter label -> column; values are matched with IN (...)
+    filters: dict = field(default_factory=dict)
+    date_column: str = None
+    date_label: str = "Expiry"
+    # agg_table_counts row holding the unfiltered total
+    count_table: str = None
+    # Sort column (ties broken by key); pages then start after a (value, key) cursor
+    order: str = None
+    # Condition every row of the view meets, and a query for their total when it has one
+    where: str = None
+    count_sql: str = None
+
+
+VIEWS = {
+    "providers": TableView(
+        "providers", "Provider_ID",
+        ("Provider_ID", "Name", "Type", "Address", "City", "Contact"),
+        {"City": "City", "Type": "Type"},
+    ),
+    "receivers": TableView(
+        "receivers", "Receiver_ID",
+        ("Receiver_ID", "Name", "Type", "City", "Contact"),
+        {"City": "City", "Type": "Type"},
+    ),
+    "food_listings": TableView(
+        "food_listings", "Food_ID",
+        ("Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID", "Provider_Type",
+         "Location", "Food_Type", "Meal_Type"),
+        {"City": "Location", "Provider_Type": "Provider_Type", "Food_Type": "Food_Type"},
+        date_column="Expiry_Date",
+    ),
+    # Pre-joined by triggers (schema.py): no join at read time
+    "claims_enriched": TableView(
+        "claims_enriched", "Claim_ID",
+        ("Claim_ID", "Timestamp", "Status", "Food_ID", "Food_Name", "Quantity", "Food_Type", "Location",
+         "Provider_Type", "Expiry_Date", "Receiver_ID", "Receiver_Name", "Receiver_Type", "Receiver_City"),
+        {"Status": "Status"},
+        date_column="Timestamp", date_label="Claimed", count_table="claims",
+    ),
+    # Listings with no claim, soonest expiry first (idx_food_listings_expiry, idx_claims_food)
+    "unclaimed_listings": TableView(
+        "food_listings", "Food_ID",
+        ("Food_ID", "Food_Name", "Quantity", "Provider_Type", "Location", "Expiry_Date"),
+        {"City": "Location", "Provider_Type": "Provider_Type"},
+        date_column="Expiry_Date", order="Expiry_Date",
+        where="NOT EXISTS (SELECT 1 FROM claims c WHERE c.Food_ID = food_listings.Food_ID)",
+        count_sql="SELECT Listing_Count FROM agg_listing_claim_state WHERE Claim_State = 'Unclaimed';",
+    ),
+}
+
+
+def where_clause(view, filters=None, date_range=None):
+    """filters: {label: [values]}; date_range: (start, end) ISO dates, either may be None."""
+    clauses, params = [view.where] if view.where else [], []
+    for label, values in (filters or {}).items():
+        if values:
+            clauses.append(f"{view.filters[label]} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+    if view.date_column and date_range:
+        start, end = date_range
+        if start:
+            clauses.append(f"{view.date_column} >= ?")
+            params.append(str(start))
+        if end:
+            # Up to the end of that day, whether the column holds dates or timestamps
+            clauses.append(f"{view.date_column} < date(?, '+1 day')")
+            params.append(str(end))
+    return clauses, params
+
+
+def _order_by(view):
+    return f"{view.order}, {view.key}" if view.order else view.key
+
+
+def _after(view, after):
+    """Clause and params for the rows following cursor `after` in the view's order."""
+    if not view.order:
+        return f"{view.key} > ?", [after]
+    value, key = after
+    # NULLs sort first: after a NULL come the remaining NULLs, then every non-NULL value
+    if value is None:
+        return f"(({view.order} IS NULL AND {view.key} > ?) OR {view.order} IS NOT NULL)", [key]
+    return f"({view.order} > ? OR ({view.order} = ? AND {view.key} > ?))", [value, value, key]
+
+
+def _cursor(view, page):
+    key = int(page[view.key].iloc[-1])
+    if not view.order:
+        return key
+    value = page[view.order].iloc[-1]
+    if pd.isna(value):
+        return None, key
+    # numpy scalars back to Python values for sqlite3
+    return (value.item() if hasattr(value, "item") else value), key
+
+
+def fetch_page(view, filters=None, date_range=None, after=None, page_size=50, read_only=False, timeout=None):
+    """Rows following cursor `after` in the view's order. Returns (DataFrame, cursor of its last row or None).
+
+    The cursor is the last key, or (sort value, key) for views with an order column;
+    read_only and timeout are passed on to run_query.
+    """
+    clauses, params = where_clause(view, filters, date_range)
+    if after is not None:
+        clause, values = _after(view, after)
+        clauses.append(clause)
+        params.extend(values)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    page = run_query(
+        f"SELECT {', '.join(view.columns)} FROM {view.table} {where} ORDER BY {_order_by(view)} LIMIT ?;",
+        (*params, int(page_size)), read_only=read_only, timeout=timeout,
+    )
+    return page, _cursor(view, page) if len(page) else None
+
+
+def view_sql(view, filters=None, date_range=None):
+    """(sql, params) for every filtered row in key order, for exports."""
+    clauses, params = where_clause(view, filters, date_range)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {', '.join(view.columns)} FROM {view.table} {where} ORDER BY {_order_by(view)};", tuple(params)
+
+
+def count_rows(view, filters=None, date_range=None):
+    """Total matching rows: the trigger-maintained count when unfiltered, else a cached COUNT."""
+    clauses, params = where_clause(view, filters, date_range)
+    if clauses == [view.where] and view.count_sql:
+        total = run_query(view.count_sql)
+        if not total.empty:
+            return int(total.iloc[0, 0])
+    if not clauses and table_exists("agg_table_counts"):
+        total = run_query("SELECT Row_Count FROM agg_table_counts WHERE Table_Name = ?;",
+                          (view.count_table or view.table,))
+        if not total.empty:
+            return int(total.iloc[0, 0])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return int(run_query(f"SELECT COUNT(*) FROM {view.table} {where};", tuple(params)).iloc[0, 0])
+
+
+def filter_options(view, label):
+    column = view.filters[label]
+    where = f"{view.where} AND " if view.where else ""
+    values = run_query(f"SELECT DISTINCT {column} FROM {view.table} WHERE {where}{column} IS NOT NULL ORDER BY {column};")
+    return values.iloc[:, 0].tolist()
+
+
+# ---------- Streamlit widget ----------
+def render_table_view(name, key=None):
+    import streamlit as st
+    import export
+
+    view = VIEWS[name]
+    key = key or f"view_{name}"
+    if not table_exists(view.table):
+        st.info(f"No {name.replace('_', ' ')} available.")
+        return
+
+    filter_cols = st.columns(len(view.filters) + (2 if view.date_column else 0) + 1)
+    filters = {}
+    for col, label in zip(filter_cols, view.filters):
+        with col:
+            filters[label] = st.multiselect(label, filter_options(view, label), key=f"{key}_{label}")
+    date_range = None
+    if view.date_column:
+        with filter_cols[len(view.filters)]:
+            start = st.date_input(f"{view.date_label} from", value=None, key=f"{key}_from")
+        with filter_cols[len(view.filters) + 1]:
+            end = st.date_input(f"{view.date_label} to", value=None, key=f"{key}_to")
+        date_range = (start, end)
+    with filter_cols[-1]:
+        page_size = st.selectbox("Page size", PAGE_SIZES, index=1, key=f"{key}_size")
+
+    # Page n starts after cursors[n]; a filter or page size change starts over
+    signature = (tuple((k, tuple(v)) for k, v in filters.items()), date_range, page_size)
+    state = st.session_state.setdefault(f"{key}_state", {"signature": signature, "cursors": [None]})
+    if state["signature"] != signature:
+        state.update(signature=signature, cursors=[None])
+    cursors = state["cursors"]
+
+    page, last = fetch_page(view, filters, date_range, cursors[-1], page_size)
+    total = count_rows(view, filters, date_range)
+    first_row = (len(cursors) - 1) * page_size
+    st.dataframe(page, use_container_width=True, hide_index=True)
+
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    with prev_col:
+        if st.button("◀ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with info_col:
+        shown = f"{first_row + 1}–{first_row + len(page)}" if len(page) else "0"
+        st.caption(f"Rows {shown} of {total}")
+    with next_col:
+        if st.button("Next ▶", key=f"{key}_next", disabled=last is None or first_row + len(page) >= total):
+            cursors.append(last)
+            st.rerun()
+
+    # All filtered rows, not just this page; streamed only when clicked
+    sql, params = view_sql(view, filters, date_range)
+    export_cols = st.columns(len(export.FORMATS))
+    for col, fmt in zip(export_cols, export.FORMATS):
+        with col:
+            export.download_button(f"⬇️ {fmt.upper()}", name, fmt, key=f"{key}_export_{fmt}", sql=sql, params=params)
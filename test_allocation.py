@@ -0,0 +1,53 @@
+from datetime import date
+
+import pandas as pd
+
+from allocation import allocate
+
+TODAY = date(2025, 3, 1)
+
+
+def test_allocation_prefers_urgent_listings_same_city_and_reliable_receivers():
+    listings = pd.DataFrame({
+        "Food_ID": [1, 2, 3, 4],
+        "Food_Name": ["Rice", "Soup", "Bread", "Fish"],
+        "Quantity": [5, 5, 5, 5],
+        "Expiry_Date": ["2025-03-05", "2025-03-02", "2025-03-03", "2025-03-02"],
+        "Location": ["Delhi", "Delhi", "Delhi", "Pune"],
+        "Food_Type": ["Vegan", "Vegan", "Vegan", "Vegan"],
+    })
+    receivers = pd.DataFrame({
+        "Receiver_ID": [10, 11],
+        "Name": ["Shelter", "Charity"],
+        "Type": ["Shelter", "Charity"],
+        "City": ["delhi ", "Mumbai"],
+    })
+    # Receiver 10 completed one claim before: capacity 2
+    claims = pd.DataFrame({"Receiver_ID": [10], "Status": ["Completed"], "Food_Type": ["Vegan"]})
+
+    matches = allocate(listings, receivers, claims, TODAY)
+
+    # Soonest expiry first; Pune has no receiver and capacity runs out before Food_ID 1
+    assert matches["Food_ID"].tolist() == [2, 3]
+    assert matches["Receiver_ID"].tolist() == [10, 10]
+    assert matches["Days_Left"].tolist() == [1, 2]
+    assert matches["Rank"].tolist() == [1, 2]
+
+
+def test_listings_and_receivers_without_a_city_never_match():
+    listings = pd.DataFrame({
+        "Food_ID": [1, 2, 3],
+        "Food_Name": ["Rice", "Soup", "Bread"],
+        "Quantity": [5, 5, 5],
+        "Expiry_Date": ["2025-03-02", "2025-03-02", "2025-03-03"],
+        "Location": [None, "  ", "Delhi"],
+        "Food_Type": ["Vegan", "Vegan", "Vegan"],
+    })
+    receivers = pd.DataFrame({
+        "Receiver_ID": [10, 11, 12],
+        "Name": ["Shelter", "Charity", "Kitchen"],
+        "Type": ["Shelter", "Charity", "Kitchen"],
+        "City": [None, "", "Delhi"],
+    })
+    matches = allocate(listings, receivers, pd.DataFrame(columns=["Receiver_ID", "Status", "Food_Type"]), TODAY)
+    assert matches[["Food_ID", "Receiver_ID"]].values.tolist() == [[3, 12]]
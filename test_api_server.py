@@ -0,0 +1,103 @@
+import json
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api_server
+import db
+from synthetic_data import write_database
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    path = tmp_path / "food.db"
+    write_database(path, 500)
+    monkeypatch.setattr(db, "DB_PATH", path)
+    server = api_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", path
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, etag=None):
+    request = urllib.request.Request(url, headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers.get("ETag"), json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("ETag"), json.loads(e.read() or b"null")
+
+
+def test_queries_and_entities_revalidate_with_etags(api):
+    base, path = api
+    status, tag, body = get(f"{base}/queries/claims_by_status")
+    assert status == 200 and sum(row["Count"] for row in body["rows"]) == 500
+    assert get(f"{base}/queries/claims_by_status", tag)[:2] == (304, tag)
+    _, providers_tag, _ = get(f"{base}/queries/total_providers")
+
+    status, _, page = get(f"{base}/receivers?limit=3")
+    assert status == 200 and len(page["rows"]) == 3
+    assert get(f"{base}/receivers?limit=3&after={page['next']}")[2]["rows"][0]["Receiver_ID"] > page["next"]
+    assert get(f"{base}/claims/1")[2]["Claim_ID"] == 1
+    assert get(f"{base}/claims/999999")[0] == 404
+    assert get(f"{base}/receivers?limit=0")[0] == 400
+
+    # A write from another process changes only the ETags of queries that read the table
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("UPDATE claims SET Status = 'Cancelled' WHERE Claim_ID = 1;")
+    conn.close()
+    assert get(f"{base}/queries/claims_by_status", tag)[0] == 200
+    assert get(f"{base}/queries/total_providers", providers_tag)[0] == 304
+
+
+def test_if_none_match_takes_lists_weak_tags_and_star(api):
+    base, _ = api
+    _, tag, _ = get(f"{base}/receivers/1")
+    assert get(f"{base}/receivers/1", f'"stale", W/{tag}')[:2] == (304, tag)
+    assert get(f"{base}/receivers/1", f'W/"stale",{tag}')[0] == 304
+    assert get(f"{base}/receivers/1", '"stale", W/"other"')[0] == 200
+    assert get(f"{base}/receivers/1", "*")[0] == 304
+    assert get(f"{base}/receivers/999999", "*")[0] == 404
+    # A comma inside a tag is part of the tag
+    assert api_server.if_none_match('"a,b", "c"', '"a,b"')
+    assert not api_server.if_none_match('"a,b"', '"a"')
+
+
+def test_entity_pages_read_only_with_the_api_timeout(api, monkeypatch):
+    import table_views
+
+    base, _ = api
+    calls = []
+    real = table_views.run_query
+    monkeypatch.setattr(table_views, "run_query", lambda *args, **kwargs: calls.append(kwargs) or real(*args, **kwargs))
+    assert len(get(f"{base}/receivers?limit=5")[2]["rows"]) == 5
+    assert calls == [{"read_only": True, "timeout": api_server.QUERY_TIMEOUT_SECONDS}]
+
+
+def test_exports_stream_in_chunks(api):
+    import csv
+    import http.client
+    import io
+    from urllib.parse import urlsplit
+
+    import pyarrow.parquet as pq
+
+    base, _ = api
+    conn = http.client.HTTPConnection(urlsplit(base).netloc)
+    conn.request("GET", "/exports/claims_history?format=csv")
+    response = conn.getresponse()
+    assert response.status == 200 and response.getheader("Transfer-Encoding") == "chunked"
+    assert "claims_history.csv" in response.getheader("Content-Disposition")
+    rows = list(csv.reader(io.StringIO(response.read().decode())))
+    assert rows[0][:3] == ["Claim_ID", "Timestamp", "Status"] and len(rows) == 501
+    conn.close()
+
+    with urllib.request.urlopen(f"{base}/exports/claims_per_provider?format=parquet") as response:
+        assert pq.read_table(io.BytesIO(response.read())).num_rows > 0
+    assert get(f"{base}/exports/nope")[0] == 404
+    assert get(f"{base}/exports/claims_history?format=xml")[0] == 400
@@ -0,0 +1,25 @@
+import copy
+
+from bench_queries import compare, run_benchmark
+from sql_queries import SQL_QUERIES
+from synthetic_data import write_database
+
+
+def test_compare_flags_a_slower_query(tmp_path):
+    path = tmp_path / "bench.db"
+    write_database(path, 100)
+    report = run_benchmark(path, repeat=1)
+    assert {f"sql.{name}" for name in SQL_QUERIES} <= set(report["results"])
+    assert report["meta"]["rows"]["claims"] == 100
+    assert compare(report, report) == []
+
+    slower = copy.deepcopy(report)
+    slower["results"]["sql.total_claims"]["p50_ms"] = report["results"]["sql.total_claims"]["p50_ms"] * 2 + 5
+    assert [line.split(":")[0] for line in compare(slower, report)] == ["sql.total_claims"]
+
+    del slower["results"]["sql.claims_by_status"]
+    assert "sql.claims_by_status: missing from this run" in compare(slower, report)
+
+    bigger = copy.deepcopy(report)
+    bigger["meta"]["rows"]["claims"] = 200
+    assert compare(bigger, report)[0].startswith("baseline was recorded at")
@@ -0,0 +1,34 @@
+import altair as alt
+import pandas as pd
+
+import charts
+
+
+def test_chart_data_is_capped_and_specs_are_reused():
+    frame = pd.DataFrame({
+        "Food_Name": [f"Food {i}" for i in range(30)] * 2,
+        "Status": ["Pending"] * 30 + ["Completed"] * 30,
+        "Claim_Count": list(range(60)),
+    })
+    capped = charts.cap_categories(frame, "Food_Name", "Claim_Count")
+    assert capped["Food_Name"].nunique() == charts.MAX_CATEGORIES
+    assert charts.OTHER in set(capped["Food_Name"])
+    assert capped["Claim_Count"].sum() == frame["Claim_Count"].sum()
+    assert set(capped.groupby("Food_Name")["Status"].nunique()) == {2}
+
+    series = pd.DataFrame({"Month": pd.date_range("2000-01-01", periods=1000, freq="D"), "Count": 1})
+    small = charts.downsample(series, "Month", "Count")
+    assert len(small) <= charts.MAX_POINTS
+    assert small["Count"].sum() == 1000
+    assert small["Month"].iloc[0] == series["Month"].iloc[0]
+
+    builds = []
+
+    def build(df):
+        builds.append(len(df))
+        return alt.Chart(df).mark_bar().encode(x="Food_Name", y="Claim_Count")
+
+    first = charts.chart_spec("claims", capped, build)
+    assert charts.chart_spec("claims", capped.copy(), build) is first
+    charts.chart_spec("claims", capped.assign(Claim_Count=capped["Claim_Count"] + 1), build)
+    assert len(builds) == 2
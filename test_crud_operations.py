@@ -0,0 +1,80 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+import db
+import crud_operations
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+
+
+def test_bulk_upsert_writes_valid_rows_and_reports_the_rest():
+    db.exec_query("INSERT INTO providers (Provider_ID, Name) VALUES (1, 'Bakery');")
+    upload = pd.DataFrame({
+        "Food_ID": [None, None, 5, 5, None],
+        "Food_Name": ["Rice", "", "Soup", "Fish", "Dal"],
+        "Quantity": ["3", "x", "2", "1", "4"],
+        "Expiry_Date": ["3/17/2025", "2025-01-01", "2025-01-01", "2025-01-01", "never"],
+        "Provider_ID": [1, 1, 1, 1, 9],
+    })
+    result = crud_operations.bulk_upsert("food_listings", upload)
+
+    assert result.written == 1
+    assert result.rejected == 4
+    assert set(zip(result.errors["Row"], result.errors["Error"])) == {
+        (2, "not an integer"), (2, "required"),
+        (3, "duplicate ID in upload"), (4, "duplicate ID in upload"),
+        (5, "unparseable date"), (5, "no such Provider_ID"),
+    }
+    stored = db.run_query("SELECT Food_Name, Quantity, Expiry_Date FROM food_listings;")
+    assert stored.values.tolist() == [["Rice", 3, "2025-03-17"]]
+    # Aggregates follow the batch through their triggers
+    assert db.run_query("SELECT Donations FROM agg_provider_stats WHERE Provider_ID = 1;").iloc[0, 0] == 1
+
+    edited = db.run_query("SELECT * FROM food_listings;")
+    edited.loc[0, "Quantity"] = 10
+    rows = crud_operations.changed_rows(db.run_query("SELECT * FROM food_listings;"), edited)
+    assert crud_operations.bulk_upsert("food_listings", rows).written == 1
+    assert db.run_query("SELECT Quantity FROM food_listings;").iloc[0, 0] == 10
+
+
+def test_edited_grid_keeps_its_labels_and_reports_deleted_rows():
+    db.exec_query("INSERT INTO providers (Provider_ID, Name) VALUES (1, 'Bakery'), (2, 'Deli'), (3, 'Cafe');")
+    original = db.run_query("SELECT * FROM providers ORDER BY Provider_ID;")
+    # Row 0 removed in the grid, row 2 blanked: the edit keeps labels 1 and 2
+    edited = original.drop(index=0)
+    edited.loc[2, "Name"] = ""
+    edited.loc[1, "City"] = "Pune"
+
+    rows = crud_operations.changed_rows(original, edited)
+    result = crud_operations.bulk_upsert("providers", rows)
+    assert result.written == 1
+    assert result.errors[["Row", "Column", "Error"]].values.tolist() == [[2, "Name", "required"]]
+    assert crud_operations.deleted_keys(original, edited, "Provider_ID") == [1]
+    assert crud_operations.bulk_delete("providers", [1]) == 1
+    assert db.run_query("SELECT Provider_ID, Name, IFNULL(City, '') FROM providers ORDER BY Provider_ID;").values.tolist() == [
+        [2, "Deli", "Pune"], [3, "Cafe", ""],
+    ]
+
+
+def test_upload_updates_only_its_columns_and_saves_with_deletes_atomically():
+    db.exec_query("INSERT INTO providers (Provider_ID, Name, City) VALUES (1, 'Bakery', 'Pune'), (2, 'Deli', 'Agra');")
+    # No City column: the stored cities stay
+    result = crud_operations.bulk_upsert("providers", pd.DataFrame({"Provider_ID": [1], "Name": ["Bread Co"]}),
+                                         delete=[2])
+    assert (result.written, result.deleted) == (1, 1)
+    assert db.run_query("SELECT Provider_ID, Name, City FROM providers;").values.tolist() == [[1, "Bread Co", "Pune"]]
+
+    # A delete that fails takes the upserts in the same save down with it
+    db.exec_query("INSERT INTO providers (Provider_ID, Name) VALUES (3, 'Cafe');")
+    db.exec_query("CREATE TRIGGER keep_cafe BEFORE DELETE ON providers WHEN OLD.Provider_ID = 3 "
+                  "BEGIN SELECT RAISE(ABORT, 'kept'); END;")
+    with pytest.raises(sqlite3.Error, match="kept"):
+        crud_operations.bulk_upsert("providers", pd.DataFrame({"Provider_ID": [1, None], "Name": ["Rolls", "New"]}),
+                                    delete=[3])
+    assert db.run_query("SELECT Provider_ID, Name FROM providers ORDER BY 1;").values.tolist() == [
+        [1, "Bread Co"], [3, "Cafe"],
+    ]
@@ -0,0 +1,114 @@
+import sqlite3
+from data_preparation import ingest
+
+
+def write_csv(path, text):
+    path.write_text(text.strip() + "\n")
+
+
+def write_parents(path):
+    write_csv(path / "providers_data.csv", """
+Provider_ID,Name,Type,Address,City,Contact
+1,Fresh Mart,Grocery Store,1 Main St,Pune,555
+""")
+    write_csv(path / "receivers_data.csv", """
+Receiver_ID,Name,Type,City,Contact
+1,Ann,NGO,Delhi,111
+""")
+
+
+def test_upsert_keeps_existing_rows_and_skips_unchanged_files(tmp_path):
+    db_path = tmp_path / "food.db"
+    write_csv(tmp_path / "receivers_data.csv", """
+Receiver_ID,Name,Type,City,Contact
+1,Ann,NGO,Delhi,111
+2,Bob,Shelter,Pune,222
+""")
+    assert ingest(db_path, tmp_path) == {"receivers": 2}
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO receivers VALUES (3, 'Added via CRUD', 'NGO', 'Goa', '333');")
+
+    # Unchanged file: nothing reloaded
+    assert ingest(db_path, tmp_path) == {}
+
+    write_csv(tmp_path / "receivers_data.csv", """
+Receiver_ID,Name,Type,City,Contact
+2,Bob,Shelter,Mumbai,222
+""")
+    assert ingest(db_path, tmp_path) == {"receivers": 1}
+    rows = conn.execute("SELECT Receiver_ID, City FROM receivers ORDER BY Receiver_ID;").fetchall()
+    conn.close()
+    assert rows == [(1, "Delhi"), (2, "Mumbai"), (3, "Goa")]
+
+
+def test_dates_are_stored_as_iso(tmp_path):
+    db_path = tmp_path / "food.db"
+    write_parents(tmp_path)
+    write_csv(tmp_path / "food_listings_data.csv", """
+Food_ID,Food_Name,Quantity,Expiry_Date,Provider_ID,Provider_Type,Location,Food_Type,Meal_Type
+1,Bread,43,3/17/2025,1,Grocery Store,Pune,Vegan,Breakfast
+""")
+    write_csv(tmp_path / "claims_data.csv", """
+Claim_ID,Food_ID,Receiver_ID,Status,Timestamp
+1,1,1,Pending,03-05-2025 05:26
+2,1,1,Completed,3/21/2025 0:59
+""")
+    ingest(db_path, tmp_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT Expiry_Date FROM food_listings;").fetchall() == [("2025-03-17",)]
+    assert conn.execute("SELECT Timestamp, Claim_Month FROM claims ORDER BY Claim_ID;").fetchall() == [
+        ("2025-03-05 05:26:00", "2025-03"),
+        ("2025-03-21 00:59:00", "2025-03"),
+    ]
+    conn.close()
+
+
+def test_bad_rows_are_quarantined_with_reasons(tmp_path):
+    db_path = tmp_path / "food.db"
+    write_parents(tmp_path)
+    write_csv(tmp_path / "food_listings_data.csv", """
+Food_ID,Food_Name,Quantity,Expiry_Date,Provider_ID,Provider_Type,Location,Food_Type,Meal_Type
+1,Bread,43,3/17/2025,1,Grocery Store,Pune,Vegan,Breakfast
+2,Rice,-5,3/18/2025,1,Grocery Store,Pune,Vegan,Lunch
+3,Soup,10,someday,1,Grocery Store,Pune,Vegan,Dinner
+4,Dal,10,3/18/2025,99,Grocery Store,Pune,Vegan,Dinner
+1,Bread again,5,3/19/2025,1,Grocery Store,Pune,Vegan,Breakfast
+""")
+    write_csv(tmp_path / "claims_data.csv", """
+Claim_ID,Food_ID,Receiver_ID,Status,Timestamp
+1,1,1,Pending,03-05-2025 05:26
+2,4,1,Pending,03-05-2025 05:26
+3,1,7,Pending,03-05-2025 05:26
+""")
+    report = ingest(db_path, tmp_path)
+    assert report == {"providers": 1, "receivers": 1, "food_listings": 1, "claims": 1}
+    assert report.quarantined == {"food_listings": 4, "claims": 2}
+    assert {"read", "parse (CPU)", "load"} <= set(report.timings)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT Food_Name FROM food_listings;").fetchall() == [("Bread",)]
+    assert conn.execute(
+        "SELECT Source_Row, Food_ID, Quantity, Expiry_Date, Reason FROM quarantine_food_listings ORDER BY Source_Row;"
+    ).fetchall() == [
+        (2, "2", "-5", "3/18/2025", "Quantity is negative"),
+        (3, "3", "10", "someday", "unparseable Expiry_Date"),
+        (4, "4", "10", "2025-03-18", "unknown Provider_ID"),
+        (5, "1", "5", "2025-03-19", "duplicate Food_ID"),
+    ]
+    # Claims on a quarantined listing are themselves quarantined
+    assert conn.execute("SELECT Claim_ID, Reason FROM quarantine_claims ORDER BY Claim_ID;").fetchall() == [
+        ("2", "unknown Food_ID"),
+        ("3", "unknown Receiver_ID"),
+    ]
+
+    # Reloading a fixed file clears its quarantined rows
+    write_csv(tmp_path / "claims_data.csv", """
+Claim_ID,Food_ID,Receiver_ID,Status,Timestamp
+1,1,1,Pending,03-05-2025 05:26
+""")
+    assert ingest(db_path, tmp_path).quarantined == {}
+    assert conn.execute("SELECT COUNT(*) FROM quarantine_claims;").fetchone() == (0,)
+    conn.close()
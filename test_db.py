@@ -0,0 +1,50 @@
+import sqlite3
+import threading
+
+import pytest
+
+import db
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+
+
+def test_pool_shares_wal_connections_across_threads():
+    pool = db.get_pool()
+    assert db.table_exists("claims")
+    assert not db.table_exists("no_such_table")
+
+    db.exec_query("INSERT INTO receivers (Receiver_ID, Name) VALUES (?, ?);", (1, "Ann"))
+    counts = []
+
+    def read():
+        counts.append(int(db.run_query("SELECT COUNT(*) FROM receivers;").iloc[0, 0]))
+
+    threads = [threading.Thread(target=read) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert counts == [1] * 20
+    assert db.run_query("PRAGMA journal_mode;").iloc[0, 0] == "wal"
+    assert pool._idle.qsize() <= db.POOL_SIZE
+
+
+def test_ddl_refreshes_catalog():
+    assert not db.table_exists("scratch")
+    db.exec_query("CREATE TABLE scratch (x INTEGER);")
+    assert db.table_exists("scratch")
+
+
+def test_read_only_queries_reject_writes_and_honour_timeouts():
+    with pytest.raises(sqlite3.OperationalError):
+        db.run_query("INSERT INTO receivers (Receiver_ID, Name) VALUES (1, 'Ann') RETURNING Receiver_ID;",
+                     cache=False, read_only=True)
+    slow = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n;"
+    with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+        db.run_query(slow, cache=False, read_only=True, timeout=0.05)
+    # The connection goes back to the pool without its deadline
+    assert db.run_query("SELECT 1 AS x;", cache=False, read_only=True).iloc[0, 0] == 1
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import db
+import expiry_sweeper
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+
+
+def test_expiry_status_is_set_on_write_and_advanced_by_the_sweeper():
+    today = expiry_sweeper.utc_now().date()
+    for food_id, days in ((1, -1), (2, 3), (3, 10)):
+        db.exec_query("INSERT INTO food_listings (Food_ID, Food_Name, Quantity, Expiry_Date, Provider_Type) "
+                      "VALUES (?, 'Rice', 2, ?, 'Restaurant');", (food_id, (today + timedelta(days=days)).isoformat()))
+
+    def statuses():
+        return db.run_query("SELECT Expiry_Status FROM food_listings ORDER BY Food_ID;")["Expiry_Status"].tolist()
+
+    def counts():
+        rows = db.run_query("SELECT Expiry_Status, Listing_Count FROM agg_expiry_status WHERE Listing_Count > 0;")
+        return dict(zip(rows["Expiry_Status"], rows["Listing_Count"]))
+
+    assert statuses() == ["Expired", "Expiring", "Available"]
+    assert counts() == {"Expired": 1, "Expiring": 1, "Available": 1}
+
+    sweeper = expiry_sweeper.ExpirySweeper()
+    now = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=12)
+    sweeper.schedule(now)
+    assert sweeper.run_pending(now) == {"Expired": 0, "Expiring": 0}
+    # Next wake-up: listing 3 starts expiring at midnight three days from now
+    assert sweeper.next_due() == now - timedelta(hours=12) + timedelta(days=3)
+    assert sweeper.run_pending(now + timedelta(days=1)) is None
+
+    later = now + timedelta(days=5)
+    assert sweeper.run_pending(later) == {"Expired": 1, "Expiring": 1}
+    assert statuses() == ["Expired", "Expired", "Expiring"]
+    assert counts() == {"Expired": 2, "Expiring": 1}
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+import pyarrow.parquet as pq
+import pytest
+
+import db
+import export
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+
+
+def test_exports_stream_every_row_in_each_format():
+    db.executemany("INSERT INTO receivers (Receiver_ID, Name, City) VALUES (?, ?, ?);",
+                   [(i, f"Receiver {i}", None if i % 2 else "Delhi") for i in range(1, 8)])
+    sql = "SELECT Receiver_ID, Name, City FROM receivers ORDER BY Receiver_ID;"
+
+    out = io.BytesIO()
+    assert export.export_sql(sql, out, "csv", batch_rows=3) == 7
+    rows = list(csv.reader(io.StringIO(out.getvalue().decode())))
+    assert rows[0] == ["Receiver_ID", "Name", "City"] and len(rows) == 8
+
+    out = io.BytesIO()
+    export.export_sql(sql, out, "jsonl", batch_rows=3)
+    lines = [json.loads(line) for line in out.getvalue().decode().splitlines()]
+    assert lines[1] == {"Receiver_ID": 2, "Name": "Receiver 2", "City": "Delhi"}
+
+    out = io.BytesIO()
+    export.export_sql(sql, out, "parquet", batch_rows=3)
+    table = pq.read_table(io.BytesIO(out.getvalue()))
+    assert table.num_rows == 7 and table.column("City").to_pylist()[:2] == [None, "Delhi"]
+    assert pq.ParquetFile(io.BytesIO(out.getvalue())).num_row_groups == 3
+
+    # No rows still gives a header
+    out = io.BytesIO()
+    assert export.export_sql("SELECT Name FROM providers;", out, "csv") == 0
+    assert out.getvalue().decode().strip() == "Name"
+
+
+def test_parquet_types_come_from_declared_columns_not_the_first_batch():
+    db.exec_query("INSERT INTO providers (Provider_ID, Name) VALUES (1, 'Bakery');")
+    db.executemany("INSERT INTO food_listings (Food_ID, Food_Name, Quantity, Provider_ID) VALUES (?, ?, ?, ?);",
+                   [(i, f"Food {i}", i, None if i <= 3 else 1) for i in range(1, 8)])
+    # Provider_ID (INTEGER) and the undeclared Note are all NULL in the first batch of three
+    sql = """SELECT Food_ID, Provider_ID, Location, CASE WHEN Food_ID > 3 THEN Food_ID END AS Note
+             FROM food_listings ORDER BY Food_ID;"""
+
+    out = io.BytesIO()
+    assert export.export_sql(sql, out, "parquet", batch_rows=3) == 7
+    table = pq.read_table(io.BytesIO(out.getvalue()))
+    assert str(table.schema.field("Provider_ID").type) == "int64"
+    assert str(table.schema.field("Location").type) == "string"
+    assert table.column("Provider_ID").to_pylist() == [None, None, None, 1, 1, 1, 1]
+    assert table.column("Note").to_pylist() == [None, None, None, "4", "5", "6", "7"]
+
+
+def test_expired_export_reads_the_date_not_the_stored_status():
+    past, future = (date.today() - timedelta(days=3)).isoformat(), (date.today() + timedelta(days=30)).isoformat()
+    db.executemany("INSERT INTO food_listings (Food_ID, Quantity, Expiry_Date, Provider_Type) VALUES (?, ?, ?, ?);",
+                   [(1, 5, past, "Restaurant"), (2, 7, past, "Restaurant"), (3, 2, future, "Restaurant"),
+                    (4, 1, past, None)])
+    # As if no sweeper ran since the listings expired
+    db.exec_query("UPDATE food_listings SET Expiry_Status = 'Available';")
+
+    out = io.BytesIO()
+    assert export.export_query("expired_by_provider_type", out, "csv") == 2
+    rows = list(csv.reader(io.StringIO(out.getvalue().decode())))
+    assert rows[1:] == [["Restaurant", "2", "12"], ["Unknown", "1", "1"]]
@@ -0,0 +1,48 @@
+import sqlite3
+
+import db
+import load_test
+from synthetic_data import write_database
+
+
+def test_sessions_read_and_write_concurrently(tmp_path, monkeypatch):
+    template = tmp_path / "template.db"
+    write_database(template, 300)
+    monkeypatch.setattr(load_test, "LOAD_DIR", tmp_path / "load")
+    monkeypatch.setattr(db, "DB_PATH", db.DB_PATH)
+
+    level = load_test.run_level(template, sessions=3, actions=4, write_ratio=0.5, think_ms=0, seed=1)
+    assert level["error_samples"] == [] and level["errors"] == 0
+    assert level["latency"]["open"]["count"] == 3
+    assert level["runs"] == sum(entry["count"] for action, entry in level["latency"].items() if action != "all reruns")
+    assert level["process_peak_rss_mb"] > 0 and level["rss_growth_mb"] >= 0
+
+    writes = level["latency"].get("write", {}).get("count", 0)
+    assert writes > 0
+    conn = sqlite3.connect(tmp_path / "load" / "load_3.db")
+    added = conn.execute("SELECT COUNT(*) FROM receivers WHERE City = 'Load City';").fetchone()[0]
+    conn.close()
+    assert 0 < added <= writes
+    # The template itself is never written to
+    conn = sqlite3.connect(template)
+    assert conn.execute("SELECT COUNT(*) FROM receivers WHERE City = 'Load City';").fetchone()[0] == 0
+    conn.close()
+
+
+def test_server_state_is_restored_after_the_block():
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    before = (Runtime.instance, Runtime.exists, ScriptCache.get_bytecode, config.get_option)
+    with load_test.share_server_state():
+        assert config.get_option("global.appTest") is True
+        assert ScriptCache.get_bytecode is not before[2]
+    assert (Runtime.instance, Runtime.exists, ScriptCache.get_bytecode, config.get_option) == before
+
+
+def test_fell_over_on_latency_or_errors():
+    level = {"latency": {"all reruns": {"p95_ms": 100.0}}, "error_rate": 0.0}
+    assert not load_test.fell_over(level, max_p95_ms=200)
+    assert load_test.fell_over(level, max_p95_ms=50)
+    assert load_test.fell_over({**level, "error_rate": 0.5}, max_p95_ms=200, max_error_rate=0.01)
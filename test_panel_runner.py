@@ -0,0 +1,55 @@
+import sys
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import db
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+    # AppTest leaves its script as __main__, which spawned process pools (partitions.py) would re-run
+    monkeypatch.setitem(sys.modules, "__main__", sys.modules["__main__"])
+    db.executemany("INSERT INTO providers (Provider_ID, Name, Type) VALUES (?, ?, ?);",
+                   [(1, "Bakery", "Restaurant"), (2, "Market", "Grocery Store")])
+
+
+def page():
+    import streamlit as st
+
+    from panel_runner import Panel, run_panels
+
+    # Counting to a few million takes SQLite a fraction of a second; to ten billion, far longer
+    count_to = "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < {}) SELECT COUNT(*) AS N FROM n;"
+    drawn = st.session_state.setdefault("drawn", [])
+    st.session_state["outcomes"] = run_panels([
+        Panel("Slow", count_to.format(2_000_000), lambda df: drawn.append("Slow")),
+        Panel("Hung", count_to.format(10_000_000_000), lambda df: drawn.append("Hung"), timeout=0.3),
+        Panel("Broken", "SELECT * FROM no_such_table;", lambda df: drawn.append("Broken")),
+        Panel("Providers", "SELECT Name FROM providers ORDER BY Name;", lambda df: drawn.append("Providers")),
+        Panel("Not built", "SELECT * FROM agg_missing;", lambda df: drawn.append("Not built"),
+              requires="agg_missing", empty="Nothing yet."),
+    ])
+
+
+def test_panels_render_as_they_finish_and_failures_stay_contained():
+    at = AppTest.from_function(page, default_timeout=30)
+    at.run()
+    assert not at.exception
+
+    # Every panel keeps its place on the page; the quick one is drawn before the slow one above it
+    assert [h.value for h in at.subheader] == ["Slow", "Hung", "Broken", "Providers", "Not built"]
+    assert at.session_state["drawn"] == ["Providers", "Slow"]
+
+    outcomes = at.session_state["outcomes"]
+    assert outcomes["Slow"].iloc[0, 0] == 2_000_000
+    assert list(outcomes["Providers"]["Name"]) == ["Bakery", "Market"]
+    assert outcomes["Not built"].empty
+    # The hung query is interrupted at its timeout and the broken one reports its error
+    assert "interrupted" in str(outcomes["Hung"])
+    assert "no_such_table" in str(outcomes["Broken"])
+    # (Streamlit moves the leading ⚠️ into the alert's icon)
+    assert [w.value for w in at.warning] == ["Hung is unavailable right now (interrupted).",
+                                             "Broken is unavailable right now (no such table: no_such_table)."]
+    assert [i.value for i in at.info] == ["Nothing yet."]
@@ -0,0 +1,158 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+import partitions
+from sql_queries import SQL_QUERIES
+from synthetic_data import write_database
+
+
+def rows(frame):
+    return sorted(map(tuple, frame.astype(str).values.tolist()))
+
+
+def test_fan_out_matches_the_single_database(tmp_path):
+    source, directory = tmp_path / "food.db", tmp_path / "regions"
+    write_database(source, 500)
+    counts = partitions.build_partitions(source, directory, regions=3)
+    assert sum(c["claims"] for c in counts.values()) == 500
+
+    conn = sqlite3.connect(source)
+    for name, sql in SQL_QUERIES.items():
+        merged, single = partitions.fan_out(name, directory), pd.read_sql_query(sql, conn)
+        spec = partitions.MERGE_SPECS[name]
+        if spec.limit:
+            # Ties at the cut-off may pick different rows; the ranked values must agree
+            column = spec.order[0]
+            assert merged[column].tolist() == single[column].tolist(), name
+        else:
+            assert rows(merged) == rows(single), name
+
+    # A city's providers are all in its shard
+    city = conn.execute("SELECT City FROM providers LIMIT 1;").fetchone()[0]
+    shard = sqlite3.connect(partitions.shard_path_for(city, directory))
+    expected = conn.execute("SELECT COUNT(*) FROM providers WHERE City = ?;", (city,)).fetchone()
+    assert shard.execute("SELECT COUNT(*) FROM providers WHERE City = ?;", (city,)).fetchone() == expected
+    conn.close()
+
+    # Receiver edits go to the source and reach global.db and every shard's replica (and claims_enriched)
+    with sqlite3.connect(source) as src:
+        src.execute("UPDATE receivers SET Name = 'Renamed' WHERE Receiver_ID = 1;")
+    assert partitions.sync_shards(directory=directory) == len(counts) + 1
+    glob = sqlite3.connect(partitions.global_path(directory))
+    assert glob.execute("SELECT Name FROM receivers WHERE Receiver_ID = 1;").fetchone() == ("Renamed",)
+    glob.close()
+    names = {shard.execute("SELECT Name FROM receivers WHERE Receiver_ID = 1;").fetchone()[0]}
+    names |= {n for (n,) in shard.execute("SELECT DISTINCT Receiver_Name FROM claims_enriched WHERE Receiver_ID = 1;")}
+    assert names == {"Renamed"}
+    shard.close()
+
+
+def test_shards_follow_writes_to_the_source(tmp_path):
+    source, directory = tmp_path / "food.db", tmp_path / "regions"
+    write_database(source, 300)
+    partitions.build_partitions(source, directory, regions=3)
+    # Nothing written since the build: every sync is a no-op
+    assert partitions.sync_shards(directory=directory) == 0
+
+    conn = sqlite3.connect(source)
+    food_id, city = conn.execute("""
+        SELECT f.Food_ID, p.City FROM food_listings f JOIN providers p ON p.Provider_ID = f.Provider_ID LIMIT 1;
+    """).fetchone()
+    with conn:
+        claim_id = conn.execute("""
+            INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) VALUES (?, 1, 'Pending', '2025-03-01 10:00:00');
+        """, (food_id,)).lastrowid
+        conn.execute("UPDATE providers SET Name = 'Renamed' WHERE City = ?;", (city,))
+        deleted = conn.execute("SELECT Claim_ID FROM claims WHERE Claim_ID != ? LIMIT 1;", (claim_id,)).fetchone()[0]
+        conn.execute("DELETE FROM claims WHERE Claim_ID = ?;", (deleted,))
+
+    shard_path = partitions.shard_path_for(city, directory)
+    assert partitions.sync_shard(shard_path, directory=directory) > 0
+    assert partitions.sync_shard(shard_path, directory=directory) == 0
+    partitions.sync_shards(directory=directory)
+    shard = sqlite3.connect(shard_path)
+    assert shard.execute("SELECT Food_ID, Status FROM claims WHERE Claim_ID = ?;", (claim_id,)).fetchone() == (food_id, "Pending")
+    assert {n for (n,) in shard.execute("SELECT Name FROM providers WHERE City = ?;", (city,))} == {"Renamed"}
+    shard.close()
+
+    # Claim IDs come from the source only, so the fan-out agrees with it again
+    for name in ("total_claims", "claims_by_status"):
+        assert rows(partitions.fan_out(name, directory)) == rows(pd.read_sql_query(SQL_QUERIES[name], conn)), name
+    assert not any(
+        sqlite3.connect(path).execute("SELECT 1 FROM claims WHERE Claim_ID = ?;", (deleted,)).fetchone()
+        for path in partitions.shard_paths(directory)
+    )
+    conn.close()
+
+
+def shard_rows(directory, sql, params=()):
+    return {path.stem: sqlite3.connect(path).execute(sql, params).fetchall() for path in partitions.shard_paths(directory)}
+
+
+def test_sync_copies_only_logged_rows_and_moves_them_between_shards(tmp_path):
+    from schema import suspend_triggers
+
+    source, directory = tmp_path / "food.db", tmp_path / "regions"
+    write_database(source, 300)
+    partitions.build_partitions(source, directory, regions=3)
+    conn = sqlite3.connect(source)
+    provider, city = conn.execute("""
+        SELECT p.Provider_ID, p.City FROM providers p
+        WHERE EXISTS (SELECT 1 FROM claims c JOIN food_listings f USING (Food_ID) WHERE f.Provider_ID = p.Provider_ID)
+        LIMIT 1;
+    """).fetchone()
+    moved_to = next(f"City {i}" for i in range(100) if partitions.region_of(f"City {i}", 3)
+                    != partitions.region_of(city, 3))
+    listings = conn.execute("SELECT COUNT(*) FROM food_listings WHERE Provider_ID = ?;", (provider,)).fetchone()[0]
+    with conn:
+        conn.execute("UPDATE providers SET City = ? WHERE Provider_ID = ?;", (moved_to, provider))
+
+    # The provider, its listings and their claims leave the old shard and arrive in the new one
+    assert partitions.sync_shards(directory=directory) > listings
+    found = shard_rows(directory, "SELECT COUNT(*) FROM food_listings WHERE Provider_ID = ?;", (provider,))
+    assert found[partitions.region_of(moved_to, 3)] == [(listings,)]
+    assert found[partitions.region_of(city, 3)] == [(0,)]
+    for name in ("total_food_listings", "total_claims", "claims_per_provider"):
+        assert rows(partitions.fan_out(name, directory)) == rows(pd.read_sql_query(SQL_QUERIES[name], conn)), name
+    # Every replica has applied the log, so only its newest entry is kept
+    assert conn.execute("SELECT COUNT(*) FROM row_changes;").fetchone()[0] == 1
+
+    # A bulk load drops the logging triggers; its marker makes the next sync a full pass
+    with conn:
+        with suspend_triggers(conn):
+            conn.execute("UPDATE food_listings SET Quantity = Quantity + 1;")
+    assert partitions.sync_shards(directory=directory) >= 300
+    assert rows(partitions.fan_out("total_food_listings", directory)) == rows(
+        pd.read_sql_query(SQL_QUERIES["total_food_listings"], conn))
+    assert sum(q for (q,) in sum(shard_rows(directory, "SELECT SUM(Quantity) FROM food_listings;").values(), [])) == \
+        conn.execute("SELECT SUM(Quantity) FROM food_listings;").fetchone()[0]
+    conn.close()
+
+
+def test_allocation_reads_the_main_database_for_a_city_without_a_shard(tmp_path, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    import db
+    from allocation import propose_allocations
+
+    source, directory = tmp_path / "food.db", tmp_path / "regions"
+    write_database(source, 300)
+    partitions.build_partitions(source, directory, regions=3)
+    monkeypatch.setattr(db, "DB_PATH", source)
+    monkeypatch.setattr(partitions, "PARTITIONS_DIR", directory)
+    # AppTest leaves its script as __main__, which spawned process pools would re-run
+    monkeypatch.setitem(sys.modules, "__main__", sys.modules["__main__"])
+    city = sqlite3.connect(source).execute("SELECT City FROM receivers ORDER BY City LIMIT 1;").fetchone()[0]
+    (directory / f"{partitions.region_of(city, 3)}.db").unlink()
+    assert partitions.shard_path_for(city) is None
+
+    at = AppTest.from_file(str(Path(partitions.__file__).with_name("app.py")), default_timeout=120)
+    at.session_state["page"] = "Allocation"
+    at.run()
+    next(s for s in at.selectbox if s.label == "City").set_value(city).run()
+    assert not at.exception
+    matched = next(m for m in at.metric if m.label == "Listings Matched")
+    assert int(matched.value) == len(propose_allocations(city))
@@ -0,0 +1,33 @@
+import pytest
+
+import db
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+
+
+def test_cached_results_are_invalidated_by_writes():
+    sql = "SELECT COUNT(*) AS n FROM receivers;"
+    assert db.run_query(sql).iloc[0, 0] == 0
+    assert db.run_query(sql).iloc[0, 0] == 0
+    stats = db.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    db.exec_query("INSERT INTO receivers (Receiver_ID, Name) VALUES (1, 'Ann');")
+    assert db.run_query(sql).iloc[0, 0] == 1
+    # Writes to other tables keep the entry warm
+    db.exec_query("INSERT INTO providers (Provider_ID, Name) VALUES (1, 'Bakery');")
+    assert db.run_query(sql).iloc[0, 0] == 1
+    assert db.cache_stats()["hits"] == 2
+
+
+def test_cache_is_memory_bounded():
+    cache = db.get_pool().cache
+    cache.max_bytes = 4096
+    for i in range(50):
+        db.run_query("SELECT ? AS n, Name FROM providers;", (i,))
+    stats = db.cache_stats()
+    assert stats["bytes"] <= 4096
+    assert stats["evictions"] > 0
@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+import db
+import query_log
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+
+
+def test_queries_are_recorded_with_section_and_cache_outcome(tmp_path, monkeypatch):
+    slow_log = tmp_path / "slow.jsonl"
+    monkeypatch.setattr(query_log, "SLOW_LOG_PATH", str(slow_log))
+    monkeypatch.setattr(query_log, "SLOW_MS", 0.0)
+    query_log.clear()
+    with query_log.section("KPIs"):
+        db.run_query("SELECT COUNT(*) FROM claims;")
+        db.run_query("SELECT COUNT(*) FROM claims;")
+    db.exec_query("INSERT INTO receivers (Receiver_ID, Name) VALUES (1, 'Ann');")
+
+    records = query_log.records()
+    assert [r["cache"] for r in records] == ["miss", "hit", "write"]
+    assert [r["section"] for r in records] == ["KPIs", "KPIs", ""]
+    assert records[2]["rows"] == 1
+    assert len(slow_log.read_text().splitlines()) == 3
+    assert json.loads(slow_log.read_text().splitlines()[0])["sql"] == "SELECT COUNT(*) FROM claims;"
+    assert query_log.query_stats().loc[0, "calls"] >= 1
@@ -0,0 +1,27 @@
+import sqlite3
+
+import schema
+
+
+def test_iso_date_migration_quarantines_unparseable_dates(capsys):
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    # Tables as pandas.to_sql left them before v1: no keys, dates as they came in the CSVs
+    conn.execute("CREATE TABLE food_listings (Food_ID INTEGER, Food_Name TEXT, Quantity INTEGER, Expiry_Date TEXT);")
+    conn.executemany("INSERT INTO food_listings VALUES (?, ?, ?, ?);",
+                     [(1, "Rice", 3, "3/17/2025"), (2, "Soup", 2, "soon"), (3, "Bread", 1, "2025-03-18"), (4, "Dal", 1, "")])
+    conn.execute("CREATE TABLE claims (Claim_ID INTEGER, Food_ID INTEGER, Status TEXT, Timestamp TEXT);")
+    conn.executemany("INSERT INTO claims VALUES (?, ?, ?, ?);",
+                     [(1, 1, "Pending", "3/5/2025 10:30"), (2, 3, "Completed", "yesterday-ish")])
+
+    assert schema.migrate(conn) == schema.SCHEMA_VERSION
+    assert conn.execute("SELECT Food_ID, Expiry_Date FROM food_listings ORDER BY Food_ID;").fetchall() == [
+        (1, "2025-03-17"), (2, None), (3, "2025-03-18"), (4, None)]
+    assert conn.execute("SELECT Claim_ID, Timestamp FROM claims ORDER BY Claim_ID;").fetchall() == [
+        (1, "2025-03-05 10:30:00"), (2, None)]
+
+    # The rejected rows keep their original values in quarantine; a blank date is not a rejection
+    assert conn.execute("SELECT Source_File, Source_Row, Reason, Food_Name, Expiry_Date FROM quarantine_food_listings;").fetchall() == [
+        (schema.ISO_DATES_SOURCE, 2, "unparseable Expiry_Date", "Soup", "soon")]
+    assert conn.execute("SELECT Source_Row, Reason, Timestamp FROM quarantine_claims;").fetchall() == [
+        (2, "unparseable Timestamp", "yesterday-ish")]
+    assert "2 unparseable dates set to NULL" in capsys.readouterr().out
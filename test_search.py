@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+import db
+import search
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+
+
+def test_search_index_follows_listing_writes():
+    db.exec_query("INSERT INTO providers (Provider_ID, Name, City) VALUES (1, 'Green Bakery', 'Delhi');")
+    db.exec_query("INSERT INTO food_listings (Food_ID, Food_Name, Provider_ID, Location) VALUES (7, 'Chicken Curry', 1, 'Delhi');")
+    assert search.search_listings("chick del")["Food_ID"].tolist() == [7]
+    assert search.search_listings("bak")["Provider_Name"].tolist() == ["Green Bakery"]
+    assert search.search_providers("green")["Provider_ID"].tolist() == [1]
+
+    db.exec_query("UPDATE food_listings SET Food_Name = 'Rice' WHERE Food_ID = 7;")
+    assert search.search_listings("chick").empty
+    db.exec_query("DELETE FROM food_listings WHERE Food_ID = 7;")
+    assert search.search_listings("rice").empty
+    # Punctuation never reaches FTS5 as query syntax
+    assert search.fts_query('chick" OR *') == '"chick"* "OR"*'
+
+    # Listings without a location or provider read '?', whether pandas holds the NULL as None or NaN
+    db.exec_query("INSERT INTO food_listings (Food_ID, Food_Name) VALUES (8, 'Soup');")
+    assert search.picker_labels(search.search_listings("soup"), "Food_ID", search.describe_listing) == {8: "8 – Soup (?, ?)"}
+    providers = pd.DataFrame({"Provider_ID": [2, 3], "Name": ["Corner Cafe", "Deli"], "City": [float("nan"), "Pune"]})
+    assert search.picker_labels(providers, "Provider_ID", search.describe_provider) == {
+        2: "2 – Corner Cafe (?)", 3: "3 – Deli (Pune)"}
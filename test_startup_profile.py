@@ -0,0 +1,22 @@
+from startup_profile import parse_importtime, profile_page
+from synthetic_data import write_database
+
+
+def test_parse_importtime_keeps_top_level_modules():
+    text = """
+import time: self [us] | cumulative | imported package
+import time:       217 |        217 |     _json
+import time:       585 |       1372 |   json.decoder
+import time:       327 |       2337 | json
+import time:      1000 |       3000 | altair
+"""
+    assert parse_importtime(text) == {"json": 2.337, "altair": 3.0}
+
+
+def test_table_pages_do_not_import_chart_modules(tmp_path):
+    path = tmp_path / "food.db"
+    write_database(path, 200)
+    result = profile_page("Providers", path)
+    assert result["errors"] == []
+    assert "altair" not in result["imports"] and "charts" not in result["imports"]
+    assert result["first_ms"] >= result["import_ms"] > 0
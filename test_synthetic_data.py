@@ -0,0 +1,34 @@
+import sqlite3
+
+from synthetic_data import EPOCH, dataset_sizes, write_database
+
+
+def test_tiny_database_has_the_planned_rows_and_valid_keys(tmp_path):
+    path = tmp_path / "synthetic.db"
+    sizes = write_database(path, 200, seed=7, chunk_size=64)
+    assert sizes == dataset_sizes(200) == {"providers": 50, "receivers": 50, "food_listings": 200, "claims": 200}
+
+    conn = sqlite3.connect(path)
+    for table, count in sizes.items():
+        assert conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0] == count, table
+    assert conn.execute("PRAGMA foreign_key_check;").fetchall() == []
+    assert conn.execute("SELECT COUNT(*) FROM claims WHERE Food_ID IS NULL OR Receiver_ID IS NULL;").fetchone()[0] == 0
+    # Derived tables are rebuilt after the bulk load
+    assert dict(conn.execute("SELECT Table_Name, Row_Count FROM agg_table_counts;")) == sizes
+    # Dates are anchored to EPOCH, not the day the test runs
+    first, last = conn.execute("SELECT MIN(Expiry_Date), MAX(Expiry_Date) FROM food_listings;").fetchone()
+    assert "2025-01-30" <= first and last <= "2025-03-31"
+    assert conn.execute("SELECT MAX(Timestamp) FROM claims;").fetchone()[0] < EPOCH.isoformat()
+    conn.close()
+
+
+def test_same_seed_gives_the_same_rows(tmp_path):
+    def dump(path):
+        write_database(path, 100, seed=3)
+        conn = sqlite3.connect(path)
+        rows = conn.execute("SELECT * FROM food_listings ORDER BY Food_ID;").fetchall()
+        rows += conn.execute("SELECT * FROM claims ORDER BY Claim_ID;").fetchall()
+        conn.close()
+        return rows
+
+    assert dump(tmp_path / "a.db") == dump(tmp_path / "b.db")
@@ -0,0 +1,75 @@
+import pytest
+
+import db
+from table_views import VIEWS, count_rows, fetch_page, view_sql, where_clause
+
+DATES = [None, "2025-03-01", "2025-03-01", "2025-03-02", None, "2025-03-02", "2025-03-01", "2025-03-03"]
+
+
+@pytest.fixture(autouse=True)
+def temp_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "food.db")
+    # 24 listings over four expiry dates (NULL included), two provider types; every third is claimed
+    db.executemany("INSERT INTO food_listings (Food_ID, Food_Name, Quantity, Expiry_Date, Provider_Type) "
+                   "VALUES (?, ?, ?, ?, ?);",
+                   [(i, f"Food {i}", i, DATES[i % len(DATES)], "Restaurant" if i % 2 else "Grocery Store")
+                    for i in range(1, 25)])
+    db.executemany("INSERT INTO claims (Food_ID, Status) VALUES (?, 'Pending');", [(i,) for i in range(3, 25, 3)])
+
+
+def walk(view, page_size, **kwargs):
+    """Every page from the first, following the cursors the way the table widget does."""
+    cursors, pages = [None], []
+    while True:
+        page, last = fetch_page(view, after=cursors[-1], page_size=page_size, **kwargs)
+        pages.append(list(page[view.key]))
+        if last is None or len(page) < page_size:
+            return pages, cursors
+        cursors.append(last)
+
+
+def expected(view, **kwargs):
+    sql, params = view_sql(view, **kwargs)
+    return list(db.run_query(sql, params)[view.key])
+
+
+def test_pages_follow_the_sort_order_across_duplicate_values():
+    view = VIEWS["unclaimed_listings"]
+    pages, cursors = walk(view, 3)
+    rows = [key for page in pages for key in page]
+    # NULL expiries first, then by date, ties in Food_ID order; no listing repeated or skipped
+    assert rows == expected(view) and len(rows) == 16
+    dates = {i: DATES[i % len(DATES)] for i in rows}
+    assert [dates[i] for i in rows] == sorted(dates.values(), key=lambda d: (d is not None, d))
+    assert rows == sorted(rows, key=lambda i: (dates[i] is not None, dates[i], i))
+
+    # Previous: the cursor one back gives the same page again
+    for n in range(1, len(cursors)):
+        assert list(fetch_page(view, after=cursors[n - 1], page_size=3)[0][view.key]) == pages[n - 1]
+
+
+def test_filters_apply_together_with_the_cursor():
+    view = VIEWS["unclaimed_listings"]
+    filters = {"Provider_Type": ["Restaurant"], "City": []}
+    date_range = ("2025-03-01", "2025-03-02")
+    pages, _ = walk(view, 2, filters=filters, date_range=date_range)
+    rows = [key for page in pages for key in page]
+    assert rows == expected(view, filters=filters, date_range=date_range)
+    assert rows and all(i % 2 and i % 3 and DATES[i % len(DATES)] in ("2025-03-01", "2025-03-02") for i in rows)
+
+    clauses, params = where_clause(view, filters, date_range)
+    assert clauses[0] == view.where and params == ["Restaurant", "2025-03-01", "2025-03-02"]
+
+
+def test_counts_follow_writes():
+    listings, unclaimed = VIEWS["food_listings"], VIEWS["unclaimed_listings"]
+    restaurants = {"Provider_Type": ["Restaurant"]}
+    assert (count_rows(listings), count_rows(listings, restaurants), count_rows(unclaimed)) == (24, 12, 16)
+    # Read again from the result cache
+    assert count_rows(listings, restaurants) == 12
+
+    db.exec_query("INSERT INTO food_listings (Food_ID, Food_Name, Provider_Type) VALUES (25, 'Soup', 'Restaurant');")
+    assert (count_rows(listings), count_rows(listings, restaurants), count_rows(unclaimed)) == (25, 13, 17)
+    db.exec_query("INSERT INTO claims (Food_ID, Status) VALUES (1, 'Pending');")
+    assert count_rows(unclaimed) == 16
+    assert count_rows(unclaimed, restaurants) == len(expected(unclaimed, filters=restaurants)) == 8